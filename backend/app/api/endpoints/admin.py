@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Dict, Any, List, Optional
+
+from app.services.profiler import ProfileStore
+from app.dependencies import (
+    require_admin, get_profile_store, get_continuous_profiler,
+    start_continuous_profiler, stop_continuous_profiler
+)
+from app.config import settings
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/profiles")
+async def list_profiles(store: ProfileStore = Depends(get_profile_store)) -> List[Dict[str, Any]]:
+    """
+    List stored request profiles, newest first.
+    """
+    return store.list()
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, store: ProfileStore = Depends(get_profile_store)) -> Dict[str, Any]:
+    """
+    Get a request profile: CPU summary, top allocation sites and folded stacks.
+    """
+    profile = store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return profile
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+async def get_profile_folded(profile_id: str, store: ProfileStore = Depends(get_profile_store)):
+    """
+    Get the CPU samples of a request profile as folded stacks, for flamegraph.pl or speedscope.
+    """
+    profile = store.get(profile_id)
+    if profile is None or "folded" not in profile:
+        raise HTTPException(status_code=404, detail=f"No CPU profile {profile_id}")
+    return PlainTextResponse(profile["folded"])
+
+@router.get("/profiling/sampling")
+async def get_sampling() -> Dict[str, Any]:
+    """
+    Aggregated profile of the continuous sampler, including the hot paths.
+    """
+    profiler = get_continuous_profiler()
+    if profiler is None:
+        return {"enabled": False}
+    return {"enabled": profiler.running, **profiler.summary()}
+
+@router.get("/profiling/sampling/folded", response_class=PlainTextResponse)
+async def get_sampling_folded():
+    """
+    Folded stacks of the continuous sampler.
+    """
+    profiler = get_continuous_profiler()
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Continuous sampling has not run")
+    return PlainTextResponse(profiler.folded())
+
+@router.post("/profiling/sampling")
+async def set_sampling(enabled: bool, interval: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Start (resetting the aggregate) or stop continuous sampling of the event loop.
+    """
+    if enabled:
+        # Runs on the event loop thread, which becomes the sampled thread
+        profiler = start_continuous_profiler(interval or settings.PROFILE_SAMPLING_INTERVAL)
+        return {"enabled": True, "interval_seconds": profiler.interval}
+    stop_continuous_profiler()
+    return {"enabled": False}
\ No newline at end of file
@@ -1,10 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional
+from app.models.collection import BatchCollectionRequest
+from app.models.job import JobSubmission
 from app.services.aws_collector import AwsCollectorService
+from app.services.collection_scheduler import CollectionScheduler
 from app.services.neo4j_service import Neo4jService
 from app.services.nlp_service import NLPService
-from app.dependencies import get_neo4j_service
+from app.services.job_service import JobService, JobContext
+from app.services.checkpoint_store import CheckpointStore
+from app.services.bulk_loader import BulkLoader, LOAD_MODES
+from app.dependencies import get_neo4j_service, get_job_service, get_checkpoint_store, get_bulk_loader
+from app.config import settings
 import os
 
 router = APIRouter()
@@ -13,29 +20,25 @@ class AwsCredentials(BaseModel):
     aws_access_key_id: str = ""
     aws_secret_access_key: str = ""
     aws_region: str = "us-east-1"
-    openai_api_key: str = ""
     use_sample_data: bool = False
 
-@router.post("/collect")
+@router.post("/collect", response_model=JobSubmission, status_code=202)
 async def collect_aws_data(
     credentials: AwsCredentials,
-    neo4j_service: Neo4jService = Depends(get_neo4j_service)
+    neo4j_service: Neo4jService = Depends(get_neo4j_service),
+    job_service: JobService = Depends(get_job_service)
 ):
-    try:
-        # Set environment variables for the AWS collector
-        if not credentials.use_sample_data:
-            os.environ["AWS_ACCESS_KEY_ID"] = credentials.aws_access_key_id
-            os.environ["AWS_SECRET_ACCESS_KEY"] = credentials.aws_secret_access_key
-        
-        os.environ["AWS_REGION"] = credentials.aws_region
-        
-        if credentials.openai_api_key:
-            os.environ["OPENAI_API_KEY"] = credentials.openai_api_key
-        
+    """
+    Queue an AWS collection job. Poll /jobs/{job_id} for progress.
+    """
+    async def run(context: JobContext):
         # Clear existing data in Neo4j (optional)
-        neo4j_service.execute_query("MATCH (n) DETACH DELETE n")
+        context.report_progress(0.1, "Clearing existing graph")
+        await context.run_in_thread(neo4j_service.execute_query, "MATCH (n) DETACH DELETE n")
         
-        # Create AWS collector service with the provided credentials
+        # Create AWS collector service with the provided credentials. They stay
+        # with this job's boto3 session rather than os.environ, so jobs with
+        # different credentials can run at the same time
         aws_collector = AwsCollectorService(
             aws_access_key_id=credentials.aws_access_key_id if not credentials.use_sample_data else "",
             aws_secret_access_key=credentials.aws_secret_access_key if not credentials.use_sample_data else "",
@@ -44,12 +47,67 @@ async def collect_aws_data(
         )
         
         # Collect and store AWS data
-        result = await aws_collector.collect_and_store_aws_data()
+        context.report_progress(0.2, "Collecting AWS data")
+        result = await context.run_in_thread(aws_collector.collect_and_store)
+        if result.get("status") == "error":
+            raise Exception(result.get("message", "Unknown error"))
         
         return {
             "status": "success",
             "message": "AWS data collected and stored in Neo4j successfully",
             "details": result
         }
+    
+    try:
+        job, deduplicated = job_service.submit("aws_collect", settings.NEO4J_URI, credentials.dict(), run)
+        return JobSubmission(job_id=job.info.id, status=job.info.status, deduplicated=deduplicated)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/collect/batch", response_model=JobSubmission, status_code=202)
+async def collect_aws_data_batch(
+    request: BatchCollectionRequest,
+    neo4j_service: Neo4jService = Depends(get_neo4j_service),
+    job_service: JobService = Depends(get_job_service),
+    checkpoint_store: CheckpointStore = Depends(get_checkpoint_store),
+    bulk_loader: BulkLoader = Depends(get_bulk_loader)
+):
+    """
+    Queue a collection of many account/region targets, run in parallel under
+    per-account API rate budgets. The job result is a BatchCollectionResult.
+    
+    Progress is checkpointed under the job id. Submitting again with run_id set
+    to the id of an interrupted job skips its completed units and resumes
+    partial paginations.
+    """
+    if not request.targets:
+        raise HTTPException(status_code=400, detail="At least one collection target is required")
+    if request.load_mode not in LOAD_MODES:
+        raise HTTPException(status_code=400, detail=f"load_mode must be one of {', '.join(LOAD_MODES)}")
+    if request.snapshot_name and os.path.basename(request.snapshot_name) != request.snapshot_name:
+        raise HTTPException(status_code=400, detail="snapshot_name must be a plain directory name")
+    
+    async def run(context: JobContext):
+        scheduler = CollectionScheduler(
+            neo4j_service=neo4j_service,
+            targets=request.targets,
+            aws_access_key_id=request.aws_access_key_id,
+            aws_secret_access_key=request.aws_secret_access_key,
+            max_workers=request.max_workers or settings.COLLECTION_MAX_WORKERS,
+            progress=context.report_progress,
+            cancel_event=context.cancel_event,
+            checkpoint=checkpoint_store,
+            run_id=request.run_id or context.job_id,
+            bulk_loader=bulk_loader,
+            load_mode=request.load_mode,
+            snapshot_path=os.path.join(settings.SNAPSHOT_DIR, request.snapshot_name) if request.snapshot_name else ""
+        )
+        result = await context.run_in_thread(scheduler.run)
+        context.check_cancelled()
+        return result.dict()
+    
+    try:
+        job, deduplicated = job_service.submit("aws_collect_batch", settings.NEO4J_URI, request.dict(), run)
+        return JobSubmission(job_id=job.info.id, status=job.info.status, deduplicated=deduplicated)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,9 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
-import os
+from typing import Dict, Any, List, Optional
 
+from app.models.job import JobSubmission
+from app.models.synthetic import SyntheticEstateOptions
+from app.services.bulk_loader import LOAD_MODES, BulkLoader
 from app.services.cartography_service import CartographyService
+from app.services.cartography_log import CartographyRunLog
+from app.services.cartography_partition import plan_units, sync_stages
+from app.services.job_service import JobService, JobContext
+from app.dependencies import get_job_service, get_bulk_loader, get_cartography_worker_pool
 from app.services.neo4j_service import Neo4jService
 from app.config import settings
 
@@ -14,54 +20,169 @@ class CartographyOptions(BaseModel):
     collect_gcp: bool = False
     collect_okta: bool = False
     days_of_data: int = 7
+    # Split the run into unit processes that run in parallel
+    parallel: bool = False
+    max_parallel_units: int = 4
+    # AWS sync groups to run in parallel mode; empty runs the default groups
+    aws_sync_groups: List[str] = []
+    # One set of AWS units per profile; empty uses the request credentials
+    aws_profiles: List[str] = []
+    # Run in fresh cartography processes even when warm workers are configured
+    isolated: bool = False
 
 class CartographyRequest(BaseModel):
     aws_access_key_id: str = ""
     aws_secret_access_key: str = ""
     aws_region: str = "us-east-1"
-    openai_api_key: str = ""
     use_sample_data: bool = False
     advanced_options: Optional[CartographyOptions] = None
 
-@router.post("/run")
-async def run_cartography(request: CartographyRequest):
+@router.post("/run", response_model=JobSubmission, status_code=202)
+async def run_cartography(
+    request: CartographyRequest,
+    job_service: JobService = Depends(get_job_service)
+):
     """
-    Run Cartography to collect cloud infrastructure data and store it in Neo4j.
+    Queue a Cartography run to collect cloud infrastructure data and store it in Neo4j.
+    Poll /jobs/{job_id} for progress.
     """
-    try:
-        # Set OpenAI API key if provided
-        if request.openai_api_key:
-            os.environ["OPENAI_API_KEY"] = request.openai_api_key
-        
+    async def run(context: JobContext):
         # Create Cartography service
+        options = request.advanced_options
         cartography_service = CartographyService(
             neo4j_uri=settings.NEO4J_URI,
             neo4j_user=settings.NEO4J_USER,
-            neo4j_password=settings.NEO4J_PASSWORD
+            neo4j_password=settings.NEO4J_PASSWORD,
+            worker_pool=None if options and options.isolated else get_cartography_worker_pool()
+        )
+        
+        def on_event(event):
+            context.emit_event(event)
+            if event["type"] == "module_finished":
+                context.report_progress(
+                    max(0.05, run_log.progress),
+                    f"Finished {event['module']} in {event['elapsed_seconds']}s ({event['records']} records)"
+                )
+            elif event["type"] == "module_started":
+                context.report_progress(max(0.05, run_log.progress), f"Running {event['module']}")
+        
+        run_log = CartographyRunLog(
+            max_lines=settings.JOB_LOG_LINES,
+            max_events=settings.JOB_MAX_EVENTS,
+            # Real runs select exactly these stages; sample data runs report stages without a total
+            expected_stages=0 if request.use_sample_data else len(sync_stages(options.dict() if options else None)),
+            on_event=on_event,
+            on_line=context.log
         )
         
+        if options and options.parallel and not request.use_sample_data:
+            return await run_partitioned(context, cartography_service, options)
+        
         # Run Cartography
+        context.report_progress(0.05, "Running Cartography")
         result = await cartography_service.run_cartography(
             aws_access_key_id=request.aws_access_key_id,
             aws_secret_access_key=request.aws_secret_access_key,
             aws_region=request.aws_region,
             use_sample_data=request.use_sample_data,
-            advanced_options=request.advanced_options.dict() if request.advanced_options else None
+            advanced_options=options.dict() if options else None,
+            run_log=run_log
         )
         
         if result.get("status") == "error":
-            raise HTTPException(
-                status_code=500,
-                detail=f"Cartography failed: {result.get('message', 'Unknown error')}"
-            )
+            raise Exception(f"Cartography failed: {result.get('message', 'Unknown error')}")
         
         return {
             "status": "success",
             "message": "Knowledge graph created successfully with Cartography"
         }
+    
+    async def run_partitioned(context: JobContext, cartography_service: CartographyService,
+                              options: CartographyOptions):
+        done = []
         
+        def make_run_log(unit):
+            def on_event(event):
+                context.emit_event({**event, "unit": unit.name})
+            return CartographyRunLog(
+                max_lines=settings.JOB_LOG_LINES,
+                max_events=settings.JOB_MAX_EVENTS,
+                on_event=on_event,
+                on_line=lambda stream, line: context.log(stream, f"[{unit.name}] {line}")
+            )
+        
+        def on_unit(timing):
+            done.append(timing)
+            context.emit_event({"type": "unit_finished", **timing})
+            context.report_progress(
+                max(0.05, len(done) / total_units),
+                f"Unit {timing['unit']} {timing['status']} ({len(done)}/{total_units})"
+            )
+        
+        total_units = len(plan_units(options.dict()))
+        context.report_progress(0.05, f"Running Cartography as {total_units} units")
+        result = await cartography_service.run_cartography_partitioned(
+            aws_access_key_id=request.aws_access_key_id,
+            aws_secret_access_key=request.aws_secret_access_key,
+            aws_region=request.aws_region,
+            advanced_options=options.dict(),
+            max_parallel=options.max_parallel_units,
+            make_run_log=make_run_log,
+            on_unit=on_unit
+        )
+        # Unit timings stay available as unit_finished events when the run fails
+        if result.get("status") == "error":
+            raise Exception(f"Cartography failed: {result.get('message', 'Unknown error')}")
+        return result
+    
+    if request.advanced_options and request.advanced_options.parallel:
+        try:
+            plan_units(request.advanced_options.dict())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        job, deduplicated = job_service.submit("cartography_run", settings.NEO4J_URI, request.dict(), run)
+        return JobSubmission(job_id=job.info.id, status=job.info.status, deduplicated=deduplicated)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error running Cartography: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/synthetic", response_model=JobSubmission, status_code=202)
+async def load_synthetic_estate(
+    options: SyntheticEstateOptions,
+    mode: str = "auto",
+    replace: bool = True,
+    job_service: JobService = Depends(get_job_service),
+    bulk_loader: BulkLoader = Depends(get_bulk_loader)
+):
+    """
+    Queue loading a deterministic synthetic estate for scale testing. The estate
+    replaces the graph unless replace is false, in which case it is merged in.
+    """
+    if mode not in LOAD_MODES:
+        raise HTTPException(status_code=422, detail=f"Unknown load mode {mode}, expected one of {LOAD_MODES}")
+    
+    async def run(context: JobContext):
+        cartography_service = CartographyService(
+            neo4j_uri=settings.NEO4J_URI,
+            neo4j_user=settings.NEO4J_USER,
+            neo4j_password=settings.NEO4J_PASSWORD
+        )
+        context.report_progress(0.05, "Generating and loading synthetic estate")
+        result = await context.run_in_thread(
+            cartography_service.load_synthetic_data, options, bulk_loader, mode, replace
+        )
+        if result.get("status") == "error":
+            raise Exception(result.get("message", "Unknown error"))
+        return result
+    
+    try:
+        job, deduplicated = job_service.submit(
+            "synthetic_load", settings.NEO4J_URI, {"options": options.dict(), "mode": mode, "replace": replace}, run
+        )
+        return JobSubmission(job_id=job.info.id, status=job.info.status, deduplicated=deduplicated)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,152 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from app.config import settings
+from app.models.diff import GraphDiff, SnapshotInfo
+from app.models.projection import (
+    BlastRadiusRequest, BlastRadiusResponse, ProjectionInfo, TraversalRequest, TraversalResponse
+)
+from app.models.query import ExpandRequest, ExpandResponse
+from app.services.expansion_service import ExpansionService
+from app.services.diff_service import GraphDiffService
+from app.services.projection_service import ProjectionService
+from app.dependencies import get_expansion_service, get_graph_diff_service, get_projection_service
+import asyncio
+
+router = APIRouter()
+
+DIRECTIONS = ("out", "in", "both")
+
+def resolve(projection_service: ProjectionService, request: TraversalRequest):
+    """The loaded projection and the node indices of the request's start nodes."""
+    if not projection_service.enabled:
+        raise HTTPException(status_code=404, detail="Graph projection is disabled")
+    projection = projection_service.projection
+    if projection is None:
+        raise HTTPException(status_code=503, detail="Graph projection is not loaded yet")
+    if request.direction not in DIRECTIONS:
+        raise HTTPException(status_code=400, detail=f"direction must be one of {', '.join(DIRECTIONS)}")
+    if not request.node_keys and not request.node_ids:
+        raise HTTPException(status_code=400, detail="Give node_keys or node_ids to start from")
+    sources, missing = projection.find(request.node_keys, request.node_ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Nodes not in the graph projection: {', '.join(missing)}")
+    return projection, sources
+
+@router.get("/projection", response_model=ProjectionInfo)
+async def get_projection(projection_service: ProjectionService = Depends(get_projection_service)):
+    """
+    State of the in-memory graph projection used by the traversal endpoints.
+    """
+    return projection_service.status()
+
+@router.post("/projection/refresh")
+async def refresh_projection(projection_service: ProjectionService = Depends(get_projection_service)):
+    """
+    Rebuild the graph projection from Neo4j now instead of after the next ingest.
+    """
+    result = await projection_service.rebuild()
+    if result["status"] == "error":
+        raise HTTPException(status_code=503, detail=result["message"])
+    return result
+
+@router.post("/reachability", response_model=TraversalResponse)
+async def reachability(request: TraversalRequest,
+                       projection_service: ProjectionService = Depends(get_projection_service)):
+    """
+    Nodes reachable from the start nodes within max_depth hops, nearest first.
+    """
+    projection, sources = resolve(projection_service, request)
+    result = await asyncio.to_thread(
+        projection.reachable, sources, request.max_depth, request.direction,
+        request.relationship_types, request.through_labels, request.limit
+    )
+    return TraversalResponse(**result, generation=projection_service.generation)
+
+@router.post("/neighborhood", response_model=TraversalResponse)
+async def neighborhood(request: TraversalRequest,
+                       projection_service: ProjectionService = Depends(get_projection_service)):
+    """
+    The max_depth-hop neighborhood of the start nodes, including the start
+    nodes and the relationships among all returned nodes.
+    """
+    projection, sources = resolve(projection_service, request)
+    result = await asyncio.to_thread(
+        projection.neighborhood, sources, request.max_depth, request.direction,
+        request.relationship_types, request.through_labels, request.limit
+    )
+    return TraversalResponse(**result, generation=projection_service.generation)
+
+@router.post("/blast-radius", response_model=BlastRadiusResponse)
+async def blast_radius(request: BlastRadiusRequest,
+                       projection_service: ProjectionService = Depends(get_projection_service)):
+    """
+    What the start nodes can reach: endpoints with one of target_labels within
+    max_depth hops, counted per label, with a shortest path to each.
+    """
+    projection, sources = resolve(projection_service, request)
+    result = await asyncio.to_thread(
+        projection.blast_radius, sources, request.target_labels, request.max_depth, request.direction,
+        request.relationship_types, request.through_labels, request.limit
+    )
+    return BlastRadiusResponse(**result, generation=projection_service.generation)
+
+@router.post("/expand", response_model=ExpandResponse)
+async def expand(request: ExpandRequest, expansion_service: ExpansionService = Depends(get_expansion_service)):
+    """
+    Neighbors of the given nodes one hop away, with the relationships to them,
+    leaving out the nodes and relationships the client already holds.
+    """
+    if request.direction not in DIRECTIONS:
+        raise HTTPException(status_code=400, detail=f"direction must be one of {', '.join(DIRECTIONS)}")
+    try:
+        node_ids = [int(node_id) for node_id in request.node_ids]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="node_ids must be Neo4j node ids")
+    try:
+        result = await expansion_service.expand(
+            node_ids, request.direction, request.relationship_types, set(request.known_node_ids),
+            set(request.known_relationship_ids), request.limit
+        )
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Expanding nodes failed: {str(e)}")
+    if not result["expanded"]:
+        raise HTTPException(status_code=404, detail=f"Nodes not in the graph: {', '.join(result['missing'])}")
+    return ExpandResponse(**result)
+
+def diff_service() -> GraphDiffService:
+    if not settings.GRAPH_DIFF_ENABLED:
+        raise HTTPException(status_code=404, detail="Graph diffs are disabled")
+    return get_graph_diff_service()
+
+@router.get("/snapshots", response_model=List[SnapshotInfo])
+async def list_snapshots(graph_diff_service: GraphDiffService = Depends(diff_service)):
+    """
+    Generations of the graph that were snapshotted and can be diffed, newest first.
+    """
+    return await asyncio.to_thread(graph_diff_service.snapshots)
+
+@router.post("/snapshots", response_model=SnapshotInfo)
+async def create_snapshot(graph_diff_service: GraphDiffService = Depends(diff_service)):
+    """
+    Snapshot the current generation now instead of after the next ingest.
+    """
+    result = await graph_diff_service.snapshot()
+    if result["status"] == "error":
+        raise HTTPException(status_code=503, detail=result["message"])
+    return result["snapshot"]
+
+@router.get("/diff", response_model=GraphDiff)
+async def diff(from_generation: Optional[str] = Query(None, alias="from", description="Earlier generation"),
+               to_generation: Optional[str] = Query(None, alias="to", description="Later generation"),
+               labels: List[str] = Query([], description="Node labels and relationship types to report"),
+               limit: int = Query(1000, ge=1, le=100000),
+               graph_diff_service: GraphDiffService = Depends(diff_service)):
+    """
+    Nodes and relationships added, removed or modified between two snapshotted
+    generations, with the changed properties of modified ones. Without from
+    and to, what the latest ingest changed.
+    """
+    result = await asyncio.to_thread(graph_diff_service.diff, from_generation, to_generation, labels, limit)
+    if result.pop("status") == "error":
+        raise HTTPException(status_code=404, detail=result["message"])
+    return GraphDiff(**result)
\ No newline at end of file
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.services.readiness import ReadinessProbe
+from app.dependencies import get_readiness_probe, get_warmup_service
+
+router = APIRouter()
+
+@router.get("/health")
+def health():
+    """
+    Liveness: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+@router.get("/ready")
+def ready(probe: ReadinessProbe = Depends(get_readiness_probe)):
+    """
+    Readiness: the latest background dependency checks passed. Answers 503 until they do,
+    and while the startup warm-up runs within its budget.
+    """
+    status = probe.status()
+    if settings.WARMUP_ENABLED:
+        warmup = get_warmup_service()
+        status["warmup"] = warmup.status()
+        status["ready"] = status["ready"] and not warmup.blocks_readiness()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@router.get("/warmup")
+def warmup():
+    """
+    Progress of the latest cache and query plan warm-up.
+    """
+    if not settings.WARMUP_ENABLED:
+        return {"state": "disabled"}
+    return get_warmup_service().status()
\ No newline at end of file
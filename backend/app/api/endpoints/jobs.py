@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List
+from app.models.job import JobInfo, JobResult
+from app.services.job_service import JobService, ACTIVE_STATUSES
+from app.dependencies import get_job_service
+
+router = APIRouter()
+
+@router.get("/", response_model=List[JobInfo])
+async def list_jobs(job_service: JobService = Depends(get_job_service)):
+    """
+    List known jobs, newest first.
+    """
+    return job_service.list()
+
+@router.get("/{job_id}", response_model=JobInfo)
+async def get_job_status(job_id: str, job_service: JobService = Depends(get_job_service)):
+    """
+    Get the status and progress of a job.
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.info
+
+@router.get("/{job_id}/result", response_model=JobResult)
+async def get_job_result(job_id: str, job_service: JobService = Depends(get_job_service)):
+    """
+    Get the result of a finished job. Returns 409 while the job is still active.
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job.info.status in ACTIVE_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is still {job.info.status}")
+    return JobResult(id=job.info.id, status=job.info.status, result=job.result, error=job.info.error)
+
+@router.get("/{job_id}/events")
+async def get_job_events(job_id: str, since: int = 0, job_service: JobService = Depends(get_job_service)):
+    """
+    Get structured progress events with a sequence number greater than since.
+    Pass the last seq seen to poll for new events.
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return {"status": job.info.status, "events": job.context.events_since(since)}
+
+@router.get("/{job_id}/logs")
+async def get_job_logs(job_id: str, tail: int = 200, job_service: JobService = Depends(get_job_service)):
+    """
+    Get the most recent output lines of a job.
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    lines = list(job.context.logs)
+    return {"status": job.info.status, "lines": lines[-tail:] if tail > 0 else []}
+
+@router.post("/{job_id}/cancel", response_model=JobInfo)
+async def cancel_job(job_id: str, job_service: JobService = Depends(get_job_service)):
+    """
+    Cancel a pending or running job. Finished jobs are returned unchanged.
+    """
+    job = job_service.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.info
\ No newline at end of file
@@ -0,0 +1,35 @@
+from typing import Dict, Tuple
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app import dependencies
+from app.services.metrics import REGISTRY
+
+router = APIRouter()
+
+def _pool_usage() -> Dict[Tuple[str, str], float]:
+    # Only report pools that already exist; a scrape must not open connections
+    usage: Dict[Tuple[str, str], float] = {}
+    job_service = dependencies._job_service
+    if job_service is not None:
+        usage[("jobs", "in_use")] = job_service.running_count()
+        usage[("jobs", "size")] = job_service.max_concurrency
+    worker_pool = dependencies._cartography_worker_pool
+    if worker_pool is not None:
+        usage[("cartography_workers", "in_use")] = worker_pool.busy
+        usage[("cartography_workers", "size")] = worker_pool.size
+    neo4j_service = dependencies._neo4j_service
+    if neo4j_service is not None:
+        in_use, size = neo4j_service.pool_usage()
+        usage[("neo4j", "in_use")] = in_use
+        usage[("neo4j", "size")] = size
+    return usage
+
+REGISTRY.gauge("cartography_pool_connections", "Pool slots in use and pool sizes", ["pool", "state"],
+               collect=_pool_usage)
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """
+    Expose all metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from app.models.network import AllowedResponse, ExposedInstances, InstanceExposure, NetworkIndexInfo
+from app.services.network_service import NetworkIndexService
+from app.dependencies import get_network_index_service
+
+router = APIRouter()
+
+async def current_index(network_service: NetworkIndexService):
+    index = await network_service.get(allow_stale=True)
+    if index is None:
+        raise HTTPException(status_code=503, detail=f"Network index is not available: {network_service.status().error}")
+    return index
+
+@router.get("/index", response_model=NetworkIndexInfo)
+async def get_index(network_service: NetworkIndexService = Depends(get_network_index_service)):
+    """
+    State of the security group rule index.
+    """
+    return network_service.status()
+
+@router.post("/index/refresh")
+async def refresh_index(network_service: NetworkIndexService = Depends(get_network_index_service)):
+    """
+    Re-read the security group rules now instead of after the next ingest.
+    """
+    result = await network_service.refresh()
+    if result["status"] == "error":
+        raise HTTPException(status_code=503, detail=result["message"])
+    return result
+
+@router.get("/allowed", response_model=AllowedResponse)
+async def allowed(source: str = Query(..., description="Source address or CIDR, e.g. 10.0.5.3 or 203.0.113.0/24"),
+                  port: Optional[int] = Query(None, ge=0, le=65535),
+                  protocol: str = Query("tcp", description="tcp, udp, icmp, a protocol number or all"),
+                  limit: int = Query(1000, ge=1, le=100000),
+                  network_service: NetworkIndexService = Depends(get_network_index_service)):
+    """
+    Which rules, security groups and instances allow traffic from source to port.
+    """
+    index = await current_index(network_service)
+    try:
+        return index.allowed(source, port, protocol, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/exposure", response_model=ExposedInstances)
+async def exposed_instances(port: Optional[int] = Query(None, ge=0, le=65535),
+                            protocol: str = Query("all", description="tcp, udp, icmp, a protocol number or all"),
+                            limit: int = Query(1000, ge=1, le=100000),
+                            network_service: NetworkIndexService = Depends(get_network_index_service)):
+    """
+    Instances reachable from the internet, optionally on one port.
+    """
+    index = await current_index(network_service)
+    try:
+        return index.exposed_instances(port, protocol, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/exposure/{instance_id}", response_model=InstanceExposure)
+async def instance_exposure(instance_id: str,
+                            network_service: NetworkIndexService = Depends(get_network_index_service)):
+    """
+    Effective inbound exposure of an instance across all its security groups.
+    """
+    index = await current_index(network_service)
+    if instance_id not in index.groups_by_instance:
+        raise HTTPException(status_code=404, detail=f"Instance not found or in no security group: {instance_id}")
+    return index.exposure(instance_id)
\ No newline at end of file
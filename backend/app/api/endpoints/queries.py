@@ -1,35 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.models.query import QueryRequest, QueryResponse
+import asyncio
+import hashlib
+import json
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from app.models.query import QueryRequest, QueryResponse, SuggestResponse
+from app.middleware.compression import parse_if_none_match
 from app.services.neo4j_service import Neo4jService
-from app.services.nlp_service import NLPService
-from app.dependencies import get_neo4j_service, get_nlp_service
+from app.services.nlp_service import FALLBACK_EXPLANATION, NLPService
+from app.services.job_service import JobService
+from app.services.view_service import ViewService
+from app.services.search_service import SearchService
+from app.services.suggest_service import SuggestService
+from app.services.query_guard import QueryGuard
+from app.services.metrics import QUERY_STAGE_SECONDS, QUERY_REQUESTS, record_cache
+from app.dependencies import (
+    get_neo4j_service, get_nlp_service, get_job_service, get_view_service, get_search_service, get_suggest_service,
+    get_query_guard
+)
+from app.config import settings
 
 router = APIRouter()
 
+def query_etag(generation: str, query_request: QueryRequest, answer_path: str) -> str:
+    """
+    Strong ETag of a query result: same graph contents, same request and same answering path
+    (model, or keyword fallback without a key) give the same tag. The contents are known through
+    the graph generation, which is read from the graph; see JobService.graph_generation.
+    """
+    key = json.dumps([generation, query_request.natural_language_query, query_request.include_query_details,
+                      answer_path])
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
 @router.post("/", response_model=QueryResponse)
 async def process_query(
     query_request: QueryRequest,
+    request: Request,
     neo4j_service: Neo4jService = Depends(get_neo4j_service),
-    nlp_service: NLPService = Depends(get_nlp_service)
+    nlp_service: NLPService = Depends(get_nlp_service),
+    job_service: JobService = Depends(get_job_service),
+    view_service: ViewService = Depends(get_view_service),
+    search_service: SearchService = Depends(get_search_service),
+    suggest_service: SuggestService = Depends(get_suggest_service),
+    query_guard: QueryGuard = Depends(get_query_guard)
 ):
+    started = time.perf_counter()
+    
+    # Answer revalidations without translating or running the query again
+    generation = job_service.graph_generation(settings.NEO4J_URI)
+    etag = query_etag(generation, query_request, nlp_service.answer_path) if generation is not None else None
+    if_none_match = request.headers.get("if-none-match")
+    if etag is not None and if_none_match:
+        matches_any, tags = parse_if_none_match(if_none_match)
+        hit = matches_any or etag in tags
+        record_cache("etag", hit)
+        if hit:
+            QUERY_REQUESTS.inc(outcome="not_modified")
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    
+    headers = {}
+    if etag is not None:
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "private, no-cache"
+    
+    # Common questions are answered from their materialized view, without the LLM
+    view = view_service.match(query_request.natural_language_query)
+    if view is not None:
+        record_cache("materialized_view", view_service.is_fresh(view.name))
+        view_result = await view_service.get(view.name)
+        if view_result is not None:
+            QUERY_REQUESTS.inc(outcome="view")
+            suggest_service.record(query_request.natural_language_query)
+            QUERY_STAGE_SECONDS.observe(time.perf_counter() - started, stage="total")
+            body = view_service.query_response_body(view, view_result, query_request.include_query_details)
+            return Response(content=body, media_type="application/json", headers=headers)
+    
     try:
+        # Resolve resource names to exact ids so the query doesn't scan with CONTAINS
+        with QUERY_STAGE_SECONDS.time(stage="resolve"):
+            entities = await asyncio.to_thread(search_service.resolve_mentions, query_request.natural_language_query)
+        
         # Translate natural language to Cypher
-        cypher_details = await nlp_service.translate_to_cypher(
-            query_request.natural_language_query
-        )
+        with QUERY_STAGE_SECONDS.time(stage="translate"):
+            cypher_details = await nlp_service.translate_to_cypher(
+                query_request.natural_language_query,
+                entities
+            )
+        
+        # Bound the generated query and EXPLAIN it; over budget, ask the model for a cheaper one
+        with QUERY_STAGE_SECONDS.time(stage="guard"):
+            verdict = await asyncio.to_thread(query_guard.check, cypher_details)
+        for _ in range(settings.QUERY_GUARD_REPROMPTS):
+            if verdict["status"] != "rejected":
+                break
+            with QUERY_STAGE_SECONDS.time(stage="translate"):
+                cypher_details = await nlp_service.translate_to_cypher(
+                    query_request.natural_language_query,
+                    entities,
+                    feedback=query_guard.feedback(verdict, cypher_details)
+                )
+            with QUERY_STAGE_SECONDS.time(stage="guard"):
+                verdict = await asyncio.to_thread(query_guard.check, cypher_details)
+        if verdict["status"] == "rejected":
+            nlp_service.forget(query_request.natural_language_query, entities)
+            QUERY_REQUESTS.inc(outcome="rejected")
+            raise HTTPException(
+                status_code=422,
+                detail=f"The generated query was rejected: {'; '.join(verdict['violations'])}"
+            )
+        cypher_details = verdict["details"]
+        
+        if cypher_details.explanation.startswith(FALLBACK_EXPLANATION) and nlp_service.openai_api_key:
+            # The model failed and a keyword query stands in; don't let clients keep it as the model's answer
+            headers.pop("ETag", None)
+            headers["Cache-Control"] = "no-store"
         
         # Execute Cypher query
         graph_data = neo4j_service.execute_query(
             cypher_details.cypher_query,
-            cypher_details.parameters
+            cypher_details.parameters,
+            record_metrics=True
         )
         
-        # Prepare response
-        response = QueryResponse(
-            graph_data=graph_data,
-            query_details=cypher_details if query_request.include_query_details else None
-        )
+        # Prepare response, serialized here so its cost is measured
+        with QUERY_STAGE_SECONDS.time(stage="serialize"):
+            result = QueryResponse(
+                graph_data=graph_data,
+                query_details=cypher_details if query_request.include_query_details else None
+            )
+            body = result.model_dump_json()
         
-        return response
+        QUERY_REQUESTS.inc(outcome="ok")
+        suggest_service.record(query_request.natural_language_query)
+        QUERY_STAGE_SECONDS.observe(time.perf_counter() - started, stage="total")
+        return Response(content=body, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        QUERY_REQUESTS.inc(outcome="error")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest(q: str = Query("", description="Text typed so far"), limit: int = Query(8, ge=1, le=50),
+            suggest_service: SuggestService = Depends(get_suggest_service)):
+    """
+    Typeahead completions for the query box: past questions by popularity,
+    questions answered by views and templates, and resource names.
+    """
+    return suggest_service.suggest(q, limit)
\ No newline at end of file
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+from app.models.search import SearchIndexInfo, SearchResponse
+from app.services.search_service import SearchService
+from app.dependencies import get_search_service
+import asyncio
+import time
+
+router = APIRouter()
+
+@router.get("/", response_model=SearchResponse)
+async def search(q: str = Query(..., min_length=1, description="Any part of a name, ARN, id or tag"),
+                 limit: int = Query(20, ge=1, le=500),
+                 labels: List[str] = Query([], description="Only return nodes with one of these labels"),
+                 search_service: SearchService = Depends(get_search_service)):
+    """
+    Find resources by name, ARN, id or tag, tolerating typos. Best matches first.
+    """
+    index = await search_service.get(allow_stale=True)
+    if index is None:
+        raise HTTPException(status_code=503, detail=f"Search index is not available: {search_service.status().error}")
+    started = time.perf_counter()
+    hits = await asyncio.to_thread(index.search, q, limit, labels)
+    return SearchResponse(query=q, hits=hits, seconds=round(time.perf_counter() - started, 6),
+                          generation=search_service.status().generation)
+
+@router.get("/index", response_model=SearchIndexInfo)
+async def get_index(search_service: SearchService = Depends(get_search_service)):
+    """
+    State of the search index.
+    """
+    return search_service.status()
+
+@router.post("/index/refresh")
+async def refresh_index(search_service: SearchService = Depends(get_search_service)):
+    """
+    Update the search index now instead of after the next ingest.
+    """
+    result = await search_service.refresh()
+    if result["status"] == "error":
+        raise HTTPException(status_code=503, detail=result["message"])
+    return result
\ No newline at end of file
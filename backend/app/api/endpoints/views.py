@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from typing import List
+from app.models.view import ViewInfo
+from app.middleware.compression import parse_if_none_match
+from app.services.view_service import ViewService
+from app.services.metrics import record_cache
+from app.dependencies import get_view_service
+
+router = APIRouter()
+
+@router.get("/", response_model=List[ViewInfo])
+async def list_views(view_service: ViewService = Depends(get_view_service)):
+    """
+    List the materialized views and the state of their stored results.
+    """
+    return view_service.list()
+
+@router.get("/{name}")
+async def get_view(name: str, request: Request, view_service: ViewService = Depends(get_view_service)):
+    """
+    Serve the stored result of a materialized view, recomputing it first if
+    the graph changed since. While an ingest is running the last result is
+    served with "stale": true.
+    """
+    view = view_service.views.get(name)
+    if view is None:
+        raise HTTPException(status_code=404, detail=f"Unknown view: {name}")
+    
+    fresh = view_service.is_fresh(name)
+    record_cache("materialized_view", fresh)
+    result = await view_service.get(name, allow_stale=True)
+    if result is None:
+        raise HTTPException(status_code=503, detail=f"View {name} is not available: {view_service.info(name).error}")
+    
+    etag = f'"{result["version"]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        matches_any, tags = parse_if_none_match(if_none_match)
+        if matches_any or etag in tags:
+            return Response(status_code=304, headers=headers)
+    stale = not view_service.is_fresh(name)
+    return Response(content=view_service.view_body(view, result, stale), media_type="application/json",
+                    headers=headers)
\ No newline at end of file
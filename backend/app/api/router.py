@@ -1,7 +1,14 @@
 from fastapi import APIRouter
-from app.api.endpoints import queries, cartography, neo4j_test
+from app.api.endpoints import queries, cartography, neo4j_test, aws, jobs, admin, views, graph, network, search
 
 api_router = APIRouter()
 api_router.include_router(queries.router, prefix="/queries", tags=["queries"])
 api_router.include_router(cartography.router, prefix="/cartography", tags=["cartography"])
-api_router.include_router(neo4j_test.router, prefix="/neo4j", tags=["neo4j"])
\ No newline at end of file
+api_router.include_router(neo4j_test.router, prefix="/neo4j", tags=["neo4j"])
+api_router.include_router(aws.router, prefix="/aws", tags=["aws"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(views.router, prefix="/views", tags=["views"])
+api_router.include_router(graph.router, prefix="/graph", tags=["graph"])
+api_router.include_router(network.router, prefix="/network", tags=["network"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
\ No newline at end of file
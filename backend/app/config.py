@@ -16,9 +16,99 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: str = os.environ.get("AWS_SECRET_ACCESS_KEY", "")
     AWS_REGION: str = os.environ.get("AWS_REGION", "us-east-1")
     
+    # Multi-account collection settings
+    COLLECTION_MAX_WORKERS: int = 16
+    CHECKPOINT_DB_PATH: str = "collection_checkpoints.db"
+    
+    # Bulk load settings. NEO4J_IMPORT_DIR must be the import directory of a
+    # local Neo4j server for LOAD CSV and offline imports
+    NEO4J_IMPORT_DIR: str = os.environ.get("NEO4J_IMPORT_DIR", "")
+    NEO4J_ADMIN_PATH: str = "neo4j-admin"
+    NEO4J_DATABASE: str = "neo4j"
+    BULK_LOAD_BATCH_SIZE: int = 5000
+    BULK_LOAD_PERIODIC_COMMIT: int = 10000
+    BULK_LOAD_MIN_ROWS: int = 50000
+    
+    # Inventory snapshot settings
+    SNAPSHOT_DIR: str = "snapshots"
+    
+    # Background readiness probe of Neo4j, reported by /ready
+    READINESS_PROBE_INTERVAL: float = 15.0
+    READINESS_PROBE_TIMEOUT: float = 5.0
+    
+    # Seconds between reads of the graph generation from Neo4j, which keys
+    # ETags and caches; 0 counts this process's jobs instead
+    GRAPH_GENERATION_INTERVAL: float = 2.0
+    
+    # In-memory graph projection for traversal queries, saved for restarts
+    GRAPH_PROJECTION_ENABLED: bool = True
+    GRAPH_PROJECTION_PATH: str = "graph_projection"
+    
+    # Adjacency lists cached for /graph/expand, and relationships read per expanded node
+    EXPAND_CACHE_SIZE: int = 10000
+    EXPAND_MAX_DEGREE: int = 1000
+    
+    # Content hashes and changes of every ingest, for /graph/diff
+    GRAPH_DIFF_ENABLED: bool = True
+    GRAPH_DIFF_DB_PATH: str = "graph_diff.db"
+    GRAPH_DIFF_MAX_SNAPSHOTS: int = 100
+    GRAPH_DIFF_DEBOUNCE_SECONDS: float = 5.0
+    
+    # Words of a question matching a resource this well are resolved for the translator
+    SEARCH_MENTION_MIN_SCORE: float = 0.8
+    
+    # Query box suggestions: past questions and resource names, kept across restarts
+    SUGGEST_DB_PATH: str = "suggestions.db"
+    SUGGEST_MAX_RESOURCES: int = 50000
+    SUGGEST_MAX_QUESTIONS: int = 10000
+    
+    # Checks of generated Cypher before it runs: enforced LIMIT and hops, EXPLAIN estimates budget
+    QUERY_GUARD_ENABLED: bool = True
+    QUERY_GUARD_MAX_ROWS: int = 1000
+    QUERY_GUARD_MAX_HOPS: int = 5
+    QUERY_GUARD_MAX_ESTIMATED_ROWS: float = 1_000_000
+    QUERY_GUARD_MAX_CARTESIAN_ROWS: float = 100_000
+    QUERY_GUARD_CACHE_SIZE: int = 1024
+    # Times the model is asked again for a cheaper query before one is rejected
+    QUERY_GUARD_REPROMPTS: int = 1
+    
+    # Warm-up of plans, pages, views, indexes and translations at startup and after ingests
+    WARMUP_ENABLED: bool = True
+    WARMUP_TOP_QUESTIONS: int = 20
+    WARMUP_TOUCH_LIMIT: int = 10000
+    WARMUP_STEP_TIMEOUT: float = 10.0
+    # Longest time the startup warm-up keeps /ready at 503
+    WARMUP_READINESS_BUDGET: float = 30.0
+    
+    # Warm Cartography workers; 0 runs every sync as a fresh cartography process
+    CARTOGRAPHY_WARM_WORKERS: int = 0
+    CARTOGRAPHY_WORKER_MAX_JOBS: int = 50
+    
+    # Background job settings
+    JOB_MAX_CONCURRENCY: int = 2
+    JOB_HISTORY_LIMIT: int = 100
+    JOB_MAX_EVENTS: int = 500
+    JOB_LOG_LINES: int = 2000
+    
+    # Response compression; codings whose library isn't installed are skipped
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_ENCODINGS: list = ["zstd", "br", "gzip"]
+    
+    # Admin endpoints and per-request profiling; disabled without a token
+    ADMIN_TOKEN: str = os.environ.get("ADMIN_TOKEN", "")
+    PROFILE_HISTORY_LIMIT: int = 50
+    PROFILE_REQUEST_INTERVAL: float = 0.002
+    # Low-rate continuous sampling of the event loop thread
+    PROFILE_SAMPLING_ENABLED: bool = False
+    PROFILE_SAMPLING_INTERVAL: float = 0.05
+    
     # OpenAI settings
     OPENAI_API_KEY: str = os.environ.get("OPENAI_API_KEY", "")
     OPENAI_MODEL: str = os.environ.get("OPENAI_MODEL", "gpt-3.5-turbo")
+    OPENAI_BASE_URL: str = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    # Clients kept for per-request keys (X-OpenAI-API-Key header)
+    NLP_CLIENT_POOL_SIZE: int = 32
+    NLP_TRANSLATION_CACHE_SIZE: int = 512
     
     # CORS settings
     CORS_ORIGINS: list = ["http://localhost:3000", "http://frontend:3000"]
@@ -1,13 +1,47 @@
 from app.services.neo4j_service import Neo4jService
-from app.services.nlp_service import NLPService
+from app.services.nlp_service import NLPService, NLPClientPool
 from app.services.cartography_service import CartographyService
+from app.services.cartography_worker import CartographyWorkerPool
+from app.services.job_service import JobService
+from app.services.graph_generation import GraphGenerationWatcher
+from app.services.checkpoint_store import CheckpointStore
+from app.services.bulk_loader import BulkLoader
+from app.services.profiler import ProfileStore, SamplingProfiler
+from app.services.readiness import ReadinessProbe
+from app.services.view_service import ViewService
+from app.services.projection_service import ProjectionService
+from app.services.expansion_service import ExpansionService
+from app.services.diff_service import GraphDiffService
+from app.services.query_guard import QueryGuard
+from app.services.network_service import NetworkIndexService
+from app.services.search_service import SearchService
+from app.services.suggest_service import SuggestService
+from app.services.warmup_service import WarmupService
 from app.config import settings
-import os
+from fastapi import Header, HTTPException
+from typing import Optional
+import hmac
 
 # Singleton instances
 _neo4j_service = None
-_nlp_service = None
+_nlp_client_pool = None
 _cartography_service = None
+_job_service = None
+_generation_watcher = None
+_checkpoint_store = None
+_cartography_worker_pool = None
+_profile_store = None
+_continuous_profiler = None
+_readiness_probe = None
+_view_service = None
+_projection_service = None
+_expansion_service = None
+_graph_diff_service = None
+_query_guard = None
+_network_index_service = None
+_search_service = None
+_suggest_service = None
+_warmup_service = None
 
 def get_neo4j_service() -> Neo4jService:
     global _neo4j_service
@@ -19,17 +53,20 @@ def get_neo4j_service() -> Neo4jService:
         )
     return _neo4j_service
 
-def get_nlp_service() -> NLPService:
-    global _nlp_service
-    # Get the latest OpenAI API key from environment variable if it exists
-    openai_api_key = os.environ.get("OPENAI_API_KEY", settings.OPENAI_API_KEY)
-    
-    if _nlp_service is None or _nlp_service.openai_api_key != openai_api_key:
-        _nlp_service = NLPService(
-            openai_api_key=openai_api_key,
-            openai_model=settings.OPENAI_MODEL
+def get_nlp_client_pool() -> NLPClientPool:
+    global _nlp_client_pool
+    if _nlp_client_pool is None:
+        _nlp_client_pool = NLPClientPool(
+            openai_model=settings.OPENAI_MODEL,
+            openai_base_url=settings.OPENAI_BASE_URL,
+            max_clients=settings.NLP_CLIENT_POOL_SIZE,
+            cache_size=settings.NLP_TRANSLATION_CACHE_SIZE
         )
-    return _nlp_service
+    return _nlp_client_pool
+
+def get_nlp_service(x_openai_api_key: str = Header("")) -> NLPService:
+    # The caller's own key, else the server's; never shared through os.environ
+    return get_nlp_client_pool().get(x_openai_api_key or settings.OPENAI_API_KEY)
 
 def get_cartography_service() -> CartographyService:
     global _cartography_service
@@ -37,6 +74,212 @@ def get_cartography_service() -> CartographyService:
         _cartography_service = CartographyService(
             neo4j_uri=settings.NEO4J_URI,
             neo4j_user=settings.NEO4J_USER,
-            neo4j_password=settings.NEO4J_PASSWORD
+            neo4j_password=settings.NEO4J_PASSWORD,
+            worker_pool=get_cartography_worker_pool()
+        )
+    return _cartography_service
+
+def get_cartography_worker_pool() -> Optional[CartographyWorkerPool]:
+    global _cartography_worker_pool
+    if _cartography_worker_pool is None and settings.CARTOGRAPHY_WARM_WORKERS > 0:
+        _cartography_worker_pool = CartographyWorkerPool(
+            size=settings.CARTOGRAPHY_WARM_WORKERS,
+            max_jobs_per_worker=settings.CARTOGRAPHY_WORKER_MAX_JOBS
+        )
+    return _cartography_worker_pool
+
+def get_job_service() -> JobService:
+    global _job_service
+    if _job_service is None:
+        _job_service = JobService(
+            max_concurrency=settings.JOB_MAX_CONCURRENCY,
+            history_limit=settings.JOB_HISTORY_LIMIT,
+            max_events=settings.JOB_MAX_EVENTS,
+            max_log_lines=settings.JOB_LOG_LINES
+        )
+    return _job_service
+
+def get_generation_watcher() -> GraphGenerationWatcher:
+    global _generation_watcher
+    if _generation_watcher is None:
+        _generation_watcher = GraphGenerationWatcher(
+            neo4j_service=get_neo4j_service,
+            target_graph=settings.NEO4J_URI,
+            interval=settings.GRAPH_GENERATION_INTERVAL,
+            timeout=settings.READINESS_PROBE_TIMEOUT
+        )
+        get_job_service().watch_generation(_generation_watcher)
+    return _generation_watcher
+
+def get_checkpoint_store() -> CheckpointStore:
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        _checkpoint_store = CheckpointStore(settings.CHECKPOINT_DB_PATH)
+    return _checkpoint_store
+
+def get_bulk_loader() -> BulkLoader:
+    return BulkLoader(
+        neo4j_service=get_neo4j_service(),
+        import_dir=settings.NEO4J_IMPORT_DIR,
+        admin_path=settings.NEO4J_ADMIN_PATH,
+        database=settings.NEO4J_DATABASE,
+        batch_size=settings.BULK_LOAD_BATCH_SIZE,
+        periodic_commit=settings.BULK_LOAD_PERIODIC_COMMIT,
+        min_bulk_rows=settings.BULK_LOAD_MIN_ROWS
+    )
+
+def get_profile_store() -> ProfileStore:
+    global _profile_store
+    if _profile_store is None:
+        _profile_store = ProfileStore(limit=settings.PROFILE_HISTORY_LIMIT)
+    return _profile_store
+
+def get_continuous_profiler() -> Optional[SamplingProfiler]:
+    return _continuous_profiler
+
+def start_continuous_profiler(interval: float) -> SamplingProfiler:
+    """Sample the calling thread (the event loop) until stop_continuous_profiler."""
+    global _continuous_profiler
+    stop_continuous_profiler()
+    _continuous_profiler = SamplingProfiler(interval=interval)
+    _continuous_profiler.start()
+    return _continuous_profiler
+
+def stop_continuous_profiler():
+    if _continuous_profiler is not None:
+        _continuous_profiler.stop()
+
+def get_view_service() -> ViewService:
+    global _view_service
+    if _view_service is None:
+        _view_service = ViewService(
+            neo4j_service=get_neo4j_service,
+            job_service=get_job_service(),
+            target_graph=settings.NEO4J_URI
+        )
+    return _view_service
+
+def get_projection_service() -> ProjectionService:
+    global _projection_service
+    if _projection_service is None:
+        _projection_service = ProjectionService(
+            neo4j_service=get_neo4j_service,
+            job_service=get_job_service(),
+            target_graph=settings.NEO4J_URI,
+            path=settings.GRAPH_PROJECTION_PATH,
+            enabled=settings.GRAPH_PROJECTION_ENABLED
         )
-    return _cartography_service
\ No newline at end of file
+    return _projection_service
+
+def get_expansion_service() -> ExpansionService:
+    global _expansion_service
+    if _expansion_service is None:
+        _expansion_service = ExpansionService(
+            neo4j_service=get_neo4j_service,
+            job_service=get_job_service(),
+            target_graph=settings.NEO4J_URI,
+            cache_size=settings.EXPAND_CACHE_SIZE,
+            max_degree=settings.EXPAND_MAX_DEGREE
+        )
+    return _expansion_service
+
+def get_graph_diff_service() -> GraphDiffService:
+    global _graph_diff_service
+    if _graph_diff_service is None:
+        _graph_diff_service = GraphDiffService(
+            path=settings.GRAPH_DIFF_DB_PATH,
+            neo4j_service=get_neo4j_service,
+            job_service=get_job_service(),
+            target_graph=settings.NEO4J_URI,
+            max_snapshots=settings.GRAPH_DIFF_MAX_SNAPSHOTS,
+            debounce=settings.GRAPH_DIFF_DEBOUNCE_SECONDS
+        )
+    return _graph_diff_service
+
+def get_network_index_service() -> NetworkIndexService:
+    global _network_index_service
+    if _network_index_service is None:
+        _network_index_service = NetworkIndexService(
+            neo4j_service=get_neo4j_service,
+            job_service=get_job_service(),
+            target_graph=settings.NEO4J_URI
+        )
+    return _network_index_service
+
+def get_search_service() -> SearchService:
+    global _search_service
+    if _search_service is None:
+        _search_service = SearchService(
+            neo4j_service=get_neo4j_service,
+            job_service=get_job_service(),
+            target_graph=settings.NEO4J_URI,
+            mention_min_score=settings.SEARCH_MENTION_MIN_SCORE
+        )
+    return _search_service
+
+def get_suggest_service() -> SuggestService:
+    global _suggest_service
+    if _suggest_service is None:
+        _suggest_service = SuggestService(
+            path=settings.SUGGEST_DB_PATH,
+            neo4j_service=get_neo4j_service,
+            job_service=get_job_service(),
+            target_graph=settings.NEO4J_URI,
+            views=get_view_service().views.values(),
+            max_resources=settings.SUGGEST_MAX_RESOURCES,
+            max_questions=settings.SUGGEST_MAX_QUESTIONS
+        )
+    return _suggest_service
+
+def get_query_guard() -> QueryGuard:
+    global _query_guard
+    if _query_guard is None:
+        _query_guard = QueryGuard(
+            neo4j_service=get_neo4j_service,
+            job_service=get_job_service(),
+            target_graph=settings.NEO4J_URI,
+            max_rows=settings.QUERY_GUARD_MAX_ROWS,
+            max_hops=settings.QUERY_GUARD_MAX_HOPS,
+            max_estimated_rows=settings.QUERY_GUARD_MAX_ESTIMATED_ROWS,
+            max_cartesian_rows=settings.QUERY_GUARD_MAX_CARTESIAN_ROWS,
+            cache_size=settings.QUERY_GUARD_CACHE_SIZE,
+            enabled=settings.QUERY_GUARD_ENABLED
+        )
+    return _query_guard
+
+def get_warmup_service() -> WarmupService:
+    global _warmup_service
+    if _warmup_service is None:
+        _warmup_service = WarmupService(
+            neo4j_service=get_neo4j_service,
+            # Warmed with the server's own key; the translation cache is shared by every key
+            nlp_service=lambda: get_nlp_client_pool().get(settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None,
+            view_service=get_view_service(),
+            search_service=get_search_service(),
+            network_service=get_network_index_service(),
+            suggest_service=get_suggest_service(),
+            query_guard=get_query_guard(),
+            job_service=get_job_service(),
+            target_graph=settings.NEO4J_URI,
+            top_questions=settings.WARMUP_TOP_QUESTIONS,
+            touch_limit=settings.WARMUP_TOUCH_LIMIT,
+            step_timeout=settings.WARMUP_STEP_TIMEOUT,
+            readiness_budget=settings.WARMUP_READINESS_BUDGET
+        )
+    return _warmup_service
+
+def get_readiness_probe() -> ReadinessProbe:
+    global _readiness_probe
+    if _readiness_probe is None:
+        _readiness_probe = ReadinessProbe(
+            checks={"neo4j": lambda: get_neo4j_service().verify_connectivity()},
+            interval=settings.READINESS_PROBE_INTERVAL,
+            timeout=settings.READINESS_PROBE_TIMEOUT
+        )
+    return _readiness_probe
+
+def require_admin(x_admin_token: str = Header("")):
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
\ No newline at end of file
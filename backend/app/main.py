@@ -1,7 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import api_router
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.api.endpoints import health, metrics
 from app.config import settings
+from app.dependencies import (
+    get_cartography_worker_pool, get_generation_watcher, get_graph_diff_service, get_network_index_service,
+    get_profile_store, get_projection_service, get_readiness_probe, get_search_service, get_suggest_service,
+    get_view_service, get_warmup_service, start_continuous_profiler, stop_continuous_profiler
+)
+import asyncio
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -17,9 +27,109 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses, e.g. graph results
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    encodings=settings.COMPRESSION_ENCODINGS
+)
+
+# Profile single requests on demand (X-Profile with the admin token)
+app.add_middleware(
+    ProfilingMiddleware,
+    store=get_profile_store,
+    admin_token=settings.ADMIN_TOKEN,
+    interval=settings.PROFILE_REQUEST_INTERVAL
+)
+
+# Record request latency outside compression so it includes it
+app.add_middleware(MetricsMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Prometheus scrapes /metrics at the root
+app.include_router(metrics.router, tags=["metrics"])
+app.include_router(health.router, tags=["health"])
+
+@app.on_event("startup")
+async def start_readiness_probe():
+    # Connectivity is checked in the background instead of on the first request
+    get_readiness_probe().start()
+
+@app.on_event("startup")
+async def start_generation_watcher():
+    # Changes made outside this process's jobs refresh the views and indexes too
+    if settings.GRAPH_GENERATION_INTERVAL > 0:
+        get_generation_watcher().start()
+
+@app.on_event("startup")
+async def register_ingest_listeners():
+    # Subscribes the views and indexes to job completions so every ingest refreshes them
+    get_view_service()
+    get_network_index_service()
+    get_search_service()
+
+@app.on_event("startup")
+async def load_query_suggestions():
+    # Past questions and resource names come from the suggestion database
+    suggest_service = get_suggest_service()
+    if not suggest_service.stats()["resources"]:
+        asyncio.create_task(suggest_service.refresh_resources())
+
+@app.on_event("startup")
+async def load_graph_projection():
+    # Maps the projection saved by the previous process; built after the next ingest otherwise
+    asyncio.create_task(get_projection_service().load_from_disk())
+
+@app.on_event("startup")
+async def snapshot_graph():
+    # Records changes made while the API was down; later snapshots follow every ingest
+    if settings.GRAPH_DIFF_ENABLED:
+        asyncio.create_task(get_graph_diff_service().snapshot())
+
+@app.on_event("startup")
+async def start_warmup():
+    # Plans, pages, views and indexes are warmed in the background; /ready waits for it up to a budget
+    if settings.WARMUP_ENABLED:
+        get_warmup_service().start("startup")
+
+@app.on_event("startup")
+async def start_cartography_workers():
+    # Import Cartography in the background so startup isn't blocked
+    pool = get_cartography_worker_pool()
+    if pool is not None:
+        asyncio.create_task(pool.start())
+
+@app.on_event("startup")
+async def start_sampling_profiler():
+    if settings.PROFILE_SAMPLING_ENABLED:
+        start_continuous_profiler(settings.PROFILE_SAMPLING_INTERVAL)
+
+@app.on_event("shutdown")
+async def stop_readiness_probe():
+    await get_readiness_probe().stop()
+
+@app.on_event("shutdown")
+async def stop_generation_watcher():
+    if settings.GRAPH_GENERATION_INTERVAL > 0:
+        await get_generation_watcher().stop()
+
+@app.on_event("shutdown")
+async def stop_warmup():
+    if settings.WARMUP_ENABLED:
+        await get_warmup_service().stop()
+
+@app.on_event("shutdown")
+async def stop_sampling_profiler():
+    stop_continuous_profiler()
+
+@app.on_event("shutdown")
+async def stop_cartography_workers():
+    pool = get_cartography_worker_pool()
+    if pool is not None:
+        await pool.close()
+
 @app.get("/")
 def root():
     return {"message": "Welcome to Cloud Cartography NL Query System"}
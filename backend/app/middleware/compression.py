@@ -0,0 +1,216 @@
+import zlib
+from typing import Dict, List, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Preferred first when the client accepts several with the same quality
+ENCODING_PREFERENCE = ["zstd", "br", "gzip"]
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+def available_encodings() -> List[str]:
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+def negotiate_encoding(accept_encoding: str, encodings: List[str]) -> Optional[str]:
+    """
+    Pick the content coding for an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Header value, e.g. "gzip, br;q=0.9"
+        encodings: Codings the server can produce
+
+    Returns:
+        The best acceptable coding, or None to send the identity representation
+    """
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name] = quality
+
+    candidates = [
+        (qualities.get(encoding, qualities.get("*", 0.0)), -ENCODING_PREFERENCE.index(encoding), encoding)
+        for encoding in encodings
+    ]
+    quality, _, encoding = max(candidates, default=(0.0, 0, None))
+    return encoding if quality > 0 else None
+
+class _Compressor:
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level or 3).compressobj()
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=level or 4)
+        else:
+            # wbits 31 writes a gzip header and trailer
+            self._obj = zlib.compressobj(level or 6, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, encodings: Optional[List[str]] = None):
+        """
+        Compress responses with the best coding the client accepts.
+
+        Responses smaller than minimum_size, of non-text types or already
+        encoded are sent unchanged. Strong ETags get the coding appended,
+        since each coding is a different representation.
+
+        Args:
+            app: Wrapped application
+            minimum_size: Smallest body worth compressing, in bytes
+            encodings: Codings to offer; defaults to all installed ones
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        installed = available_encodings()
+        self.encodings = [e for e in encodings if e in installed] if encodings else installed
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk shows whether to compress
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if message["status"] == 304:
+                # Validates the representation the client got with this coding
+                self._tag_representation(MutableHeaders(raw=message["headers"]))
+            self.passthrough = (
+                "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+                or message["status"] in (204, 304)
+            )
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            if not more_body and len(body) < self.minimum_size:
+                headers = MutableHeaders(raw=self.start_message["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                self.passthrough = True
+                await self.send(self.start_message)
+                self.start_message = None
+                await self.send(message)
+                return
+
+            self.compressor = _Compressor(self.encoding)
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            self._tag_representation(headers)
+            if more_body:
+                del headers["Content-Length"]
+                compressed = self.compressor.compress(body)
+            else:
+                compressed = self.compressor.compress(body) + self.compressor.flush()
+                headers["Content-Length"] = str(len(compressed))
+            await self.send(self.start_message)
+            self.start_message = None
+            await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+
+        compressed = self.compressor.compress(body)
+        if not more_body:
+            compressed += self.compressor.flush()
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _tag_representation(self, headers: MutableHeaders):
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/") and etag.endswith('"'):
+            headers["ETag"] = f'{etag[:-1]}-{self.encoding}"'
+
+def strip_encoding_suffix(etag: str) -> str:
+    """Undo the coding suffix CompressionMiddleware appends to a strong ETag."""
+    for encoding in ENCODING_PREFERENCE:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+def parse_if_none_match(value: str) -> Tuple[bool, List[str]]:
+    """
+    Parse an If-None-Match header.
+
+    Returns:
+        (matches_any, entity tags) with weak prefixes and coding suffixes removed
+    """
+    tags = []
+    for tag in value.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True, []
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.append(strip_encoding_suffix(tag))
+    return False, tags
\ No newline at end of file
@@ -0,0 +1,34 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.services.metrics import HTTP_REQUEST_SECONDS
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        """Record the latency of every HTTP request by method, route template and status."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The matched route template keeps label cardinality bounded
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status)
+            )
\ No newline at end of file
@@ -0,0 +1,74 @@
+import asyncio
+import hmac
+import time
+from typing import Callable
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.services.profiler import AllocationTracker, ProfileStore, SamplingProfiler
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, store: Callable[[], ProfileStore], admin_token: str,
+                 interval: float = 0.002):
+        """
+        Profile single requests on demand.
+
+        A request carrying the admin token in X-Admin-Token and an X-Profile
+        header ("cpu", "memory" or "cpu,memory") runs under a sampling CPU
+        profiler and/or tracemalloc snapshot diffing. The profile is stored
+        and its id returned in the X-Profile-Id response header; fetch it from
+        /api/v1/admin/profiles/{id}.
+
+        Without a configured admin token the header is ignored.
+
+        Args:
+            app: Wrapped application
+            store: Returns the store profiles are kept in
+            admin_token: Token profiled requests must present
+            interval: Seconds between CPU samples
+        """
+        self.app = app
+        self.store = store
+        self.admin_token = admin_token
+        self.interval = interval
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.admin_token:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        requested = headers.get("x-profile")
+        if not requested or not hmac.compare_digest(headers.get("x-admin-token", ""), self.admin_token):
+            await self.app(scope, receive, send)
+            return
+
+        kinds = {kind.strip().lower() for kind in requested.split(",")}
+        if kinds & {"1", "true", "all"}:
+            kinds = {"cpu", "memory"}
+        store = self.store()
+        profile_id = store.new_id()
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message["headers"])["X-Profile-Id"] = profile_id
+            await send(message)
+
+        # Async endpoints run on the event loop thread, which is what gets sampled
+        cpu = SamplingProfiler(interval=self.interval) if "cpu" in kinds else None
+        memory = AllocationTracker() if "memory" in kinds else None
+        memory_started = memory.start() if memory is not None else False
+        if cpu is not None:
+            cpu.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            seconds = time.perf_counter() - started
+            profile = {"method": scope["method"], "path": scope["path"], "seconds": round(seconds, 4)}
+            if cpu is not None:
+                cpu.stop()
+                profile["cpu"] = cpu.summary()
+                profile["folded"] = cpu.folded()
+            if memory is not None:
+                # Snapshot diffing walks every live allocation; keep it off the event loop
+                profile["memory"] = await asyncio.to_thread(memory.stop) if memory_started else memory.stop()
+            store.add(profile, profile_id)
\ No newline at end of file
@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import List, Dict, Any, Optional
+
+class CollectionTarget(BaseModel):
+    account_id: str
+    region: str = "us-east-1"
+    role_arn: str = ""
+    external_id: str = ""
+
+class BatchCollectionRequest(BaseModel):
+    targets: List[CollectionTarget]
+    # Resume a previous run by passing its run id (the job id of the original submission)
+    run_id: str = ""
+    aws_access_key_id: str = ""
+    aws_secret_access_key: str = ""
+    max_workers: Optional[int] = None
+    # "transactional", or a bulk mode: "auto", "load_csv", "admin_import"
+    load_mode: str = "transactional"
+    # Also write the collected inventory as a snapshot under SNAPSHOT_DIR/<snapshot_name>
+    snapshot_name: str = ""
+
+class TargetTiming(BaseModel):
+    account_id: str
+    region: str
+    status: str = "pending"
+    resources: Dict[str, float] = {}
+    throttle_wait_seconds: float = 0.0
+    store_seconds: float = 0.0
+    resumed: bool = False
+    total_seconds: float = 0.0
+    error: str = ""
+
+class BatchCollectionResult(BaseModel):
+    status: str
+    run_id: str = ""
+    total_seconds: float
+    targets: List[TargetTiming]
+    details: Dict[str, Any] = {}
\ No newline at end of file
@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+class SnapshotInfo(BaseModel):
+    generation: str
+    taken_at: float
+    nodes: int
+    relationships: int
+    # Resources added, removed or modified since the previous snapshot
+    changes: int
+    # Oldest kept snapshot; diffs can't start before it
+    baseline: bool = False
+
+class PropertyChange(BaseModel):
+    old: Any = None
+    new: Any = None
+
+class ResourceChange(BaseModel):
+    # Label and key property of a node, or start-[TYPE]->end of a relationship
+    key: str
+    label: str  # node label or relationship type
+    change: str  # added, removed or modified
+    start: Optional[str] = None
+    end: Optional[str] = None
+    # Properties of added and removed resources
+    properties: Optional[Dict[str, Any]] = None
+    # Changed properties of modified resources
+    delta: Optional[Dict[str, PropertyChange]] = None
+
+class GraphDiff(BaseModel):
+    from_generation: str
+    to_generation: str
+    from_taken_at: float
+    to_taken_at: float
+    # nodes_added, relationships_modified, ...; not cut off by the limit
+    counts: Dict[str, int]
+    nodes: List[ResourceChange]
+    relationships: List[ResourceChange]
+    truncated: bool = False
+    seconds: float
\ No newline at end of file
@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import Dict, Any, Optional
+
+class JobInfo(BaseModel):
+    id: str
+    kind: str
+    target_graph: str
+    status: str  # pending, running, succeeded, failed, cancelled
+    progress: float = 0.0
+    message: str = ""
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: str = ""
+
+class JobSubmission(BaseModel):
+    job_id: str
+    status: str
+    deduplicated: bool = False
+
+class JobResult(BaseModel):
+    id: str
+    status: str
+    result: Optional[Dict[str, Any]] = None
+    error: str = ""
\ No newline at end of file
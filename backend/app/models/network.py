@@ -0,0 +1,58 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+class RuleMatch(BaseModel):
+    rule_id: str
+    group_id: str
+    protocol: str
+    fromport: int
+    toport: int
+    cidr_block: str
+    prefixlen: int
+    # The CIDR reaches addresses outside private, loopback, link-local and shared ranges
+    internet: bool
+
+class AllowedResponse(BaseModel):
+    target: str
+    port: Optional[int] = None
+    protocol: str
+    total_rules: int
+    truncated: bool = False
+    rules: List[RuleMatch]
+    security_groups: List[str]
+    instances: List[str]
+    seconds: float
+
+class InstanceExposure(BaseModel):
+    instance_id: str
+    security_groups: List[str]
+    internet_exposed: bool
+    # Protocol -> merged [from, to] port ranges open to the internet
+    internet_ports: Dict[str, List[List[int]]]
+    widest_internet_cidr: Optional[str] = None
+    rules: List[RuleMatch]
+
+class ExposedInstances(BaseModel):
+    port: Optional[int] = None
+    protocol: str
+    total: int
+    truncated: bool = False
+    instances: List[str]
+    security_groups: List[str]
+    seconds: float
+
+class NetworkIndexInfo(BaseModel):
+    loaded: bool = False
+    generation: str = ""
+    fresh: bool = False
+    rules: int = 0
+    invalid_rules: int = 0
+    security_groups: int = 0
+    instances: int = 0
+    prefix_groups: int = 0
+    # Rule definitions parsed by the last rebuild; the rest came from the previous index
+    parsed_rules: int = 0
+    build_seconds: float = 0.0
+    built_at: Optional[float] = None
+    fingerprint: str = ""
+    error: str = ""
\ No newline at end of file
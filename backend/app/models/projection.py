@@ -0,0 +1,66 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+class TraversalRequest(BaseModel):
+    # Start nodes by key (id, arn or name property) and/or Neo4j id
+    node_keys: List[str] = []
+    node_ids: List[int] = []
+    max_depth: int = Field(3, ge=1, le=20)
+    direction: str = "out"  # out, in or both
+    # Relationship types to follow; empty follows all
+    relationship_types: List[str] = []
+    # Only nodes with one of these labels are expanded further; empty expands all
+    through_labels: List[str] = []
+    limit: int = Field(1000, ge=1, le=100000)
+
+class BlastRadiusRequest(TraversalRequest):
+    max_depth: int = Field(6, ge=1, le=20)
+    # Labels of the endpoints to report, e.g. S3Bucket or RDSInstance; empty reports all
+    target_labels: List[str] = []
+    limit: int = Field(100, ge=1, le=100000)
+
+class ProjectedNode(BaseModel):
+    id: int
+    key: str
+    labels: List[str]
+    depth: int = 0
+    # Keys from a start node to this one, for blast radius endpoints
+    path: Optional[List[str]] = None
+
+class ProjectedRelationship(BaseModel):
+    start: int
+    end: int
+    type: str
+
+class TraversalResponse(BaseModel):
+    total: int
+    truncated: bool = False
+    nodes: List[ProjectedNode]
+    relationships: Optional[List[ProjectedRelationship]] = None
+    seconds: float
+    generation: str = ""
+
+class BlastRadiusResponse(BaseModel):
+    reached: int
+    total: int
+    truncated: bool = False
+    counts: Dict[str, int]
+    endpoints: List[ProjectedNode]
+    seconds: float
+    generation: str = ""
+
+class ProjectionInfo(BaseModel):
+    enabled: bool
+    loaded: bool = False
+    building: bool = False
+    # Graph generation the projection was built at; stale when it differs from the current one
+    generation: str = ""
+    fresh: bool = False
+    built_at: Optional[float] = None
+    build_seconds: float = 0.0
+    nodes: int = 0
+    relationships: int = 0
+    labels: int = 0
+    relationship_types: int = 0
+    path: str = ""
+    error: str = ""
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 
 class QueryRequest(BaseModel):
@@ -26,6 +26,40 @@ class GraphData(BaseModel):
     nodes: List[NodeData]
     relationships: List[RelationshipData]
 
+class ExpandRequest(BaseModel):
+    # Neo4j ids of the nodes to expand, as in NodeData.id
+    node_ids: List[str] = Field(..., min_length=1, max_length=100)
+    direction: str = "both"  # out, in or both
+    # Relationship types to follow; empty follows all
+    relationship_types: List[str] = []
+    # What the client already holds, left out of the response
+    known_node_ids: List[str] = []
+    known_relationship_ids: List[str] = []
+    limit: int = Field(200, ge=1, le=5000)
+
+class ExpandResponse(BaseModel):
+    # Only the nodes and relationships that are new to the client
+    graph_data: GraphData
+    expanded: List[str]
+    missing: List[str] = []
+    truncated: bool = False
+    # Expanded nodes answered from the adjacency cache
+    cached: int = 0
+    seconds: float
+    generation: str = ""
+
 class QueryResponse(BaseModel):
     graph_data: GraphData
-    query_details: Optional[CypherQueryDetails] = None
\ No newline at end of file
+    query_details: Optional[CypherQueryDetails] = None
+
+class Suggestion(BaseModel):
+    text: str
+    kind: str  # history, view, template or resource
+    # Times asked for past questions; below 1 for suggestions never asked
+    score: float
+    label: Optional[str] = None
+
+class SuggestResponse(BaseModel):
+    prefix: str
+    suggestions: List[Suggestion]
+    seconds: float
\ No newline at end of file
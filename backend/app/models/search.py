@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+
+class SearchHit(BaseModel):
+    id: int
+    labels: List[str]
+    # Searchable properties of the node (name, arn, id, ...)
+    properties: Dict[str, str]
+    # Field and value that matched best; field is "tag" for key=value tags
+    field: str
+    value: str
+    score: float
+
+class SearchResponse(BaseModel):
+    query: str
+    hits: List[SearchHit]
+    seconds: float
+    generation: str = ""
+
+class SearchIndexInfo(BaseModel):
+    loaded: bool = False
+    generation: str = ""
+    fresh: bool = False
+    nodes: int = 0
+    values: int = 0
+    dead_values: int = 0
+    trigrams: int = 0
+    built_at: Optional[float] = None
+    # Added, removed and unchanged nodes of the last update
+    last_update: Dict[str, Any] = {}
+    error: str = ""
\ No newline at end of file
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+
+class SyntheticEstateOptions(BaseModel):
+    seed: int = 42
+    accounts: int = 5
+    vpcs_per_account: int = 4
+    # Means of the per-parent counts; the actual counts follow degree_distribution
+    instances_per_vpc: float = 50
+    security_groups_per_vpc: float = 8
+    rules_per_security_group: float = 4
+    security_groups_per_instance: float = 2
+    buckets_per_account: float = 40
+    roles_per_account: float = 30
+    policies_per_role: float = 2
+    # "fixed", "exponential" or "powerlaw" (Pareto, a few very large parents)
+    degree_distribution: str = "powerlaw"
+    public_bucket_fraction: float = 0.05
+    open_rule_fraction: float = 0.1
+    admin_role_fraction: float = 0.05
+    instance_role_fraction: float = 0.6
+    stopped_instance_fraction: float = 0.2
\ No newline at end of file
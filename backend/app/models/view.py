@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class ViewInfo(BaseModel):
+    name: str
+    description: str
+    cypher_query: str
+    # Content hash of the stored result; unchanged across refreshes that give the same result
+    version: str = ""
+    # Graph generation the stored result was computed at
+    generation: str = ""
+    fresh: bool = False
+    refreshed_at: Optional[float] = None
+    refresh_seconds: float = 0.0
+    nodes: int = 0
+    relationships: int = 0
+    error: str = ""
\ No newline at end of file
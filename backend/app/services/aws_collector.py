@@ -1,9 +1,61 @@
-import boto3
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from app.services.neo4j_service import Neo4jService
+from app.services.checkpoint_store import CheckpointStore
+from app.services.bulk_loader import GraphBatch
+
+# Resource collectors and the AWS API service each one calls.
+# The API service is what AWS throttles on, so rate budgets are keyed by it.
+RESOURCE_API_SERVICES = {
+    "ec2_instances": "ec2",
+    "s3_buckets": "s3",
+    "vpcs": "ec2",
+    "security_groups": "ec2",
+    "iam_roles": "iam",
+}
+
+# Key of the item list in each collector's result
+RESOURCE_DATA_KEYS = {
+    "ec2_instances": "instances",
+    "s3_buckets": "buckets",
+    "vpcs": "vpcs",
+    "security_groups": "security_groups",
+    "iam_roles": "roles",
+}
+
+# Merge key of each node label written by the collector
+NODE_KEYS = {
+    "VPC": "id",
+    "EC2Instance": "id",
+    "S3Bucket": "name",
+    "SecurityGroup": "id",
+    "IAMRole": "arn",
+}
+
+# Sample relationships written between the demo resources:
+# (type, (start label, property, value), (end label, property, value))
+DEMO_RELATIONSHIPS = [
+    ("ASSUMES", ("EC2Instance", "id", "i-123456789"), ("IAMRole", "name", "ec2-role")),
+    ("HAS_ACCESS_TO", ("IAMRole", "name", "s3-access-role"), ("S3Bucket", "name", "my-data-bucket")),
+    ("PROTECTED_BY", ("EC2Instance", "id", "i-123456789"), ("SecurityGroup", "id", "sg-12345")),
+    ("HAS_ACCESS_TO", ("EC2Instance", "id", "i-987654321"), ("S3Bucket", "name", "my-logs-bucket")),
+]
+
+# IAM and S3 listings are account-wide, so they only need collecting once per account
+GLOBAL_RESOURCES = {"s3_buckets", "iam_roles"}
 
 class AwsCollectorService:
-    def __init__(self, aws_access_key_id: str, aws_secret_access_key: str, aws_region: str, neo4j_service: Neo4jService):
+    def __init__(
+        self,
+        aws_access_key_id: str,
+        aws_secret_access_key: str,
+        aws_region: str,
+        neo4j_service: Neo4jService,
+        aws_session_token: Optional[str] = None,
+        throttle: Optional[Callable[[str], None]] = None,
+        checkpoint: Optional[CheckpointStore] = None,
+        run_id: str = "",
+        account_id: str = ""
+    ):
         """
         Initialize AWS collector service.
         
@@ -12,16 +64,27 @@ class AwsCollectorService:
             aws_secret_access_key: AWS secret access key
             aws_region: AWS region to collect data from
             neo4j_service: Neo4j service for storing collected data
+            aws_session_token: Session token for temporary (assumed role) credentials
+            throttle: Optional callback invoked with the API service name before each AWS API call
+            checkpoint: Optional store used to save and resume paginated collection
+            run_id: Identifier of the collection run the checkpoint belongs to
+            account_id: AWS account the credentials belong to, used in checkpoint keys
         """
         self.aws_access_key_id = aws_access_key_id
         self.aws_secret_access_key = aws_secret_access_key
         self.aws_region = aws_region
         self.neo4j_service = neo4j_service
+        self.throttle = throttle
+        self.checkpoint = checkpoint
+        self.run_id = run_id
+        self.account_id = account_id
         
-        # Initialize AWS session
+        # Initialize AWS session; boto3 is imported here to keep app startup fast
+        import boto3
         self.session = boto3.Session(
             aws_access_key_id=aws_access_key_id,
             aws_secret_access_key=aws_secret_access_key,
+            aws_session_token=aws_session_token,
             region_name=aws_region
         )
     
@@ -32,6 +95,10 @@ class AwsCollectorService:
         This is a simplified implementation for POC purposes.
         A full implementation would collect more resources and their relationships.
         """
+        return self.collect_and_store()
+    
+    def collect_and_store(self):
+        """Blocking body of collect_and_store_aws_data, for running in a thread."""
         try:
             # Collect EC2 instances
             ec2_data = self._collect_ec2_instances()
@@ -56,59 +123,187 @@ class AwsCollectorService:
         except Exception as e:
             return {"status": "error", "message": str(e)}
     
+    def collect_resource(self, resource: str) -> Dict[str, Any]:
+        """
+        Collect a single resource type.
+        
+        Args:
+            resource: One of the keys of RESOURCE_API_SERVICES
+            
+        Returns:
+            The collected data in the same shape as the matching _collect_* method
+        """
+        collectors = {
+            "ec2_instances": self._collect_ec2_instances,
+            "s3_buckets": self._collect_s3_buckets,
+            "vpcs": self._collect_vpcs,
+            "security_groups": self._collect_security_groups,
+            "iam_roles": self._collect_iam_roles,
+        }
+        if resource not in collectors:
+            raise ValueError(f"Unknown resource type: {resource}")
+        return collectors[resource]()
+    
+    def store_collected_data(self, collected: Dict[str, Dict[str, Any]]):
+        """
+        Store data gathered with collect_resource in Neo4j.
+        
+        Args:
+            collected: Mapping of resource type to collected data. Missing
+                resource types are treated as empty.
+        """
+        self._store_data_in_neo4j(
+            collected.get("ec2_instances", {"instances": []}),
+            collected.get("s3_buckets", {"buckets": []}),
+            collected.get("vpcs", {"vpcs": []}),
+            collected.get("security_groups", {"security_groups": []}),
+            collected.get("iam_roles", {"roles": []})
+        )
+    
+    def ensure_constraints(self):
+        """
+        Create the uniqueness constraints the MERGE-based ingest relies on.
+        
+        Without them, concurrent or replayed stores of the same resource can
+        race and create duplicate nodes instead of matching the existing one.
+        """
+        for label, key in NODE_KEYS.items():
+            self.neo4j_service.execute_query(
+                f"CREATE CONSTRAINT {label.lower()}_{key}_unique IF NOT EXISTS "
+                f"FOR (n:{label}) REQUIRE n.{key} IS UNIQUE"
+            )
+    
+    def to_graph_batch(self, collected: Dict[str, Dict[str, Any]]) -> GraphBatch:
+        """
+        Normalize data gathered with collect_resource into nodes and relationships.
+        
+        The result matches what _store_data_in_neo4j writes for the collected
+        resources and can be handed to a BulkLoader.
+        """
+        batch = GraphBatch(NODE_KEYS)
+        for vpc in collected.get("vpcs", {}).get("vpcs", []):
+            batch.add_node("VPC", {"id": vpc["id"], "cidr": vpc["cidr"], "name": vpc["name"], "region": vpc["region"]})
+        for instance in collected.get("ec2_instances", {}).get("instances", []):
+            batch.add_node("EC2Instance", {"id": instance["id"], "type": instance["type"], "name": instance["name"]})
+            batch.add_relationship("BELONGS_TO", "EC2Instance", instance["id"], "VPC", instance["vpc_id"])
+        for bucket in collected.get("s3_buckets", {}).get("buckets", []):
+            batch.add_node("S3Bucket", {"name": bucket["name"], "region": bucket["region"], "created": bucket["created"]})
+        for sg in collected.get("security_groups", {}).get("security_groups", []):
+            batch.add_node("SecurityGroup", {"id": sg["id"], "name": sg["name"]})
+            batch.add_relationship("BELONGS_TO", "SecurityGroup", sg["id"], "VPC", sg["vpc_id"])
+        for role in collected.get("iam_roles", {}).get("roles", []):
+            batch.add_node("IAMRole", {"arn": role["arn"], "name": role["name"]})
+        # Demo relationships name their ends by any property; the batch needs merge keys
+        for rel_type, (start_label, start_property, start_value), (end_label, end_property, end_value) \
+                in DEMO_RELATIONSHIPS:
+            start_keys = [key for key, node in batch.nodes.get(start_label, {}).items()
+                          if node.get(start_property) == start_value]
+            end_keys = [key for key, node in batch.nodes.get(end_label, {}).items()
+                        if node.get(end_property) == end_value]
+            for start_key in start_keys:
+                for end_key in end_keys:
+                    batch.add_relationship(rel_type, start_label, start_key, end_label, end_key)
+        return batch
+    
+    def _paginate(
+        self,
+        resource: str,
+        fetch_page: Callable[[Optional[str]], Tuple[List[Dict[str, Any]], Optional[str]]]
+    ) -> Dict[str, Any]:
+        """
+        Collect all pages of a resource listing.
+        
+        With a checkpoint store, every page is saved together with the token of
+        the next page. A completed unit is served from the checkpoint and a
+        partial one resumes from its saved page token.
+        
+        Args:
+            resource: One of the keys of RESOURCE_API_SERVICES
+            fetch_page: Called with the page token (None for the first page),
+                returns (items, next page token or None)
+        """
+        items = []
+        token = None
+        
+        use_checkpoint = self.checkpoint is not None and bool(self.run_id)
+        if use_checkpoint:
+            state = self.checkpoint.load_unit(self.run_id, self.account_id, self.aws_region, resource)
+            if state is not None:
+                items = state["items"]
+                if state["status"] == "completed":
+                    return {RESOURCE_DATA_KEYS[resource]: items}
+                token = state["page_token"]
+        
+        while True:
+            if self.throttle is not None:
+                self.throttle(RESOURCE_API_SERVICES[resource])
+            page, token = fetch_page(token)
+            items.extend(page)
+            if use_checkpoint:
+                self.checkpoint.save_page(self.run_id, self.account_id, self.aws_region, resource, page, token)
+            if not token:
+                break
+        
+        return {RESOURCE_DATA_KEYS[resource]: items}
+    
     def _collect_ec2_instances(self) -> Dict[str, Any]:
         """Collect EC2 instances from AWS."""
-        # In a real implementation, this would call the AWS API to get EC2 instances
-        # For POC purposes, returning sample data
-        return {
-            "instances": [
+        # In a real implementation, this would page through describe_instances with NextToken
+        # For POC purposes, returning sample data as a single page
+        def fetch_page(token):
+            return [
                 {"id": "i-123456789", "type": "t2.micro", "name": "web-server-1", "vpc_id": "vpc-12345"},
                 {"id": "i-987654321", "type": "t2.medium", "name": "db-server-1", "vpc_id": "vpc-12345"}
-            ]
-        }
+            ], None
+        
+        return self._paginate("ec2_instances", fetch_page)
     
     def _collect_s3_buckets(self) -> Dict[str, Any]:
         """Collect S3 buckets from AWS."""
-        # In a real implementation, this would call the AWS API to get S3 buckets
-        # For POC purposes, returning sample data
-        return {
-            "buckets": [
+        # In a real implementation, this would page through list_buckets with ContinuationToken
+        # For POC purposes, returning sample data as a single page
+        def fetch_page(token):
+            return [
                 {"name": "my-data-bucket", "region": "us-east-1", "created": "2023-01-01"},
                 {"name": "my-logs-bucket", "region": "us-east-1", "created": "2023-01-01"}
-            ]
-        }
+            ], None
+        
+        return self._paginate("s3_buckets", fetch_page)
     
     def _collect_vpcs(self) -> Dict[str, Any]:
         """Collect VPCs from AWS."""
-        # In a real implementation, this would call the AWS API to get VPCs
-        # For POC purposes, returning sample data
-        return {
-            "vpcs": [
+        # In a real implementation, this would page through describe_vpcs with NextToken
+        # For POC purposes, returning sample data as a single page
+        def fetch_page(token):
+            return [
                 {"id": "vpc-12345", "cidr": "10.0.0.0/16", "name": "main-vpc", "region": "us-east-1"}
-            ]
-        }
+            ], None
+        
+        return self._paginate("vpcs", fetch_page)
     
     def _collect_security_groups(self) -> Dict[str, Any]:
         """Collect security groups from AWS."""
-        # In a real implementation, this would call the AWS API to get security groups
-        # For POC purposes, returning sample data
-        return {
-            "security_groups": [
+        # In a real implementation, this would page through describe_security_groups with NextToken
+        # For POC purposes, returning sample data as a single page
+        def fetch_page(token):
+            return [
                 {"id": "sg-12345", "name": "web-sg", "vpc_id": "vpc-12345"},
                 {"id": "sg-67890", "name": "db-sg", "vpc_id": "vpc-12345"}
-            ]
-        }
+            ], None
+        
+        return self._paginate("security_groups", fetch_page)
     
     def _collect_iam_roles(self) -> Dict[str, Any]:
         """Collect IAM roles from AWS."""
-        # In a real implementation, this would call the AWS API to get IAM roles
-        # For POC purposes, returning sample data
-        return {
-            "roles": [
+        # In a real implementation, this would page through list_roles with Marker
+        # For POC purposes, returning sample data as a single page
+        def fetch_page(token):
+            return [
                 {"name": "ec2-role", "arn": "arn:aws:iam::123456789012:role/ec2-role"},
                 {"name": "s3-access-role", "arn": "arn:aws:iam::123456789012:role/s3-access-role"}
-            ]
-        }
+            ], None
+        
+        return self._paginate("iam_roles", fetch_page)
     
     def _store_data_in_neo4j(self, ec2_data, s3_data, vpc_data, sg_data, iam_data):
         """
@@ -200,46 +395,14 @@ class AwsCollectorService:
             )
         
         # Create some sample relationships for demonstration
-        # EC2 instance assumes IAM role
-        self.neo4j_service.execute_query(
-            """
-            MATCH (i:EC2Instance {id: 'i-123456789'})
-            MATCH (r:IAMRole {name: 'ec2-role'})
-            MERGE (i)-[:ASSUMES]->(r)
-            RETURN i, r
-            """,
-            {}
-        )
-        
-        # IAM role has access to S3 bucket
-        self.neo4j_service.execute_query(
-            """
-            MATCH (r:IAMRole {name: 's3-access-role'})
-            MATCH (b:S3Bucket {name: 'my-data-bucket'})
-            MERGE (r)-[:HAS_ACCESS_TO]->(b)
-            RETURN r, b
-            """,
-            {}
-        )
-        
-        # EC2 instance protected by security group
-        self.neo4j_service.execute_query(
-            """
-            MATCH (i:EC2Instance {id: 'i-123456789'})
-            MATCH (sg:SecurityGroup {id: 'sg-12345'})
-            MERGE (i)-[:PROTECTED_BY]->(sg)
-            RETURN i, sg
-            """,
-            {}
-        )
-        
-        # EC2 instance has access to S3 bucket
-        self.neo4j_service.execute_query(
-            """
-            MATCH (i:EC2Instance {id: 'i-987654321'})
-            MATCH (b:S3Bucket {name: 'my-logs-bucket'})
-            MERGE (i)-[:HAS_ACCESS_TO]->(b)
-            RETURN i, b
-            """,
-            {}
-        )
\ No newline at end of file
+        for rel_type, (start_label, start_property, start_value), (end_label, end_property, end_value) \
+                in DEMO_RELATIONSHIPS:
+            self.neo4j_service.execute_query(
+                f"""
+                MATCH (a:{start_label} {{{start_property}: $start}})
+                MATCH (b:{end_label} {{{end_property}: $end}})
+                MERGE (a)-[:{rel_type}]->(b)
+                RETURN a, b
+                """,
+                {"start": start_value, "end": end_value}
+            )
\ No newline at end of file
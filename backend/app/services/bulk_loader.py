@@ -0,0 +1,406 @@
+import csv
+import os
+import subprocess
+import time
+import logging
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from app.services.neo4j_service import Neo4jService
+from app.services.metrics import record_ingest
+from app.services.graph_generation import mark_graph_written
+
+logger = logging.getLogger(__name__)
+
+LOAD_MODES = ("auto", "transactional", "load_csv", "admin_import")
+
+class GraphBatch:
+    def __init__(self, node_keys: Dict[str, str], default_key: str = "id"):
+        """
+        Normalized nodes and relationships waiting to be loaded.
+
+        Nodes are deduplicated per label on their key property, so adding the
+        same resource twice keeps the last properties seen. A node is stored
+        under the label its key belongs to; any other labels it carries are
+        kept alongside and written with it.
+
+        Args:
+            node_keys: Key property per label, e.g. {"S3Bucket": "name"}
+            default_key: Key property for labels not in node_keys
+        """
+        self.node_keys = dict(node_keys)
+        self.default_key = default_key
+        self.nodes: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        # key label -> key -> sorted other labels, only for nodes that have any
+        self.extra_labels: Dict[str, Dict[Any, Tuple[str, ...]]] = {}
+        # (type, start label, end label) -> list of (start key, end key, properties)
+        self.relationships: Dict[Tuple[str, str, str], List[Tuple[Any, Any, Dict[str, Any]]]] = {}
+
+    def key_for(self, label: str) -> str:
+        return self.node_keys.get(label, self.default_key)
+
+    def add_node(self, label: str, properties: Dict[str, Any], labels: Iterable[str] = ()):
+        """
+        Add a node keyed on the key property of label.
+
+        Args:
+            label: Label the node is keyed and deduplicated on
+            properties: Node properties, including the key property
+            labels: Further labels of the node; label itself is ignored here
+        """
+        key = properties[self.key_for(label)]
+        self.nodes.setdefault(label, {})[key] = properties
+        extra = tuple(sorted(set(labels) - {label}))
+        if extra:
+            self.extra_labels.setdefault(label, {})[key] = extra
+        elif key in self.extra_labels.get(label, {}):
+            del self.extra_labels[label][key]
+
+    def labels_of(self, label: str, key: Any) -> Tuple[str, ...]:
+        """Other labels of the node stored under label and key."""
+        return self.extra_labels.get(label, {}).get(key, ())
+
+    def add_relationship(
+        self,
+        rel_type: str,
+        start_label: str,
+        start_key: Any,
+        end_label: str,
+        end_key: Any,
+        properties: Optional[Dict[str, Any]] = None
+    ):
+        self.relationships.setdefault((rel_type, start_label, end_label), []).append(
+            (start_key, end_key, properties or {})
+        )
+
+    def merge(self, other: "GraphBatch"):
+        """Add all nodes and relationships of another batch."""
+        self.node_keys.update(other.node_keys)
+        for label, nodes in other.nodes.items():
+            self.nodes.setdefault(label, {}).update(nodes)
+            # Nodes the other batch now adds without extra labels lose the ones seen before
+            own = self.extra_labels.get(label)
+            if own:
+                for key in nodes:
+                    own.pop(key, None)
+        for label, extra in other.extra_labels.items():
+            self.extra_labels.setdefault(label, {}).update(extra)
+        for group, rels in other.relationships.items():
+            self.relationships.setdefault(group, []).extend(rels)
+
+    @property
+    def node_count(self) -> int:
+        return sum(len(nodes) for nodes in self.nodes.values())
+
+    @property
+    def relationship_count(self) -> int:
+        return sum(len(rels) for rels in self.relationships.values())
+
+class BulkLoader:
+    def __init__(
+        self,
+        neo4j_service: Neo4jService,
+        import_dir: str = "",
+        admin_path: str = "neo4j-admin",
+        database: str = "neo4j",
+        batch_size: int = 5000,
+        periodic_commit: int = 10000,
+        min_bulk_rows: int = 50000
+    ):
+        """
+        Load normalized graph data into Neo4j through the fastest suitable path.
+
+        Args:
+            neo4j_service: Neo4j service used for Cypher based loading
+            import_dir: Neo4j server import directory CSV files are written to.
+                LOAD CSV reads them as file:///<name>, so the server must be local
+            admin_path: neo4j-admin executable for offline imports
+            database: Database name for offline imports
+            batch_size: Rows per transaction for transactional loading
+            periodic_commit: Rows per commit for LOAD CSV
+            min_bulk_rows: In auto mode, batches smaller than this use transactional loading
+        """
+        self.neo4j_service = neo4j_service
+        self.import_dir = import_dir
+        self.admin_path = admin_path
+        self.database = database
+        self.batch_size = batch_size
+        self.periodic_commit = periodic_commit
+        self.min_bulk_rows = min_bulk_rows
+
+    def load(self, batch: GraphBatch, mode: str = "auto") -> Dict[str, Any]:
+        """
+        Load a batch into Neo4j.
+
+        The load is recorded on the graph's write marker, so API processes see
+        a new graph generation.
+
+        Args:
+            batch: Nodes and relationships to load
+            mode: "transactional", "load_csv", "admin_import", or "auto" to use
+                LOAD CSV for large batches and transactional batches for small deltas
+
+        Returns:
+            Dictionary with the mode used, row counts and timings; for admin_import also
+            whether the key constraints were "created" or are still "missing"
+        """
+        if mode not in LOAD_MODES:
+            raise ValueError(f"Unknown load mode: {mode}")
+        if mode == "auto":
+            rows = batch.node_count + batch.relationship_count
+            mode = "load_csv" if rows >= self.min_bulk_rows and self.import_dir else "transactional"
+
+        started = time.monotonic()
+        if mode == "admin_import":
+            # Offline import creates the database from scratch; constraints can only be added
+            # once it is online, so they are reported as missing when it isn't yet
+            details = self.admin_import(batch)
+            try:
+                self.ensure_constraints(batch)
+                mark_graph_written(self.neo4j_service)
+                details["constraints"] = "created"
+            except Exception as e:
+                logger.warning(f"Constraints not created after the offline import, run ensure_constraints "
+                               f"once database {self.database} is started: {str(e)}")
+                details["constraints"] = "missing"
+        else:
+            self.ensure_constraints(batch)
+            if mode == "load_csv":
+                details = self.load_csv(batch)
+            else:
+                details = self.load_transactional(batch)
+            # Loads from the command line change the generation every API process reads
+            mark_graph_written(self.neo4j_service)
+
+        seconds = time.monotonic() - started
+        record_ingest(f"bulk_{mode}", batch.node_count + batch.relationship_count, seconds)
+        return {
+            "mode": mode,
+            "nodes": batch.node_count,
+            "relationships": batch.relationship_count,
+            "seconds": round(seconds, 4),
+            **details
+        }
+
+    def ensure_constraints(self, batch: GraphBatch):
+        """Create uniqueness constraints on the key property of every label in the batch."""
+        for label in batch.nodes:
+            key = batch.key_for(label)
+            self.neo4j_service.execute_query(
+                f"CREATE CONSTRAINT {label.lower()}_{key}_unique IF NOT EXISTS "
+                f"FOR (n:{label}) REQUIRE n.{key} IS UNIQUE"
+            )
+
+    def load_transactional(self, batch: GraphBatch) -> Dict[str, Any]:
+        """Load with UNWIND + MERGE in batches of batch_size rows."""
+        transactions = 0
+        for label, nodes in batch.nodes.items():
+            key = batch.key_for(label)
+            query = f"UNWIND $rows AS row MERGE (n:{label} {{{key}: row.{key}}}) SET n += row"
+            for chunk in _chunks(list(nodes.values()), self.batch_size):
+                self.neo4j_service.execute_query(query, {"rows": chunk})
+                transactions += 1
+        transactions += self.set_extra_labels(batch)
+
+        for (rel_type, start_label, end_label), rels in batch.relationships.items():
+            query = (
+                f"UNWIND $rows AS row "
+                f"MATCH (a:{start_label} {{{batch.key_for(start_label)}: row.start}}) "
+                f"MATCH (b:{end_label} {{{batch.key_for(end_label)}: row.end}}) "
+                f"MERGE (a)-[r:{rel_type}]->(b) SET r += row.properties"
+            )
+            rows = [{"start": start, "end": end, "properties": props} for start, end, props in rels]
+            for chunk in _chunks(rows, self.batch_size):
+                self.neo4j_service.execute_query(query, {"rows": chunk})
+                transactions += 1
+
+        return {"transactions": transactions}
+
+    def set_extra_labels(self, batch: GraphBatch) -> int:
+        """
+        Add the labels nodes carry besides their key label.
+
+        Labels cannot be parameters, so nodes are grouped by their label set
+        and every group gets its own SET clause.
+
+        Returns:
+            Number of transactions run
+        """
+        transactions = 0
+        for label, extra in batch.extra_labels.items():
+            key = batch.key_for(label)
+            groups: Dict[Tuple[str, ...], List[Any]] = {}
+            for node_key, labels in extra.items():
+                groups.setdefault(labels, []).append(node_key)
+            for labels, keys in groups.items():
+                query = (f"UNWIND $keys AS key MATCH (n:{label} {{{key}: key}}) "
+                         f"SET n:{':'.join(labels)}")
+                for chunk in _chunks(keys, self.batch_size):
+                    self.neo4j_service.execute_query(query, {"keys": chunk})
+                    transactions += 1
+        return transactions
+
+    def write_csv(self, batch: GraphBatch, directory: str, admin_headers: bool = False) -> Dict[str, Any]:
+        """
+        Write one CSV file with a header row per label and per relationship group.
+
+        Args:
+            batch: Data to write
+            directory: Target directory, created if missing
+            admin_headers: Write neo4j-admin import headers (id:ID(Label), :START_ID, ...)
+                instead of plain property names, plus a :LABEL column for labels
+                besides the file's own
+
+        Returns:
+            Dictionary with "nodes" ({label: (path, columns)}) and
+            "relationships" ({(type, start, end): (path, columns)})
+        """
+        os.makedirs(directory, exist_ok=True)
+        written = {"nodes": {}, "relationships": {}}
+
+        for label, nodes in batch.nodes.items():
+            key = batch.key_for(label)
+            rows = list(nodes.values())
+            columns = _columns(rows, first=key)
+            if admin_headers:
+                header = [f"{key}:ID({label})" if name == key else f"{name}{_ADMIN_TYPES[kind]}"
+                          for name, kind in columns]
+            else:
+                header = [name for name, _ in columns]
+            values = ([row.get(name) for name, _ in columns] for row in rows)
+            extra = batch.extra_labels.get(label)
+            if admin_headers and extra:
+                header.append(":LABEL")
+                values = (row + [";".join(batch.labels_of(label, row[0]))] for row in values)
+            path = os.path.join(directory, f"nodes_{label}.csv")
+            _write_rows(path, header, values)
+            written["nodes"][label] = (path, columns)
+
+        for group, rels in batch.relationships.items():
+            rel_type, start_label, end_label = group
+            columns = _columns([props for _, _, props in rels])
+            if admin_headers:
+                header = [f":START_ID({start_label})", f":END_ID({end_label})"] + \
+                         [f"{name}{_ADMIN_TYPES[kind]}" for name, kind in columns]
+            else:
+                header = ["start", "end"] + [name for name, _ in columns]
+            path = os.path.join(directory, f"rels_{rel_type}_{start_label}_{end_label}.csv")
+            _write_rows(path, header, (
+                [start, end] + [props.get(name) for name, _ in columns] for start, end, props in rels
+            ))
+            written["relationships"][group] = (path, columns)
+
+        return written
+
+    def load_csv(self, batch: GraphBatch) -> Dict[str, Any]:
+        """Write the batch to the server import directory and load it with LOAD CSV."""
+        if not self.import_dir:
+            raise ValueError("NEO4J_IMPORT_DIR must be set to load with LOAD CSV")
+
+        write_started = time.monotonic()
+        written = self.write_csv(batch, self.import_dir)
+        write_seconds = time.monotonic() - write_started
+
+        # USING PERIODIC COMMIT needs an auto-commit transaction, which is what
+        # Neo4jService.execute_query runs
+        for label, (path, columns) in written["nodes"].items():
+            key = batch.key_for(label)
+            assignments = ", ".join(f"n.{name} = {_convert(name, kind)}" for name, kind in columns if name != key)
+            self.neo4j_service.execute_query(
+                f"USING PERIODIC COMMIT {self.periodic_commit} "
+                f"LOAD CSV WITH HEADERS FROM 'file:///{os.path.basename(path)}' AS row "
+                f"MERGE (n:{label} {{{key}: row.{key}}})"
+                + (f" SET {assignments}" if assignments else "")
+            )
+        self.set_extra_labels(batch)
+
+        for (rel_type, start_label, end_label), (path, columns) in written["relationships"].items():
+            assignments = ", ".join(f"r.{name} = {_convert(name, kind)}" for name, kind in columns)
+            self.neo4j_service.execute_query(
+                f"USING PERIODIC COMMIT {self.periodic_commit} "
+                f"LOAD CSV WITH HEADERS FROM 'file:///{os.path.basename(path)}' AS row "
+                f"MATCH (a:{start_label} {{{batch.key_for(start_label)}: row.start}}) "
+                f"MATCH (b:{end_label} {{{batch.key_for(end_label)}: row.end}}) "
+                f"MERGE (a)-[r:{rel_type}]->(b)"
+                + (f" SET {assignments}" if assignments else "")
+            )
+
+        return {
+            "csv_write_seconds": round(write_seconds, 4),
+            "files": len(written["nodes"]) + len(written["relationships"])
+        }
+
+    def admin_import(self, batch: GraphBatch, directory: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build a new database with the offline neo4j-admin import tool.
+
+        The target database must be stopped and empty; this is only meant for
+        the first load of a local Neo4j.
+        """
+        directory = directory or self.import_dir
+        if not directory:
+            raise ValueError("A directory for the import files is required")
+
+        write_started = time.monotonic()
+        written = self.write_csv(batch, directory, admin_headers=True)
+        write_seconds = time.monotonic() - write_started
+
+        cmd = [self.admin_path, "import", f"--database={self.database}"]
+        for label, (path, _) in written["nodes"].items():
+            cmd.append(f"--nodes={label}={path}")
+        for (rel_type, _, _), (path, _) in written["relationships"].items():
+            cmd.append(f"--relationships={rel_type}={path}")
+
+        logger.info(f"Running offline import: {' '.join(cmd)}")
+        process = subprocess.run(cmd, capture_output=True, text=True)
+        if process.returncode != 0:
+            raise Exception(f"neo4j-admin import failed: {process.stderr or process.stdout}")
+
+        return {
+            "csv_write_seconds": round(write_seconds, 4),
+            "files": len(written["nodes"]) + len(written["relationships"])
+        }
+
+# Suffixes for typed neo4j-admin import headers
+_ADMIN_TYPES = {"int": ":long", "float": ":double", "bool": ":boolean", "str": ""}
+
+def _columns(rows: List[Dict[str, Any]], first: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Collect (name, type) for every property seen in rows, key column first."""
+    kinds: Dict[str, str] = {}
+    for row in rows:
+        for name, value in row.items():
+            if value is not None and name not in kinds:
+                kinds[name] = _kind(value)
+    names = sorted(kinds)
+    if first is not None:
+        names = [first] + [name for name in names if name != first]
+        kinds.setdefault(first, "str")
+    return [(name, kinds[name]) for name in names]
+
+def _kind(value: Any) -> str:
+    # bool is a subclass of int, so check it first
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return "str"
+
+def _convert(name: str, kind: str) -> str:
+    if kind == "int":
+        return f"toInteger(row.{name})"
+    if kind == "float":
+        return f"toFloat(row.{name})"
+    if kind == "bool":
+        return f"(row.{name} = 'true')"
+    return f"row.{name}"
+
+def _write_rows(path: str, header: List[str], rows: Iterable[List[Any]]):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(["" if v is None else ("true" if v is True else "false" if v is False else v) for v in row])
+
+def _chunks(rows: List[Any], size: int) -> Iterable[List[Any]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
\ No newline at end of file
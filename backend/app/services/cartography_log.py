@@ -0,0 +1,107 @@
+import re
+import time
+from collections import deque
+from typing import Dict, Any, Callable, List, Optional
+
+# Cartography logs every top-level sync stage as
+# "Starting sync stage '<name>'" / "Finishing sync stage '<name>'"
+STAGE_START = re.compile(r"Starting sync stage '(?P<module>[^']+)'")
+STAGE_FINISH = re.compile(r"Finishing sync stage '(?P<module>[^']+)'")
+# Intel modules log what they sync and how many records they load
+SYNCING = re.compile(r"Syncing (?P<what>.+?)(?: for region '(?P<region>[^']+)')?(?: in account '(?P<account>[^']+)')?\.?$")
+LOADING = re.compile(r"Loading (?P<count>\d+) (?P<what>.+?)(?: into (?:the )?graph)?\.?$")
+
+class CartographyRunLog:
+    def __init__(
+        self,
+        max_lines: int = 2000,
+        max_events: int = 500,
+        expected_stages: int = 0,
+        on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_line: Optional[Callable[[str, str], None]] = None
+    ):
+        """
+        Bounded log of a Cartography run with structured progress events.
+
+        Memory use is fixed by max_lines and max_events no matter how long the run is.
+
+        Args:
+            max_lines: Output lines kept in the ring buffer
+            max_events: Progress events kept
+            expected_stages: Number of sync stages the run should go through, used for progress
+            on_event: Called with every progress event as it is parsed
+            on_line: Called with (stream, line) for every output line
+        """
+        self.lines = deque(maxlen=max_lines)
+        self.events = deque(maxlen=max_events)
+        self.expected_stages = expected_stages
+        self.on_event = on_event
+        self.on_line = on_line
+        self.started = time.monotonic()
+        self.finished_stages = 0
+        self._current_stage: Optional[str] = None
+        self._stage_started: Dict[str, float] = {}
+        self._stage_records: Dict[str, int] = {}
+
+    @property
+    def progress(self) -> float:
+        if not self.expected_stages:
+            return 0.0
+        return min(1.0, self.finished_stages / self.expected_stages)
+
+    def add_line(self, stream: str, line: str):
+        """Record one output line and emit any progress event it describes."""
+        line = line.rstrip("\r\n")
+        self.lines.append((stream, line))
+        if self.on_line is not None:
+            self.on_line(stream, line)
+
+        now = time.monotonic()
+        match = STAGE_START.search(line)
+        if match:
+            module = match.group("module")
+            self._current_stage = module
+            self._stage_started[module] = now
+            self._stage_records[module] = 0
+            self._emit({"type": "module_started", "module": module})
+            return
+
+        match = STAGE_FINISH.search(line)
+        if match:
+            module = match.group("module")
+            self.finished_stages += 1
+            self._emit({
+                "type": "module_finished",
+                "module": module,
+                "elapsed_seconds": round(now - self._stage_started.pop(module, now), 3),
+                "records": self._stage_records.pop(module, 0)
+            })
+            if self._current_stage == module:
+                self._current_stage = None
+            return
+
+        match = LOADING.search(line)
+        if match:
+            count = int(match.group("count"))
+            if self._current_stage is not None:
+                self._stage_records[self._current_stage] += count
+            self._emit({"type": "records", "module": self._current_stage, "what": match.group("what"),
+                        "records": count})
+            return
+
+        match = SYNCING.search(line)
+        if match:
+            self._emit({"type": "module_progress", "module": self._current_stage, "what": match.group("what"),
+                        "region": match.group("region"), "account": match.group("account")})
+
+    def tail(self, stream: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+        """Most recent buffered lines, optionally of one stream only."""
+        lines = [line for s, line in self.lines if stream is None or s == stream]
+        return lines[-limit:] if limit else lines
+
+    def _emit(self, event: Dict[str, Any]):
+        event["elapsed_run_seconds"] = round(time.monotonic() - self.started, 3)
+        event["timestamp"] = time.time()
+        self.events.append(event)
+        if self.on_event is not None:
+            self.on_event(event)
\ No newline at end of file
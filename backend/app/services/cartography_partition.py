@@ -0,0 +1,126 @@
+from typing import Dict, Any, List, Optional
+
+# AWS syncs grouped into units that can run as separate processes.
+# Syncs inside a group keep Cartography's own order: ec2:instance has to be
+# loaded before ssm and ec2:images, and the asset exposure analysis needs
+# instances, security groups and load balancers in the same run.
+AWS_SYNC_GROUPS: Dict[str, List[str]] = {
+    "iam": ["iam"],
+    "s3": ["s3"],
+    "ec2": ["ec2:vpc", "ec2:subnet", "ec2:security_group", "ec2:network_interface", "ec2:instance",
+            "ec2:load_balancer", "ec2:load_balancer_v2", "ec2:keypair", "ec2:internet_gateway",
+            "ec2:vpc_peering", "ec2:tgw", "elastic_ip_addresses"],
+    "ec2_extra": ["ec2:images", "ssm", "ec2:volumes", "ec2:snapshots", "ec2:launch_templates",
+                  "ec2:autoscalinggroup", "ec2:reserved_instances"],
+    "data": ["dynamodb", "rds", "redshift", "elasticache", "elasticsearch", "emr", "sqs",
+             "secretsmanager", "kms"],
+    "compute": ["lambda_function", "ecr", "ecs", "eks", "apigateway"],
+    "dns": ["route53"],
+    "security": ["securityhub", "inspector", "config"],
+    # These read what the other groups loaded, so they go last
+    "permission_relationships": ["permission_relationships"],
+    "tags": ["resourcegroupstaggingapi"],
+}
+AWS_GROUP_DEPENDENCIES: Dict[str, List[str]] = {
+    "ec2_extra": ["ec2"],
+    "permission_relationships": ["iam", "s3", "ec2", "data", "compute"],
+    "tags": ["iam", "s3", "ec2", "ec2_extra", "data", "compute", "dns", "security"],
+}
+DEFAULT_AWS_GROUPS = ["iam", "s3", "ec2", "ec2_extra", "data", "compute", "security",
+                      "permission_relationships", "tags"]
+
+class CartographyUnit:
+    def __init__(
+        self,
+        name: str,
+        modules: List[str],
+        depends_on: Optional[List[str]] = None,
+        aws_syncs: Optional[List[str]] = None,
+        aws_profile: Optional[str] = None,
+        requires_success: bool = True
+    ):
+        """
+        One Cartography process of a partitioned run.
+
+        Args:
+            name: Unique unit name, used for dependencies and reporting
+            modules: Values for --selected-modules
+            depends_on: Names of units that must succeed before this one starts
+            aws_syncs: Values for --aws-requested-syncs
+            aws_profile: AWS profile the unit syncs, passed as AWS_PROFILE
+            requires_success: Skip the unit when a dependency failed instead of
+                only waiting for it to finish
+        """
+        self.name = name
+        self.modules = modules
+        self.depends_on = depends_on or []
+        self.aws_syncs = aws_syncs or []
+        self.aws_profile = aws_profile
+        self.requires_success = requires_success
+
+    def arguments(self) -> List[str]:
+        args = ["--selected-modules", ",".join(self.modules)]
+        if self.aws_syncs:
+            args.extend(["--aws-requested-syncs", ",".join(self.aws_syncs)])
+        return args
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "modules": self.modules,
+            "depends_on": self.depends_on,
+            "aws_syncs": self.aws_syncs,
+            "aws_profile": self.aws_profile
+        }
+
+def plan_units(advanced_options: Optional[Dict[str, Any]] = None) -> List[CartographyUnit]:
+    """
+    Split a Cartography run into units that can run in parallel.
+
+    Index creation runs first and the analysis stage runs once at the end.
+    In between there is one unit per AWS sync group and account profile and
+    one unit per other provider. Cartography only takes regions from the
+    account itself, so accounts (profiles) are the finest AWS split.
+
+    Args:
+        advanced_options: Cartography options (collect_dns, collect_gcp,
+            collect_okta, aws_sync_groups, aws_profiles)
+
+    Returns:
+        Units in dependency order
+    """
+    options = advanced_options or {}
+    groups = list(options.get("aws_sync_groups") or DEFAULT_AWS_GROUPS)
+    if options.get("collect_dns") and "dns" not in groups:
+        groups.append("dns")
+    unknown = [g for g in groups if g not in AWS_SYNC_GROUPS]
+    if unknown:
+        raise ValueError(f"Unknown AWS sync groups: {', '.join(unknown)}")
+    profiles = options.get("aws_profiles") or [None]
+
+    units = [CartographyUnit("create-indexes", ["create-indexes"])]
+    for profile in profiles:
+        suffix = f"@{profile}" if profile else ""
+        for group in AWS_SYNC_GROUPS:
+            if group not in groups:
+                continue
+            depends_on = ["create-indexes"] + [f"aws:{d}{suffix}" for d in AWS_GROUP_DEPENDENCIES.get(group, [])
+                                               if d in groups]
+            units.append(CartographyUnit(f"aws:{group}{suffix}", ["aws"], depends_on,
+                                         AWS_SYNC_GROUPS[group], profile))
+
+    for provider in ("gcp", "okta"):
+        if options.get(f"collect_{provider}"):
+            units.append(CartographyUnit(provider, [provider], ["create-indexes"]))
+
+    # Cleanup of stale nodes happens per module against the shared update tag;
+    # the analysis jobs over the whole graph only make sense once, at the end,
+    # and still run over whatever was loaded when some units failed
+    units.append(CartographyUnit("analysis", ["analysis"], [u.name for u in units], requires_success=False))
+    return units
+
+def sync_stages(advanced_options: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Top-level sync stages of a single-process run with these options, in order; the modules of plan_units."""
+    options = advanced_options or {}
+    providers = [provider for provider in ("gcp", "okta") if options.get(f"collect_{provider}")]
+    return ["create-indexes", "aws", *providers, "analysis"]
\ No newline at end of file
@@ -3,17 +3,30 @@ import os
 import json
 import time
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional
 import logging
+from app.services.cartography_log import CartographyRunLog
+from app.services.cartography_partition import CartographyUnit, plan_units, sync_stages
+from app.services.cartography_worker import CartographyWorkerPool, CartographyWorkerUnavailable
+from app.services.metrics import record_ingest
 
 logger = logging.getLogger(__name__)
 
+# Longest output line read in one piece; longer lines are truncated
+STREAM_LINE_LIMIT = 1024 * 1024
+# Buffered output lines returned with the run result
+RESULT_TAIL_LINES = 200
+# Server credentials a run with its own AWS keys must not inherit
+AWS_CREDENTIAL_VARS = ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SESSION_TOKEN", "AWS_SECURITY_TOKEN",
+                       "AWS_PROFILE")
+
 class CartographyService:
     def __init__(
         self, 
         neo4j_uri: str, 
         neo4j_user: str, 
-        neo4j_password: str
+        neo4j_password: str,
+        worker_pool: Optional[CartographyWorkerPool] = None
     ):
         """
         Initialize the Cartography service.
@@ -22,10 +35,13 @@ class CartographyService:
             neo4j_uri: Neo4j URI (e.g., bolt://localhost:7687)
             neo4j_user: Neo4j username
             neo4j_password: Neo4j password
+            worker_pool: Warm workers to run Cartography on; without one every
+                run starts a fresh cartography process
         """
         self.neo4j_uri = neo4j_uri
         self.neo4j_user = neo4j_user
         self.neo4j_password = neo4j_password
+        self.worker_pool = worker_pool
     
     async def run_cartography(
         self, 
@@ -33,40 +49,35 @@ class CartographyService:
         aws_secret_access_key: str = "",
         aws_region: str = "us-east-1",
         use_sample_data: bool = False,
-        advanced_options: Dict[str, Any] = None
+        advanced_options: Dict[str, Any] = None,
+        run_log: Optional[CartographyRunLog] = None
     ) -> Dict[str, Any]:
         """
         Run Cartography to collect cloud infrastructure data and store it in Neo4j.
         
+        Output is streamed line by line into a bounded log instead of being
+        buffered until the process exits.
+        
         Args:
             aws_access_key_id: AWS access key ID
             aws_secret_access_key: AWS secret access key
             aws_region: AWS region
             use_sample_data: Whether to use sample data instead of real AWS credentials
             advanced_options: Additional options for Cartography
+            run_log: Log receiving output lines and progress events as they happen
             
         Returns:
             Dictionary with the result of the Cartography run
         """
         try:
-            # Set environment variables for Cartography
-            env = os.environ.copy()
-            
-            if not use_sample_data:
-                env["AWS_ACCESS_KEY_ID"] = aws_access_key_id
-                env["AWS_SECRET_ACCESS_KEY"] = aws_secret_access_key
-                env["AWS_DEFAULT_REGION"] = aws_region
-                
-            env["NEO4J_URI"] = self.neo4j_uri
-            env["NEO4J_USER"] = self.neo4j_user
-            env["NEO4J_PASSWORD"] = self.neo4j_password
+            # Environment of this run only; os.environ is never modified
+            env = self._build_env(
+                "" if use_sample_data else aws_access_key_id,
+                "" if use_sample_data else aws_secret_access_key,
+                aws_region
+            )
             
-            cmd = [
-                "cartography",
-                "--neo4j-uri", self.neo4j_uri,
-                "--neo4j-user", self.neo4j_user,
-                "--neo4j-password-env-var", "NEO4J_PASSWORD"
-            ]
+            cmd = self._base_command()
             
             # Add options based on advanced_options
             if advanced_options:
@@ -76,6 +87,8 @@ class CartographyService:
                 # AWS Sync options
                 if not use_sample_data:
                     cmd.append("--aws-sync")
+                    # Only the planned stages run, so their count gives the run's progress
+                    cmd.extend(["--selected-modules", ",".join(sync_stages(advanced_options))])
                     
                     # Days of data to sync
                     days = advanced_options.get("days_of_data", 7)
@@ -98,28 +111,22 @@ class CartographyService:
             else:
                 # Default to AWS sync if not using sample data
                 cmd.append("--aws-sync")
+                cmd.extend(["--selected-modules", ",".join(sync_stages())])
             
             logger.info(f"Running cartography with command: {' '.join(cmd)}")
             
-            # Run Cartography as a subprocess
-            # This runs asynchronously to not block the event loop
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                env=env,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            # Wait for the process to complete
-            stdout, stderr = await process.communicate()
+            if run_log is None:
+                run_log = CartographyRunLog()
+            returncode = await self._run_process(cmd, env, run_log)
             
             # Check if the process completed successfully
-            if process.returncode == 0:
+            if returncode == 0:
                 return {
                     "status": "success",
                     "message": "Cartography completed successfully",
-                    "stdout": stdout.decode() if stdout else "",
-                    "stderr": stderr.decode() if stderr else ""
+                    "stdout": "\n".join(run_log.tail("stdout", RESULT_TAIL_LINES)),
+                    "stderr": "\n".join(run_log.tail("stderr", RESULT_TAIL_LINES)),
+                    "events": list(run_log.events)
                 }
             else:
                 # If Cartography failed, try to load sample data if use_sample_data is True
@@ -130,9 +137,10 @@ class CartographyService:
                 return {
                     "status": "error",
                     "message": "Cartography failed",
-                    "stdout": stdout.decode() if stdout else "",
-                    "stderr": stderr.decode() if stderr else "",
-                    "return_code": process.returncode
+                    "stdout": "\n".join(run_log.tail("stdout", RESULT_TAIL_LINES)),
+                    "stderr": "\n".join(run_log.tail("stderr", RESULT_TAIL_LINES)),
+                    "events": list(run_log.events),
+                    "return_code": returncode
                 }
                 
         except Exception as e:
@@ -148,6 +156,178 @@ class CartographyService:
                 "message": f"Error running Cartography: {str(e)}"
             }
     
+    async def run_cartography_partitioned(
+        self,
+        aws_access_key_id: str = "",
+        aws_secret_access_key: str = "",
+        aws_region: str = "us-east-1",
+        advanced_options: Dict[str, Any] = None,
+        max_parallel: int = 4,
+        make_run_log: Optional[Callable[[CartographyUnit], CartographyRunLog]] = None,
+        on_unit: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run Cartography as several processes, one per unit from plan_units.
+        
+        Units start as soon as their dependencies are done, at most
+        max_parallel at a time. All units share one update tag so each
+        module's cleanup only removes nodes no unit of this run touched.
+        
+        Args:
+            aws_access_key_id: AWS access key ID
+            aws_secret_access_key: AWS secret access key
+            aws_region: AWS region
+            advanced_options: Additional options for Cartography, see plan_units
+            max_parallel: Most units running at the same time
+            make_run_log: Builds the log of a unit; defaults to a plain CartographyRunLog
+            on_unit: Called with the timing of every unit when it finishes or is skipped
+            
+        Returns:
+            Dictionary with the result of the run and per-unit timings
+        """
+        try:
+            units = plan_units(advanced_options)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+        
+        env = self._build_env(aws_access_key_id, aws_secret_access_key, aws_region)
+        base_cmd = self._base_command() + ["--update-tag", str(int(time.time()))]
+        semaphore = asyncio.Semaphore(max(1, max_parallel))
+        finished = {unit.name: asyncio.Event() for unit in units}
+        timings: Dict[str, Dict[str, Any]] = {}
+        started = time.monotonic()
+        
+        async def run_unit(unit: CartographyUnit):
+            try:
+                for dependency in unit.depends_on:
+                    await finished[dependency].wait()
+                failed = [d for d in unit.depends_on if timings.get(d, {}).get("status") != "success"]
+                timing: Dict[str, Any] = {"unit": unit.name, "modules": unit.modules, "aws_syncs": unit.aws_syncs,
+                                          "ready_at": round(time.monotonic() - started, 3)}
+                if failed and unit.requires_success:
+                    timing.update(status="skipped", error=f"Dependencies failed: {', '.join(failed)}")
+                else:
+                    async with semaphore:
+                        unit_started = time.monotonic()
+                        timing["started_at"] = round(unit_started - started, 3)
+                        unit_env = dict(env)
+                        if unit.aws_profile:
+                            unit_env["AWS_PROFILE"] = unit.aws_profile
+                        run_log = make_run_log(unit) if make_run_log else CartographyRunLog()
+                        try:
+                            returncode = await self._run_process(base_cmd + unit.arguments(), unit_env, run_log)
+                        except Exception as e:
+                            logger.error(f"Error running Cartography unit {unit.name}: {str(e)}", exc_info=True)
+                            returncode, timing["error"] = -1, str(e)
+                    timing.update(
+                        status="success" if returncode == 0 else "error",
+                        return_code=returncode,
+                        queued_seconds=round(timing["started_at"] - timing["ready_at"], 3),
+                        run_seconds=round(time.monotonic() - unit_started, 3),
+                        stages={e["module"]: e["elapsed_seconds"] for e in run_log.events
+                                if e["type"] == "module_finished"},
+                        records=sum(e["records"] for e in run_log.events if e["type"] == "records")
+                    )
+                    if returncode != 0:
+                        timing["stderr"] = "\n".join(run_log.tail("stderr", 20))
+                timings[unit.name] = timing
+                if on_unit is not None:
+                    on_unit(timing)
+            finally:
+                finished[unit.name].set()
+        
+        await asyncio.gather(*(run_unit(unit) for unit in units))
+        
+        ordered = [timings[unit.name] for unit in units]
+        wall_seconds = time.monotonic() - started
+        process_seconds = sum(t.get("run_seconds", 0) for t in ordered)
+        failed = [t["unit"] for t in ordered if t["status"] != "success"]
+        return {
+            "status": "error" if failed else "success",
+            "message": f"Cartography units failed or skipped: {', '.join(failed)}" if failed
+                       else "Cartography completed successfully",
+            "wall_seconds": round(wall_seconds, 3),
+            "process_seconds": round(process_seconds, 3),
+            "parallel_speedup": round(process_seconds / wall_seconds, 2) if wall_seconds else None,
+            "units": ordered
+        }
+    
+    def _build_env(self, aws_access_key_id: str, aws_secret_access_key: str, aws_region: str) -> Dict[str, str]:
+        """Subprocess environment of one run: the server's, with this run's credentials in place of its own."""
+        env = os.environ.copy()
+        env.pop("OPENAI_API_KEY", None)
+        if aws_access_key_id:
+            for name in AWS_CREDENTIAL_VARS:
+                env.pop(name, None)
+            env["AWS_ACCESS_KEY_ID"] = aws_access_key_id
+            env["AWS_SECRET_ACCESS_KEY"] = aws_secret_access_key
+        env["AWS_DEFAULT_REGION"] = aws_region
+        env["NEO4J_URI"] = self.neo4j_uri
+        env["NEO4J_USER"] = self.neo4j_user
+        env["NEO4J_PASSWORD"] = self.neo4j_password
+        return env
+    
+    def _base_command(self) -> List[str]:
+        return [
+            "cartography",
+            "--neo4j-uri", self.neo4j_uri,
+            "--neo4j-user", self.neo4j_user,
+            "--neo4j-password-env-var", "NEO4J_PASSWORD"
+        ]
+    
+    async def _run_process(self, cmd: List[str], env: Dict[str, str], run_log: CartographyRunLog) -> int:
+        """Run one Cartography invocation, streaming its output into run_log, and return its exit code."""
+        started = time.monotonic()
+        returncode = await self._execute(cmd, env, run_log)
+        records = sum(e["records"] for e in run_log.events if e["type"] == "records")
+        record_ingest("cartography", records, time.monotonic() - started)
+        return returncode
+    
+    async def _execute(self, cmd: List[str], env: Dict[str, str], run_log: CartographyRunLog) -> int:
+        if self.worker_pool is not None:
+            try:
+                return await self.worker_pool.run(cmd[1:], env, run_log.add_line)
+            except CartographyWorkerUnavailable as e:
+                logger.warning(f"{str(e)}, running the cartography CLI instead")
+        
+        # Run Cartography as a subprocess
+        # This runs asynchronously to not block the event loop
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LINE_LIMIT
+        )
+        
+        # Stream output until the process exits
+        try:
+            await asyncio.gather(
+                self._pump_stream(process.stdout, "stdout", run_log),
+                self._pump_stream(process.stderr, "stderr", run_log)
+            )
+            await process.wait()
+        except asyncio.CancelledError:
+            # Don't leave an orphaned sync writing to the graph
+            logger.warning("Cartography run cancelled, terminating subprocess")
+            process.kill()
+            await process.wait()
+            raise
+        return process.returncode
+    
+    async def _pump_stream(self, stream: asyncio.StreamReader, name: str, run_log: CartographyRunLog):
+        """Feed a subprocess pipe into the run log one line at a time."""
+        while True:
+            try:
+                line = await stream.readline()
+            except ValueError:
+                # The reader drops a line longer than its limit
+                run_log.add_line(name, "[line truncated]")
+                continue
+            if not line:
+                break
+            run_log.add_line(name, line.decode(errors="replace"))
+    
     async def run_sample_data_load(self) -> Dict[str, Any]:
         """
         Load sample data into Neo4j if Cartography's mock mode fails.
@@ -323,4 +503,37 @@ class CartographyService:
             return {
                 "status": "error",
                 "message": f"Error loading sample data: {str(e)}"
+            }
+    
+    def load_synthetic_data(self, options, bulk_loader, mode: str = "auto", replace: bool = True) -> Dict[str, Any]:
+        """
+        Load a generated estate for scale testing.
+        Blocking; run it in a worker thread.
+        
+        Args:
+            options: SyntheticEstateOptions controlling size and shape
+            bulk_loader: BulkLoader writing to this service's Neo4j
+            mode: BulkLoader mode
+            replace: Delete the existing graph first; otherwise the estate is merged in
+            
+        Returns:
+            Dictionary with the result of the load
+        """
+        from app.services.synthetic_generator import SyntheticEstateGenerator
+        
+        try:
+            batch = SyntheticEstateGenerator(options).generate()
+            if replace:
+                bulk_loader.neo4j_service.execute_query("MATCH (n) DETACH DELETE n")
+            details = bulk_loader.load(batch, mode=mode)
+            return {
+                "status": "success",
+                "message": f"Synthetic estate loaded: {batch.node_count} nodes, {batch.relationship_count} relationships",
+                "details": details
+            }
+        except Exception as e:
+            logger.error(f"Error loading synthetic data: {str(e)}", exc_info=True)
+            return {
+                "status": "error",
+                "message": f"Error loading synthetic data: {str(e)}"
             }
\ No newline at end of file
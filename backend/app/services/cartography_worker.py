@@ -0,0 +1,301 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Directory containing the app package, the working directory of worker processes
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Longest protocol message read in one piece
+MESSAGE_LIMIT = 1024 * 1024
+
+class CartographyWorkerUnavailable(Exception):
+    """Raised when the pool can't run a job, e.g. Cartography isn't importable."""
+
+class _Worker:
+    def __init__(self, process: asyncio.subprocess.Process, import_seconds: float):
+        self.process = process
+        self.import_seconds = import_seconds
+        self.jobs = 0
+        self._on_line: Optional[Callable[[str, str], None]] = None
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+
+    @classmethod
+    async def spawn(cls, python: str, start_timeout: float) -> "_Worker":
+        process = await asyncio.create_subprocess_exec(
+            python, "-m", "app.services.cartography_worker",
+            cwd=BACKEND_DIR,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=MESSAGE_LIMIT
+        )
+        try:
+            line = await asyncio.wait_for(process.stdout.readline(), start_timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise CartographyWorkerUnavailable("Cartography worker did not start in time")
+        message = json.loads(line) if line else {"type": "unavailable", "error": "worker exited during startup"}
+        if message["type"] != "ready":
+            process.kill()
+            await process.wait()
+            raise CartographyWorkerUnavailable(f"Cartography worker unavailable: {message.get('error')}")
+        return cls(process, message["import_seconds"])
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def run(self, argv: List[str], env: Dict[str, str], on_line: Callable[[str, str], None]) -> int:
+        """Send one job and stream its output lines until it reports an exit code."""
+        self.jobs += 1
+        self._on_line = on_line
+        try:
+            self.process.stdin.write((json.dumps({"argv": argv, "env": env}) + "\n").encode())
+            await self.process.stdin.drain()
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    raise RuntimeError(f"Cartography worker exited with code {await self.process.wait()}")
+                message = json.loads(line)
+                if message["type"] == "line":
+                    on_line(message["stream"], message["line"])
+                elif message["type"] == "done":
+                    return message["code"]
+        finally:
+            self._on_line = None
+
+    async def close(self, kill: bool = False):
+        if self.alive:
+            if kill:
+                self.process.kill()
+            else:
+                self.process.stdin.close()
+            await self.process.wait()
+        await self._stderr_task
+
+    async def _drain_stderr(self):
+        # Output written straight to the file descriptors (C extensions, crashes)
+        # bypasses the protocol; attribute it to the running job if there is one
+        while True:
+            line = await self.process.stderr.readline()
+            if not line:
+                break
+            text = line.decode(errors="replace").rstrip("\r\n")
+            if self._on_line is not None:
+                self._on_line("stderr", text)
+            else:
+                logger.debug(f"cartography worker {self.process.pid}: {text}")
+
+class CartographyWorkerPool:
+    def __init__(
+        self,
+        size: int,
+        max_jobs_per_worker: int = 50,
+        python: str = sys.executable,
+        start_timeout: float = 120
+    ):
+        """
+        Pool of warm Cartography worker processes.
+
+        Each worker imports Cartography once and then runs sync jobs sent
+        over its stdin/stdout pipes, reusing its Neo4j drivers between jobs.
+        Workers still run one job at a time in their own process, so a job
+        that crashes or is cancelled only costs a replacement worker.
+
+        Args:
+            size: Number of worker processes
+            max_jobs_per_worker: Jobs after which a worker is replaced, bounding leaked memory
+            python: Interpreter used for the workers
+            start_timeout: Seconds a worker may take to import Cartography
+        """
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.python = python
+        self.start_timeout = start_timeout
+        self.available: Optional[bool] = None
+        self.import_seconds: List[float] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[_Worker] = []
+        self._replacing = 0
+        self._start_lock = asyncio.Lock()
+
+    async def start(self) -> bool:
+        """
+        Start the workers if they aren't running yet.
+
+        Returns:
+            Whether the pool can run jobs
+        """
+        async with self._start_lock:
+            if self.available is not None:
+                return self.available
+            self._idle = asyncio.Queue()
+            results = await asyncio.gather(
+                *(_Worker.spawn(self.python, self.start_timeout) for _ in range(self.size)),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.warning(f"Cartography worker failed to start: {str(result)}")
+                else:
+                    self._add(result)
+            self.available = bool(self._workers)
+            logger.info(f"Started {len(self._workers)} warm Cartography workers")
+            return self.available
+
+    async def run(self, argv: List[str], env: Dict[str, str], on_line: Callable[[str, str], None]) -> int:
+        """
+        Run one Cartography invocation on a warm worker.
+
+        Args:
+            argv: Cartography command line arguments, without the program name
+            env: Environment the job runs with
+            on_line: Called with (stream, line) for every output line
+
+        Returns:
+            The Cartography exit code
+        """
+        if not await self.start() or not (self._workers or self._replacing):
+            raise CartographyWorkerUnavailable("No warm Cartography workers are running")
+        worker = await self._idle.get()
+        if worker is None:
+            # Every worker is gone; wake the next waiter too
+            self._idle.put_nowait(None)
+            raise CartographyWorkerUnavailable("No warm Cartography workers are running")
+        try:
+            code = await worker.run(argv, env, on_line)
+        except BaseException:
+            # The worker may be mid-sync (cancelled) or gone; never hand it out again
+            self._discard(worker)
+            raise
+        if worker.jobs >= self.max_jobs_per_worker:
+            self._discard(worker)
+        else:
+            self._idle.put_nowait(worker)
+        return code
+
+    @property
+    def busy(self) -> int:
+        """Workers currently running a job."""
+        if self._idle is None:
+            return 0
+        return max(0, len(self._workers) - self._idle.qsize())
+
+    async def close(self):
+        workers, self._workers = self._workers, []
+        await asyncio.gather(*(worker.close() for worker in workers), return_exceptions=True)
+        self.available = None
+
+    def _add(self, worker: _Worker):
+        self._workers.append(worker)
+        self.import_seconds.append(worker.import_seconds)
+        self._idle.put_nowait(worker)
+
+    def _discard(self, worker: _Worker):
+        self._workers.remove(worker)
+        self._replacing += 1
+        asyncio.create_task(self._replace(worker))
+
+    async def _replace(self, worker: _Worker):
+        try:
+            await worker.close(kill=True)
+            self._add(await _Worker.spawn(self.python, self.start_timeout))
+        except Exception as e:
+            logger.error(f"Could not replace Cartography worker: {str(e)}")
+        finally:
+            self._replacing -= 1
+        if not self._workers and not self._replacing:
+            self.available = False
+            self._idle.put_nowait(None)
+
+class _ProtocolStream:
+    """File-like object turning writes into line messages on the protocol pipe."""
+
+    def __init__(self, send: Callable[[Dict[str, Any]], None], name: str):
+        self.send = send
+        self.name = name
+        self._buffer = ""
+
+    def write(self, text: str) -> int:
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self.send({"type": "line", "stream": self.name, "line": line})
+        return len(text)
+
+    def flush(self):
+        if self._buffer:
+            self.send({"type": "line", "stream": self.name, "line": self._buffer})
+            self._buffer = ""
+
+    def isatty(self) -> bool:
+        return False
+
+def serve():
+    """Worker process main loop: import Cartography once, then run jobs read from stdin."""
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    # Anything else written to fd 1 must not corrupt the protocol
+    os.dup2(2, 1)
+
+    def send(message: Dict[str, Any]):
+        protocol.write(json.dumps(message) + "\n")
+
+    sys.stdout = _ProtocolStream(send, "stdout")
+    sys.stderr = _ProtocolStream(send, "stderr")
+
+    started = time.monotonic()
+    try:
+        import neo4j
+        import cartography.cli
+        import cartography.sync
+    except Exception as e:
+        send({"type": "unavailable", "error": str(e)})
+        return
+
+    # Same logging setup as the cartography CLI entry point
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    for name in ("botocore", "googleapiclient", "neo4j"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    # cartography.sync.run_with_config opens a new driver for every run; hand
+    # out one driver per connection setting instead so pools stay warm
+    drivers: Dict[Any, Any] = {}
+
+    class CachedGraphDatabase:
+        @staticmethod
+        def driver(uri, auth=None, **kwargs):
+            key = (uri, auth, tuple(sorted(kwargs.items())))
+            if key not in drivers:
+                drivers[key] = neo4j.GraphDatabase.driver(uri, auth=auth, **kwargs)
+            return drivers[key]
+
+    cartography.sync.GraphDatabase = CachedGraphDatabase
+    send({"type": "ready", "import_seconds": round(time.monotonic() - started, 3)})
+
+    for raw in sys.stdin:
+        job = json.loads(raw)
+        saved_env = dict(os.environ)
+        os.environ.clear()
+        os.environ.update(job["env"])
+        try:
+            code = cartography.cli.CLI(prog="cartography").main(job["argv"])
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except BaseException:
+            logging.getLogger("cartography").exception("Unhandled exception in Cartography worker")
+            code = 1
+        finally:
+            os.environ.clear()
+            os.environ.update(saved_env)
+            sys.stdout.flush()
+            sys.stderr.flush()
+        send({"type": "done", "code": code})
+
+if __name__ == "__main__":
+    serve()
\ No newline at end of file
@@ -0,0 +1,133 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+class CheckpointStore:
+    def __init__(self, path: str):
+        """
+        SQLite-backed progress store for collection runs.
+
+        Progress is tracked per (run, account, region, resource) unit. Each
+        collected page is persisted together with the page token needed to
+        fetch the next one, so an interrupted pagination resumes where it stopped.
+
+        Args:
+            path: SQLite database file, or ":memory:"
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS units (
+                run_id TEXT NOT NULL,
+                account_id TEXT NOT NULL,
+                region TEXT NOT NULL,
+                resource TEXT NOT NULL,
+                status TEXT NOT NULL,
+                page_token TEXT,
+                pages INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, account_id, region, resource)
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                run_id TEXT NOT NULL,
+                account_id TEXT NOT NULL,
+                region TEXT NOT NULL,
+                resource TEXT NOT NULL,
+                page_no INTEGER NOT NULL,
+                items TEXT NOT NULL,
+                PRIMARY KEY (run_id, account_id, region, resource, page_no)
+            );
+        """)
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+    def load_unit(self, run_id: str, account_id: str, region: str, resource: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the saved state of a unit.
+
+        Returns:
+            None if the unit was never started, otherwise a dict with
+            status ("in_progress" or "completed"), page_token and the items
+            collected so far
+        """
+        key = (run_id, account_id, region, resource)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, page_token FROM units "
+                "WHERE run_id = ? AND account_id = ? AND region = ? AND resource = ?",
+                key
+            ).fetchone()
+            if row is None:
+                return None
+            pages = self._conn.execute(
+                "SELECT items FROM pages "
+                "WHERE run_id = ? AND account_id = ? AND region = ? AND resource = ? ORDER BY page_no",
+                key
+            ).fetchall()
+
+        items: List[Any] = []
+        for (page,) in pages:
+            items.extend(json.loads(page))
+        return {"status": row[0], "page_token": row[1], "items": items}
+
+    def save_page(
+        self,
+        run_id: str,
+        account_id: str,
+        region: str,
+        resource: str,
+        items: List[Any],
+        next_token: Optional[str]
+    ):
+        """
+        Persist one collected page and the token for the next page.
+
+        A page without a next token completes the unit in the same transaction.
+        """
+        key = (run_id, account_id, region, resource)
+        status = "in_progress" if next_token else "completed"
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT pages FROM units WHERE run_id = ? AND account_id = ? AND region = ? AND resource = ?",
+                key
+            ).fetchone()
+            page_no = row[0] if row else 0
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, page_no, json.dumps(items, default=str))
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO units VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, status, next_token, page_no + 1, time.time())
+            )
+
+    def complete_unit(self, run_id: str, account_id: str, region: str, resource: str):
+        """Mark a unit without pages (e.g. a store step) as completed."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO units VALUES (?, ?, ?, ?, 'completed', NULL, 0, ?) "
+                "ON CONFLICT (run_id, account_id, region, resource) "
+                "DO UPDATE SET status = 'completed', page_token = NULL, updated_at = excluded.updated_at",
+                (run_id, account_id, region, resource, time.time())
+            )
+
+    def is_completed(self, run_id: str, account_id: str, region: str, resource: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM units WHERE run_id = ? AND account_id = ? AND region = ? AND resource = ?",
+                (run_id, account_id, region, resource)
+            ).fetchone()
+        return row is not None and row[0] == "completed"
+
+    def delete_run(self, run_id: str):
+        """Remove all saved state of a run."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM units WHERE run_id = ?", (run_id,))
\ No newline at end of file
@@ -0,0 +1,303 @@
+import hashlib
+import ipaddress
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+
+# Rows of the index, read from Neo4j after every ingest
+RULES_QUERY = """
+MATCH (sg:EC2SecurityGroup)-[:HAS_INBOUND_RULE]->(rule:EC2SecurityGroupRule)
+RETURN sg.id AS group_id, rule.id AS rule_id, rule.protocol AS protocol,
+       rule.fromport AS fromport, rule.toport AS toport, rule.cidr_block AS cidr_block
+"""
+MEMBERSHIPS_QUERY = """
+MATCH (i:EC2Instance)-[:MEMBER_OF_EC2_SECURITY_GROUP]->(sg:EC2SecurityGroup)
+RETURN i.id AS instance_id, sg.id AS group_id
+"""
+
+ALL_PROTOCOLS = -1
+PROTOCOL_NUMBERS = {"-1": ALL_PROTOCOLS, "all": ALL_PROTOCOLS, "icmp": 1, "tcp": 6, "udp": 17, "icmpv6": 58}
+PROTOCOL_NAMES = {number: name for name, number in PROTOCOL_NUMBERS.items() if name != "-1"}
+MAX_PORT = 65535
+
+# Addresses that can't be reached from the internet; a rule is internet-facing
+# when its CIDR reaches outside all of them
+NON_GLOBAL_NETWORKS = [ipaddress.ip_network(network) for network in (
+    "0.0.0.0/8", "10.0.0.0/8", "100.64.0.0/10", "127.0.0.0/8", "169.254.0.0/16", "172.16.0.0/12",
+    "192.168.0.0/16", "::1/128", "fc00::/7", "fe80::/10"
+)]
+
+class ParsedRule(NamedTuple):
+    version: int
+    prefixlen: int
+    start: int
+    end: int
+    protocol: int
+    fromport: int
+    toport: int
+    internet: bool
+    cidr: str
+
+def protocol_number(protocol: Any) -> Optional[int]:
+    """IANA number of a protocol name or number; ALL_PROTOCOLS for "-1"/"all"; None if unknown."""
+    if protocol is None:
+        return ALL_PROTOCOLS
+    name = str(protocol).strip().lower()
+    if name in PROTOCOL_NUMBERS:
+        return PROTOCOL_NUMBERS[name]
+    try:
+        return int(name)
+    except ValueError:
+        return None
+
+def protocol_name(number: int) -> str:
+    return PROTOCOL_NAMES.get(number, str(number))
+
+def parse_rule(protocol: Any, fromport: Any, toport: Any, cidr: Any) -> Optional[ParsedRule]:
+    """A rule as integer intervals; None when its CIDR, protocol or ports can't be parsed."""
+    number = protocol_number(protocol)
+    try:
+        network = ipaddress.ip_network(str(cidr).strip(), strict=False)
+    except ValueError:
+        return None
+    if number is None:
+        return None
+    try:
+        # All-protocol rules and AWS's -1 port sentinel cover every port
+        if number == ALL_PROTOCOLS or fromport is None or int(fromport) < 0:
+            low, high = 0, MAX_PORT
+        else:
+            low = int(fromport)
+            high = MAX_PORT if toport is None or int(toport) < 0 else int(toport)
+    except (ValueError, TypeError):
+        return None
+    internet = not any(
+        network.version == other.version and network.subnet_of(other) for other in NON_GLOBAL_NETWORKS
+    )
+    return ParsedRule(network.version, network.prefixlen, int(network.network_address),
+                      int(network.broadcast_address), number, low, high, internet, str(network))
+
+def merge_ranges(ranges: Iterable[Tuple[int, int]]) -> List[List[int]]:
+    merged: List[List[int]] = []
+    for low, high in sorted(ranges):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], high)
+        else:
+            merged.append([low, high])
+    return merged
+
+class CidrIndex:
+    def __init__(self, rows: Sequence[Tuple], memberships: Sequence[Tuple[str, str]],
+                 previous: Optional["CidrIndex"] = None):
+        """
+        Security group rules as sorted integer address intervals.
+
+        Rules are grouped by IP version and prefix length. CIDR blocks of one
+        length never partially overlap, so within a group both the start and
+        the end addresses are sorted, and the rules overlapping any address
+        range are one slice found with two binary searches. A lookup does that
+        for every prefix length present (at most 33 for IPv4), then filters the
+        candidates by protocol and port with array comparisons. IPv6 addresses
+        don't fit in int64, so their groups use object arrays of Python ints.
+
+        Args:
+            rows: (group id, rule id, protocol, fromport, toport, cidr_block) per rule
+            memberships: (instance id, group id) per security group membership
+            previous: Index of the previous ingest; rules whose definition didn't
+                change are taken from it instead of being parsed again
+        """
+        started = time.perf_counter()
+        cache: Dict[Tuple, Optional[ParsedRule]] = dict(previous._parsed) if previous is not None else {}
+        parsed_rules = 0
+        self._parsed: Dict[Tuple, Optional[ParsedRule]] = {}
+        self.group_ids: List[str] = []
+        self.rule_ids: List[str] = []
+        self.rules: List[ParsedRule] = []
+        self.invalid_rules: List[str] = []
+        for group_id, rule_id, protocol, fromport, toport, cidr in rows:
+            definition = (protocol, fromport, toport, cidr)
+            if definition in cache:
+                rule = cache[definition]
+            else:
+                rule = cache[definition] = parse_rule(protocol, fromport, toport, cidr)
+                parsed_rules += 1
+            self._parsed[definition] = rule
+            if rule is None:
+                self.invalid_rules.append(rule_id)
+                continue
+            self.group_ids.append(group_id)
+            self.rule_ids.append(rule_id)
+            self.rules.append(rule)
+
+        self.protocols = np.array([r.protocol for r in self.rules], dtype=np.int16)
+        self.fromports = np.array([r.fromport for r in self.rules], dtype=np.int32)
+        self.toports = np.array([r.toport for r in self.rules], dtype=np.int32)
+        self.internet = np.array([r.internet for r in self.rules], dtype=bool)
+
+        # (version, prefixlen) -> sorted starts, ends and rule positions
+        self._intervals: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        positions_by_group: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for position, rule in enumerate(self.rules):
+            positions_by_group[(rule.version, rule.prefixlen)].append(position)
+        for key, positions in positions_by_group.items():
+            dtype = np.int64 if key[0] == 4 else object
+            starts = np.array([self.rules[p].start for p in positions], dtype=dtype)
+            ends = np.array([self.rules[p].end for p in positions], dtype=dtype)
+            order = np.argsort(starts, kind="stable")
+            self._intervals[key] = (starts[order], ends[order], np.array(positions, dtype=np.int64)[order])
+
+        self.rules_by_group: Dict[str, List[int]] = defaultdict(list)
+        for position, group_id in enumerate(self.group_ids):
+            self.rules_by_group[group_id].append(position)
+        self.groups_by_instance: Dict[str, List[str]] = defaultdict(list)
+        self.instances_by_group: Dict[str, List[str]] = defaultdict(list)
+        for instance_id, group_id in memberships:
+            self.groups_by_instance[instance_id].append(group_id)
+            self.instances_by_group[group_id].append(instance_id)
+
+        self.fingerprint = self.fingerprint_of(rows, memberships)
+        self.build_seconds = round(time.perf_counter() - started, 4)
+        self.parsed_rules = parsed_rules
+        self.built_at = time.time()
+
+    @staticmethod
+    def fingerprint_of(rows: Sequence[Tuple], memberships: Sequence[Tuple[str, str]]) -> str:
+        digest = hashlib.sha256()
+        for row in sorted(map(repr, rows)):
+            digest.update(row.encode())
+        digest.update(b"|")
+        for membership in sorted(map(repr, memberships)):
+            digest.update(membership.encode())
+        return digest.hexdigest()[:32]
+
+    def match(self, target: str, port: Optional[int] = None, protocol: Optional[str] = "tcp") -> np.ndarray:
+        """
+        Positions of the rules allowing traffic from target.
+
+        Args:
+            target: Source address or CIDR; a CIDR matches rules overlapping any part of it
+            port: Destination port; None matches any port
+            protocol: Protocol name or number; None or "all" matches any protocol
+
+        Raises:
+            ValueError: When target or protocol can't be parsed
+        """
+        network = ipaddress.ip_network(target.strip(), strict=False)
+        low, high = int(network.network_address), int(network.broadcast_address)
+        candidates = []
+        for (version, _), (starts, ends, positions) in self._intervals.items():
+            if version != network.version:
+                continue
+            # Blocks of one length are disjoint, so ends are sorted like starts
+            first = np.searchsorted(ends, low, side="left")
+            last = np.searchsorted(starts, high, side="right")
+            if first < last:
+                candidates.append(positions[first:last])
+        if not candidates:
+            return np.zeros(0, dtype=np.int64)
+        matched = np.concatenate(candidates)
+        keep = np.ones(len(matched), dtype=bool)
+        number = protocol_number(protocol)
+        if number is None:
+            raise ValueError(f"Unknown protocol: {protocol}")
+        if number != ALL_PROTOCOLS:
+            rule_protocols = self.protocols[matched]
+            keep &= (rule_protocols == number) | (rule_protocols == ALL_PROTOCOLS)
+        if port is not None:
+            keep &= (self.fromports[matched] <= port) & (self.toports[matched] >= port)
+        return np.sort(matched[keep])
+
+    def describe(self, position: int) -> Dict[str, Any]:
+        rule = self.rules[position]
+        return {
+            "rule_id": self.rule_ids[position],
+            "group_id": self.group_ids[position],
+            "protocol": protocol_name(rule.protocol),
+            "fromport": rule.fromport,
+            "toport": rule.toport,
+            "cidr_block": rule.cidr,
+            "prefixlen": rule.prefixlen,
+            "internet": rule.internet
+        }
+
+    def allowed(self, target: str, port: Optional[int] = None, protocol: Optional[str] = "tcp",
+                limit: int = 1000) -> Dict[str, Any]:
+        """The rules, security groups and instances allowing traffic from target to port."""
+        started = time.perf_counter()
+        matched = self.match(target, port, protocol)
+        groups = sorted({self.group_ids[p] for p in matched})
+        instances = sorted({i for group_id in groups for i in self.instances_by_group.get(group_id, ())})
+        return {
+            "target": target,
+            "port": port,
+            "protocol": protocol or "all",
+            "total_rules": int(len(matched)),
+            "truncated": len(matched) > limit or len(instances) > limit,
+            "rules": [self.describe(p) for p in matched[:limit]],
+            "security_groups": groups,
+            "instances": instances[:limit],
+            "seconds": round(time.perf_counter() - started, 6)
+        }
+
+    def exposure(self, instance_id: str) -> Dict[str, Any]:
+        """
+        Effective inbound exposure of an instance: the union of the rules of
+        all its security groups, with the port ranges open to the internet
+        merged per protocol.
+        """
+        groups = self.groups_by_instance.get(instance_id, [])
+        positions = sorted({p for group_id in groups for p in self.rules_by_group.get(group_id, ())})
+        internet_ports: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        widest = None
+        for p in positions:
+            rule = self.rules[p]
+            if rule.internet:
+                internet_ports[protocol_name(rule.protocol)].append((rule.fromport, rule.toport))
+                if widest is None or rule.prefixlen < widest.prefixlen:
+                    widest = rule
+        return {
+            "instance_id": instance_id,
+            "security_groups": groups,
+            "internet_exposed": bool(internet_ports),
+            "internet_ports": {name: merge_ranges(ranges) for name, ranges in sorted(internet_ports.items())},
+            "widest_internet_cidr": widest.cidr if widest is not None else None,
+            "rules": [self.describe(p) for p in positions]
+        }
+
+    def exposed_instances(self, port: Optional[int] = None, protocol: Optional[str] = None,
+                          limit: int = 1000) -> Dict[str, Any]:
+        """Instances reachable from the internet, optionally on one port and protocol."""
+        started = time.perf_counter()
+        keep = self.internet.copy()
+        number = protocol_number(protocol)
+        if number is None:
+            raise ValueError(f"Unknown protocol: {protocol}")
+        if number != ALL_PROTOCOLS:
+            keep &= (self.protocols == number) | (self.protocols == ALL_PROTOCOLS)
+        if port is not None:
+            keep &= (self.fromports <= port) & (self.toports >= port)
+        groups = {self.group_ids[p] for p in np.flatnonzero(keep)}
+        instances = sorted({i for group_id in groups for i in self.instances_by_group.get(group_id, ())})
+        return {
+            "port": port,
+            "protocol": protocol or "all",
+            "total": len(instances),
+            "truncated": len(instances) > limit,
+            "instances": instances[:limit],
+            "security_groups": sorted(groups),
+            "seconds": round(time.perf_counter() - started, 6)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rules": len(self.rules),
+            "invalid_rules": len(self.invalid_rules),
+            "security_groups": len(self.rules_by_group),
+            "instances": len(self.groups_by_instance),
+            "prefix_groups": len(self._intervals),
+            "parsed_rules": self.parsed_rules,
+            "build_seconds": self.build_seconds,
+            "built_at": self.built_at,
+            "fingerprint": self.fingerprint
+        }
\ No newline at end of file
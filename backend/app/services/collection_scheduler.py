@@ -0,0 +1,427 @@
+import asyncio
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from app.models.collection import CollectionTarget, TargetTiming, BatchCollectionResult
+from app.services.aws_collector import AwsCollectorService, RESOURCE_API_SERVICES, GLOBAL_RESOURCES
+from app.services.neo4j_service import Neo4jService
+from app.services.checkpoint_store import CheckpointStore
+from app.services.bulk_loader import BulkLoader, GraphBatch
+from app.services.snapshot_service import write_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Sustained requests per second and burst size per account and API service.
+# These sit below the documented AWS API throttling limits so that a full
+# fan-out stays inside the budget instead of relying on retries.
+DEFAULT_SERVICE_RATES = {
+    "ec2": (15.0, 50),
+    "s3": (40.0, 80),
+    "iam": (8.0, 15),
+}
+
+# Relative expected duration of each resource collection. Units are scheduled
+# longest first (LPT) so slow listings don't end up as the tail of the run.
+DEFAULT_RESOURCE_COSTS = {
+    "ec2_instances": 10.0,
+    "iam_roles": 8.0,
+    "security_groups": 5.0,
+    "s3_buckets": 4.0,
+    "vpcs": 1.0,
+}
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        """
+        Thread-safe token bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        Take tokens from the bucket, sleeping until enough are available.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+class CollectionScheduler:
+    def __init__(
+        self,
+        neo4j_service: Neo4jService,
+        targets: List[CollectionTarget],
+        aws_access_key_id: str = "",
+        aws_secret_access_key: str = "",
+        max_workers: int = 16,
+        service_rates: Optional[Dict[str, Tuple[float, int]]] = None,
+        resource_costs: Optional[Dict[str, float]] = None,
+        progress: Optional[Callable[[float, str], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        checkpoint: Optional[CheckpointStore] = None,
+        run_id: str = "",
+        bulk_loader: Optional[BulkLoader] = None,
+        load_mode: str = "transactional",
+        snapshot_path: str = ""
+    ):
+        """
+        Fan out AWS collection over many account/region targets.
+
+        Args:
+            neo4j_service: Neo4j service for storing collected data
+            targets: Account/role/region combinations to collect
+            aws_access_key_id: Base credentials, used directly or to assume target roles
+            aws_secret_access_key: Base credentials secret
+            max_workers: Size of the worker pool
+            service_rates: Overrides for DEFAULT_SERVICE_RATES
+            resource_costs: Overrides for DEFAULT_RESOURCE_COSTS
+            progress: Optional callback receiving (fraction complete, message)
+            cancel_event: Optional event that stops the run when set
+            checkpoint: Optional store used to skip completed units and resume paginations
+            run_id: Identifier of the run in the checkpoint store. Reusing the id
+                of an interrupted run resumes it
+            bulk_loader: Loader used when load_mode is not "transactional"
+            load_mode: "transactional" stores each target as soon as it is collected.
+                Any BulkLoader mode ("auto", "load_csv", "admin_import") loads all
+                targets in a single bulk load once collection is finished
+            snapshot_path: If set, everything collected is also written as an
+                inventory snapshot to this directory
+        """
+        self.neo4j_service = neo4j_service
+        # Duplicate account/region pairs would collect the same data twice
+        self.targets = list({self._key(t): t for t in targets}.values())
+        self.aws_access_key_id = aws_access_key_id
+        self.aws_secret_access_key = aws_secret_access_key
+        self.max_workers = max_workers
+        self.service_rates = {**DEFAULT_SERVICE_RATES, **(service_rates or {})}
+        self.resource_costs = {**DEFAULT_RESOURCE_COSTS, **(resource_costs or {})}
+        self.progress = progress
+        self.cancel_event = cancel_event
+        self.checkpoint = checkpoint
+        self.run_id = run_id
+        self.bulk_loader = bulk_loader
+        self.load_mode = load_mode
+        self.snapshot_path = snapshot_path
+
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+        self._credentials: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._credentials_lock = threading.Lock()
+
+    async def run_async(self) -> BatchCollectionResult:
+        """Run the collection in a worker thread so the event loop stays free."""
+        return await asyncio.to_thread(self.run)
+
+    def run(self) -> BatchCollectionResult:
+        """
+        Collect every target and store the results in Neo4j.
+
+        Returns:
+            BatchCollectionResult with a per-target timing breakdown
+        """
+        started = time.monotonic()
+        timings = {self._key(t): TargetTiming(account_id=t.account_id, region=t.region) for t in self.targets}
+
+        # Targets stored by an earlier attempt of this run are already in the graph
+        done_targets = set()
+        if self._checkpointing:
+            for target in self.targets:
+                if self.checkpoint.is_completed(self.run_id, target.account_id, target.region, "store"):
+                    key = self._key(target)
+                    done_targets.add(key)
+                    timings[key].status = "success"
+                    timings[key].resumed = True
+
+        units = self._plan_units(done_targets)
+        if units:
+            self._collector_for(units[0][0]).ensure_constraints()
+
+        collected: Dict[str, Dict[str, Any]] = {key: {} for key in timings}
+        remaining = {key: 0 for key in timings}
+        spans: Dict[str, List[float]] = {key: [] for key in timings}
+        for target, _ in units:
+            remaining[self._key(target)] += 1
+        # Every target has a store step after its collection units, unless
+        # all targets are loaded together in one bulk step
+        store_steps = 1 if self._bulk else len(timings) - len(done_targets)
+        total_steps = len(units) + store_steps
+        bulk_targets: List[CollectionTarget] = []
+        completed_steps = 0
+        cancelled = False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {}
+            for target, resource in units:
+                futures[pool.submit(self._collect_unit, target, resource)] = (target, resource)
+            pending = set(futures)
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                if self.cancel_event is not None and self.cancel_event.is_set() and not cancelled:
+                    # Drop queued units; units already running finish on their own
+                    cancelled = True
+                    for future in pending:
+                        future.cancel()
+
+                for future in done:
+                    target, resource = futures.pop(future)
+                    key = self._key(target)
+                    timing = timings[key]
+                    completed_steps += 1
+                    if self.progress is not None:
+                        self.progress(completed_steps / total_steps, f"{key}: {resource or 'store'} done")
+
+                    if future.cancelled():
+                        timing.status = "cancelled"
+                        continue
+
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.error(f"Collection unit {key}/{resource or 'store'} failed: {str(e)}")
+                        timing.status = "error"
+                        timing.error = str(e)
+                        continue
+
+                    if resource is None:
+                        # Store phase finished
+                        unit_start, unit_end = result
+                        timing.store_seconds = round(unit_end - unit_start, 4)
+                        spans[key].extend([unit_start, unit_end])
+                        timing.total_seconds = round(max(spans[key]) - min(spans[key]), 4)
+                        timing.status = "success"
+                        continue
+
+                    data, unit_start, unit_end, waited = result
+                    collected[key][resource] = data
+                    timing.resources[resource] = round(unit_end - unit_start, 4)
+                    timing.throttle_wait_seconds = round(timing.throttle_wait_seconds + waited, 4)
+                    spans[key].extend([unit_start, unit_end])
+
+                    remaining[key] -= 1
+                    if remaining[key] == 0 and timing.status == "pending" and not cancelled:
+                        if self._bulk:
+                            bulk_targets.append(target)
+                            continue
+                        store_future = pool.submit(self._store_target, target, collected[key])
+                        futures[store_future] = (target, None)
+                        pending.add(store_future)
+
+        bulk_details = {}
+        if bulk_targets and not cancelled:
+            bulk_details = self._bulk_load(bulk_targets, collected, timings)
+            bulk_finished = time.monotonic()
+            for target in bulk_targets:
+                key = self._key(target)
+                timings[key].total_seconds = round(bulk_finished - min(spans[key]), 4)
+            if self.progress is not None:
+                self.progress(1.0, f"bulk load ({bulk_details.get('mode', self.load_mode)}) done")
+
+        snapshot_details = {}
+        if self.snapshot_path and not cancelled:
+            # Targets that were fully collected in this attempt
+            snapshot_targets = [t for t in self.targets if self._key(t) not in done_targets
+                                and remaining[self._key(t)] == 0]
+            if snapshot_targets:
+                snapshot_started = time.monotonic()
+                manifest = write_snapshot(
+                    self._graph_batch(snapshot_targets, collected),
+                    self.snapshot_path,
+                    metadata={"source": "aws_collector", "targets": [self._key(t) for t in snapshot_targets]}
+                )
+                snapshot_details = {
+                    "path": self.snapshot_path,
+                    "nodes": manifest["nodes"],
+                    "relationships": manifest["relationships"],
+                    "seconds": round(time.monotonic() - snapshot_started, 4)
+                }
+
+        failed = [t for t in timings.values() if t.status != "success"]
+        if self._checkpointing and not failed and not cancelled:
+            # Nothing left to resume
+            self.checkpoint.delete_run(self.run_id)
+
+        if cancelled:
+            status = "cancelled"
+        elif not failed:
+            status = "success"
+        else:
+            status = "error" if len(failed) == len(timings) else "partial"
+        return BatchCollectionResult(
+            status=status,
+            run_id=self.run_id,
+            total_seconds=round(time.monotonic() - started, 4),
+            targets=list(timings.values()),
+            details={
+                "targets": len(timings),
+                "units": len(units),
+                "failed_targets": len(failed),
+                "max_workers": self.max_workers,
+                "load_mode": self.load_mode,
+                **({"bulk_load": bulk_details} if bulk_details else {}),
+                **({"snapshot": snapshot_details} if snapshot_details else {})
+            }
+        )
+
+    @property
+    def _bulk(self) -> bool:
+        return self.bulk_loader is not None and self.load_mode != "transactional"
+
+    @property
+    def _checkpointing(self) -> bool:
+        return self.checkpoint is not None and bool(self.run_id)
+
+    def _plan_units(self, done_targets=()) -> List[Tuple[CollectionTarget, str]]:
+        """
+        Expand targets into (target, resource) work units, longest expected first.
+
+        Account-wide resources are only assigned to the first target of each account.
+        Targets in done_targets get no units.
+        """
+        units = []
+        accounts_seen = set()
+        for target in self.targets:
+            for resource in RESOURCE_API_SERVICES:
+                if resource in GLOBAL_RESOURCES and target.account_id in accounts_seen:
+                    continue
+                if self._key(target) in done_targets:
+                    continue
+                units.append((target, resource))
+            accounts_seen.add(target.account_id)
+
+        # Stable sort keeps target order among equally expensive units
+        units.sort(key=lambda unit: self.resource_costs.get(unit[1], 1.0), reverse=True)
+        return units
+
+    def _collect_unit(self, target: CollectionTarget, resource: str):
+        waits = []
+        collector = self._collector_for(target, throttle=lambda service: waits.append(
+            self._bucket(target.account_id, service).acquire()
+        ))
+        unit_start = time.monotonic()
+        data = collector.collect_resource(resource)
+        return data, unit_start, time.monotonic(), sum(waits)
+
+    def _store_target(self, target: CollectionTarget, collected: Dict[str, Any]):
+        unit_start = time.monotonic()
+        self._collector_for(target).store_collected_data(collected)
+        unit_end = time.monotonic()
+        rows = sum(len(items) for data in collected.values() for items in data.values() if isinstance(items, list))
+        record_ingest("aws_collect", rows, unit_end - unit_start)
+        if self._checkpointing:
+            self.checkpoint.complete_unit(self.run_id, target.account_id, target.region, "store")
+        return unit_start, unit_end
+
+    def _bulk_load(
+        self,
+        targets: List[CollectionTarget],
+        collected: Dict[str, Dict[str, Any]],
+        timings: Dict[str, TargetTiming]
+    ) -> Dict[str, Any]:
+        """Normalize every collected target into one batch and bulk load it."""
+        batch = self._graph_batch(targets, collected)
+        try:
+            details = self.bulk_loader.load(batch, mode=self.load_mode)
+        except Exception as e:
+            logger.error(f"Bulk load failed: {str(e)}", exc_info=True)
+            for target in targets:
+                timings[self._key(target)].status = "error"
+                timings[self._key(target)].error = str(e)
+            return {"mode": self.load_mode, "error": str(e)}
+
+        for target in targets:
+            timing = timings[self._key(target)]
+            timing.status = "success"
+            timing.store_seconds = details["seconds"]
+            if self._checkpointing:
+                self.checkpoint.complete_unit(self.run_id, target.account_id, target.region, "store")
+        return details
+
+    def _graph_batch(self, targets: List[CollectionTarget], collected: Dict[str, Dict[str, Any]]) -> GraphBatch:
+        batch = None
+        for target in targets:
+            target_batch = self._collector_for(target).to_graph_batch(collected[self._key(target)])
+            if batch is None:
+                batch = target_batch
+            else:
+                batch.merge(target_batch)
+        return batch
+
+    def _collector_for(self, target: CollectionTarget, throttle=None) -> AwsCollectorService:
+        credentials = self._credentials_for(target)
+        return AwsCollectorService(
+            aws_access_key_id=credentials["aws_access_key_id"],
+            aws_secret_access_key=credentials["aws_secret_access_key"],
+            aws_session_token=credentials.get("aws_session_token"),
+            aws_region=target.region,
+            neo4j_service=self.neo4j_service,
+            throttle=throttle,
+            checkpoint=self.checkpoint,
+            run_id=self.run_id,
+            account_id=target.account_id
+        )
+
+    def _credentials_for(self, target: CollectionTarget) -> Dict[str, Any]:
+        """Resolve credentials for a target, assuming its role once per account."""
+        base = {
+            "aws_access_key_id": self.aws_access_key_id,
+            "aws_secret_access_key": self.aws_secret_access_key
+        }
+        if not target.role_arn:
+            return base
+
+        cache_key = (target.account_id, target.role_arn)
+        with self._credentials_lock:
+            if cache_key not in self._credentials:
+                import boto3
+                sts = boto3.client(
+                    "sts",
+                    aws_access_key_id=self.aws_access_key_id or None,
+                    aws_secret_access_key=self.aws_secret_access_key or None
+                )
+                params = {
+                    "RoleArn": target.role_arn,
+                    "RoleSessionName": f"cloud-cartography-{target.account_id}"
+                }
+                if target.external_id:
+                    params["ExternalId"] = target.external_id
+                credentials = sts.assume_role(**params)["Credentials"]
+                self._credentials[cache_key] = {
+                    "aws_access_key_id": credentials["AccessKeyId"],
+                    "aws_secret_access_key": credentials["SecretAccessKey"],
+                    "aws_session_token": credentials["SessionToken"]
+                }
+            return self._credentials[cache_key]
+
+    def _bucket(self, account_id: str, service: str) -> TokenBucket:
+        key = (account_id, service)
+        with self._buckets_lock:
+            if key not in self._buckets:
+                rate, capacity = self.service_rates.get(service, (5.0, 10))
+                self._buckets[key] = TokenBucket(rate, capacity)
+            return self._buckets[key]
+
+    @staticmethod
+    def _key(target: CollectionTarget) -> str:
+        return f"{target.account_id}/{target.region}"
\ No newline at end of file
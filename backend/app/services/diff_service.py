@@ -0,0 +1,355 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from app.services.job_service import Job, JobService
+from app.services.metrics import GRAPH_SNAPSHOT_SECONDS
+from app.services.neo4j_service import Neo4jService
+
+logger = logging.getLogger(__name__)
+
+# Resources are identified across ingests by labels and key (id, arn or name property), not by
+# Neo4j id, which changes when Cartography deletes and recreates a node. labels() has no defined
+# order, so the labels are sorted here rather than taking the first one
+NODES_QUERY = """
+MATCH (n)
+RETURN labels(n) AS labels,
+       coalesce(toString(n.id), toString(n.arn), toString(n.name), toString(id(n))) AS key,
+       properties(n) AS properties
+"""
+RELATIONSHIPS_QUERY = """
+MATCH (a)-[r]->(b)
+RETURN type(r) AS type,
+       labels(a) AS start_labels,
+       coalesce(toString(a.id), toString(a.arn), toString(a.name), toString(id(a))) AS start_key,
+       labels(b) AS end_labels,
+       coalesce(toString(b.id), toString(b.arn), toString(b.name), toString(id(b))) AS end_key,
+       properties(r) AS properties
+"""
+# Set by Cartography on every sync, so they'd mark every resource as modified
+IGNORED_PROPERTIES = {"lastupdated"}
+CHANGES = ("added", "removed", "modified")
+
+def content(properties: Dict[str, Any]) -> Tuple[str, bytes]:
+    """Canonical JSON of the properties that count as content, and its hash."""
+    text = json.dumps({name: value for name, value in properties.items() if name not in IGNORED_PROPERTIES},
+                      sort_keys=True, separators=(",", ":"), default=str)
+    return text, hashlib.blake2b(text.encode(), digest_size=8).digest()
+
+def node_label(labels: Iterable[str]) -> str:
+    return ":".join(sorted(labels))
+
+def property_delta(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {
+        name: {"old": old.get(name), "new": new.get(name)}
+        for name in sorted(old.keys() | new.keys()) if old.get(name) != new.get(name)
+    }
+
+class GraphDiffService:
+    def __init__(self, path: str, neo4j_service: Callable[[], Neo4jService], job_service: JobService,
+                 target_graph: str, max_snapshots: int = 100, debounce: float = 5.0):
+        """
+        Record what every ingest changed, for diffs between graph generations.
+
+        After each job on the graph every node and relationship is read and
+        its properties hashed. Only resources whose hash differs from the one
+        stored for the previous snapshot are written, as a change row with the
+        old and new properties, so a diff between two generations reads the
+        change rows between their snapshots and takes time proportional to
+        the number of changes, not the size of the graph.
+
+        The first snapshot is a baseline without changes. Snapshots beyond
+        max_snapshots are dropped, oldest first, and the oldest kept one
+        becomes the baseline. Jobs finishing within debounce seconds of each
+        other share one snapshot, taken once none finished for that long.
+
+        Args:
+            path: SQLite database file, or ":memory:"
+            neo4j_service: Returns the Neo4j service
+            job_service: Job runner whose finished jobs trigger snapshots
+            target_graph: Graph that is snapshotted
+            max_snapshots: Snapshots kept
+            debounce: Seconds without finished jobs before a snapshot is taken
+        """
+        self.path = path
+        self._neo4j_service = neo4j_service
+        self.job_service = job_service
+        self.target_graph = target_graph
+        self.max_snapshots = max_snapshots
+        self.debounce = debounce
+        self._lock = asyncio.Lock()
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                generation TEXT UNIQUE NOT NULL,
+                taken_at REAL NOT NULL,
+                nodes INTEGER NOT NULL,
+                relationships INTEGER NOT NULL,
+                changes INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS state (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                label TEXT NOT NULL,
+                start TEXT,
+                end TEXT,
+                hash BLOB NOT NULL,
+                properties TEXT NOT NULL,
+                PRIMARY KEY (kind, key)
+            );
+            CREATE TABLE IF NOT EXISTS changes (
+                snapshot INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                label TEXT NOT NULL,
+                start TEXT,
+                end TEXT,
+                old TEXT,
+                new TEXT,
+                PRIMARY KEY (snapshot, kind, key)
+            );
+        """)
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._last_trigger = 0.0
+        self._waiting = False
+        self._error = ""
+        job_service.add_listener(self.on_job_finished)
+
+    def generation(self) -> Optional[str]:
+        return self.job_service.graph_generation(self.target_graph)
+
+    def _collect(self) -> Tuple[Dict[str, int], List[Tuple], List[Tuple[str, str]]]:
+        """
+        Read the graph and compare it with the stored hashes.
+
+        Returns:
+            Tuple of (node and relationship counts, changed resources as
+            (kind, key, label, start, end, hash, properties), removed (kind, key))
+        """
+        with self._db_lock:
+            previous = {(kind, key): digest for kind, key, digest in self._conn.execute(
+                "SELECT kind, key, hash FROM state")}
+        counts = {"nodes": 0, "relationships": 0}
+        changed = []
+        seen = set()
+
+        def compare(kind: str, key: str, label: str, start: Optional[str], end: Optional[str],
+                    properties: Dict[str, Any]):
+            if (kind, key) in seen:
+                # Resources sharing a key keep the first one read
+                return
+            seen.add((kind, key))
+            text, digest = content(properties)
+            if previous.get((kind, key)) != digest:
+                changed.append((kind, key, label, start, end, digest, text))
+
+        with self._neo4j_service().driver.session() as session:
+            for labels, key, properties in session.run(NODES_QUERY):
+                counts["nodes"] += 1
+                label = node_label(labels)
+                compare("node", f"{label}:{key}", label, None, None, properties)
+            for rel_type, start_labels, start_key, end_labels, end_key, properties in session.run(RELATIONSHIPS_QUERY):
+                counts["relationships"] += 1
+                start = f"{node_label(start_labels)}:{start_key}"
+                end = f"{node_label(end_labels)}:{end_key}"
+                compare("relationship", f"{start}-[{rel_type}]->{end}", rel_type, start, end, properties)
+        removed = [item for item in previous if item not in seen]
+        return counts, changed, removed
+
+    def _record(self, generation: str, counts: Dict[str, int], changed: List[Tuple],
+                removed: List[Tuple[str, str]]) -> Dict[str, Any]:
+        with self._db_lock:
+            conn = self._conn
+            baseline = conn.execute("SELECT count(*) FROM snapshots").fetchone()[0] == 0
+            snapshot = conn.execute(
+                "INSERT INTO snapshots (generation, taken_at, nodes, relationships, changes) VALUES (?, ?, ?, ?, ?)",
+                (generation, time.time(), counts["nodes"], counts["relationships"],
+                 0 if baseline else len(changed) + len(removed))
+            ).lastrowid
+            if not baseline:
+                rows = []
+                for kind, key, label, start, end, _, text in changed:
+                    old = conn.execute("SELECT properties FROM state WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+                    rows.append((snapshot, kind, key, label, start, end, old[0] if old else None, text))
+                for kind, key in removed:
+                    label, start, end, old = conn.execute(
+                        "SELECT label, start, end, properties FROM state WHERE kind = ? AND key = ?", (kind, key)
+                    ).fetchone()
+                    rows.append((snapshot, kind, key, label, start, end, old, None))
+                conn.executemany("INSERT INTO changes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?, ?, ?, ?)", changed)
+            conn.executemany("DELETE FROM state WHERE kind = ? AND key = ?", removed)
+            # The oldest kept snapshot becomes the baseline; its own changes are never read again
+            oldest = snapshot - self.max_snapshots + 1
+            conn.execute("DELETE FROM snapshots WHERE id < ?", (oldest,))
+            conn.execute("DELETE FROM changes WHERE snapshot <= (SELECT min(id) FROM snapshots)")
+            conn.commit()
+        return self._snapshot_info(generation)
+
+    def _snapshot_info(self, generation: str) -> Optional[Dict[str, Any]]:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT id, generation, taken_at, nodes, relationships, changes, "
+                "id = (SELECT min(id) FROM snapshots) FROM snapshots WHERE generation = ?", (generation,)
+            ).fetchone()
+        return self._as_info(row) if row else None
+
+    @staticmethod
+    def _as_info(row: Tuple) -> Dict[str, Any]:
+        _, generation, taken_at, nodes, relationships, changes, baseline = row
+        return {"generation": generation, "taken_at": taken_at, "nodes": nodes, "relationships": relationships,
+                "changes": changes, "baseline": bool(baseline)}
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        """Recorded snapshots, newest first."""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT id, generation, taken_at, nodes, relationships, changes, "
+                "id = (SELECT min(id) FROM snapshots) FROM snapshots ORDER BY id DESC"
+            ).fetchall()
+        return [self._as_info(row) for row in rows]
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """
+        Record the current generation of the graph, unless it already is.
+
+        Returns:
+            Dictionary with status and the snapshot info, or an error message
+        """
+        async with self._lock:
+            generation = self.generation()
+            if generation is None:
+                return {"status": "error", "message": "A job is changing the graph; it is snapshotted when done"}
+            info = await asyncio.to_thread(self._snapshot_info, generation)
+            if info is not None:
+                return {"status": "success", "snapshot": info}
+            started = time.perf_counter()
+            try:
+                counts, changed, removed = await asyncio.to_thread(self._collect)
+                if self.generation() != generation:
+                    # The job that changed it snapshots again when it finishes
+                    return {"status": "error", "message": "The graph changed while it was read"}
+                info = await asyncio.to_thread(self._record, generation, counts, changed, removed)
+            except Exception as e:
+                logger.error(f"Snapshotting the graph failed: {str(e)}")
+                self._error = str(e)
+                return {"status": "error", "message": f"Snapshotting the graph failed: {str(e)}"}
+            seconds = time.perf_counter() - started
+            GRAPH_SNAPSHOT_SECONDS.observe(seconds)
+            self._error = ""
+            logger.info(f"Graph snapshot {generation}: {info['changes']} changes in {seconds:.2f}s")
+            return {"status": "success", "snapshot": info}
+
+    def on_job_finished(self, job: Job):
+        if job.info.target_graph != self.target_graph:
+            return
+        self._last_trigger = time.monotonic()
+        if not self._waiting:
+            self._waiting = True
+            self._snapshot_task = asyncio.get_running_loop().create_task(self._snapshot_when_quiet())
+
+    async def _snapshot_when_quiet(self):
+        # Jobs finishing in a burst share one read of the graph
+        try:
+            while True:
+                delay = self._last_trigger + self.debounce - time.monotonic()
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+        finally:
+            self._waiting = False
+        await self.snapshot()
+
+    def _snapshot_id(self, generation: str) -> Optional[Tuple[int, float]]:
+        return self._conn.execute("SELECT id, taken_at FROM snapshots WHERE generation = ?", (generation,)).fetchone()
+
+    def diff(self, from_generation: Optional[str] = None, to_generation: Optional[str] = None,
+             labels: Iterable[str] = (), limit: int = 1000) -> Dict[str, Any]:
+        """
+        What changed between two snapshotted generations.
+
+        Args:
+            from_generation: Earlier generation; defaults to the snapshot before to_generation
+            to_generation: Later generation; defaults to the latest snapshot. Diffs run backwards
+                when it is older than from_generation
+            labels: Node labels and relationship types to report; empty reports all
+            limit: Nodes and relationships listed at most each; counts cover all
+
+        Returns:
+            Dictionary with the generations, counts, changed nodes and relationships, or an error message
+        """
+        started = time.perf_counter()
+        with self._db_lock:
+            if to_generation is None:
+                latest = self._conn.execute("SELECT generation FROM snapshots ORDER BY id DESC LIMIT 1").fetchone()
+                if latest is None:
+                    return {"status": "error", "message": "No snapshot was recorded yet"}
+                to_generation = latest[0]
+            to_snapshot = self._snapshot_id(to_generation)
+            if to_snapshot is None:
+                return {"status": "error", "message": f"No snapshot of generation {to_generation}"}
+            if from_generation is None:
+                row = self._conn.execute(
+                    "SELECT generation FROM snapshots WHERE id < ? ORDER BY id DESC LIMIT 1", (to_snapshot[0],)
+                ).fetchone()
+                if row is None:
+                    return {"status": "error", "message": f"No snapshot before generation {to_generation}"}
+                from_generation = row[0]
+            from_snapshot = self._snapshot_id(from_generation)
+            if from_snapshot is None:
+                return {"status": "error", "message": f"No snapshot of generation {from_generation}"}
+            rows = self._conn.execute(
+                "SELECT kind, key, label, start, end, old, new FROM changes "
+                "WHERE snapshot > ? AND snapshot <= ? ORDER BY snapshot",
+                (min(from_snapshot[0], to_snapshot[0]), max(from_snapshot[0], to_snapshot[0]))
+            ).fetchall()
+        backwards = from_snapshot[0] > to_snapshot[0]
+
+        # Each resource's state before the first and after the last change in the range
+        first: Dict[Tuple[str, str], Tuple] = {}
+        last: Dict[Tuple[str, str], Optional[str]] = {}
+        for kind, key, label, start, end, old, new in rows:
+            first.setdefault((kind, key), (label, start, end, old))
+            last[(kind, key)] = new
+        wanted = set(labels)
+        counts = {f"{kind}_{change}": 0 for kind in ("nodes", "relationships") for change in CHANGES}
+        listed: Dict[str, List[Dict[str, Any]]] = {"node": [], "relationship": []}
+        truncated = False
+        for (kind, key), (label, start, end, old) in sorted(first.items(), key=lambda item: item[0]):
+            new = last[(kind, key)]
+            if backwards:
+                old, new = new, old
+            # Nodes match on any of their labels, relationships on their type
+            if old == new or (wanted and wanted.isdisjoint(label.split(":") if kind == "node" else (label,))):
+                continue
+            change = "added" if old is None else "removed" if new is None else "modified"
+            counts[f"{kind}s_{change}"] += 1
+            if len(listed[kind]) >= limit:
+                truncated = True
+                continue
+            item = {"key": key, "label": label, "change": change, "start": start, "end": end}
+            if change == "modified":
+                item["delta"] = property_delta(json.loads(old), json.loads(new))
+            else:
+                item["properties"] = json.loads(new if change == "added" else old)
+            listed[kind].append(item)
+        return {
+            "status": "success",
+            "from_generation": from_generation,
+            "to_generation": to_generation,
+            "from_taken_at": from_snapshot[1],
+            "to_taken_at": to_snapshot[1],
+            "counts": counts,
+            "nodes": listed["node"],
+            "relationships": listed["relationship"],
+            "truncated": truncated,
+            "seconds": round(time.perf_counter() - started, 6)
+        }
\ No newline at end of file
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from app.models.query import GraphData, NodeData, RelationshipData
+from app.services.job_service import Job, JobService
+from app.services.metrics import EXPAND_SECONDS, record_cache
+from app.services.neo4j_service import Neo4jService
+
+logger = logging.getLogger(__name__)
+
+# One fixed text per direction, so Neo4j plans each once and every click reuses the plan.
+# Nodes without relationships come back once with r and m null, which tells them from missing ids.
+EXPAND_QUERIES = {
+    direction: f"""
+    MATCH (n) WHERE id(n) IN $ids
+    CALL {{
+        WITH n
+        OPTIONAL MATCH {pattern}
+        WHERE $types = [] OR type(r) IN $types
+        RETURN r, m LIMIT $limit
+    }}
+    RETURN id(n) AS source, r, m
+    """
+    for direction, pattern in (("out", "(n)-[r]->(m)"), ("in", "(n)<-[r]-(m)"), ("both", "(n)-[r]-(m)"))
+}
+# Parameters the queries are planned with during warm-up
+EXPAND_PLAN_PARAMETERS = {"ids": [], "types": [], "limit": 1}
+
+Adjacency = Tuple[List[Tuple[RelationshipData, NodeData]], bool]
+
+class ExpansionService:
+    def __init__(self, neo4j_service: Callable[[], Neo4jService], job_service: JobService, target_graph: str,
+                 cache_size: int = 10000, max_degree: int = 1000):
+        """
+        Expand nodes of a result by one hop, for clicking through the graph.
+
+        The relationships and neighbors of a node are read once per graph
+        generation, for each direction and relationship type filter asked for,
+        and kept in an LRU cache, so expanding a node again or from another
+        client costs a dict lookup. The cache is emptied when a job changes the
+        graph; while one runs, expansions read Neo4j without caching.
+
+        Args:
+            neo4j_service: Returns the Neo4j service
+            job_service: Job runner whose finished jobs invalidate the cache
+            target_graph: Graph that is expanded
+            cache_size: Adjacency lists kept, one per node, direction and type filter
+            max_degree: Relationships read per node; the rest are reported as truncated
+        """
+        self._neo4j_service = neo4j_service
+        self.job_service = job_service
+        self.target_graph = target_graph
+        self.cache_size = cache_size
+        self.max_degree = max_degree
+        self._adjacency: "OrderedDict[Tuple[int, str, Tuple[str, ...]], Adjacency]" = OrderedDict()
+        self._generation: Optional[str] = None
+        job_service.add_listener(self.on_job_finished)
+
+    def generation(self) -> Optional[str]:
+        return self.job_service.graph_generation(self.target_graph)
+
+    def on_job_finished(self, job: Job):
+        if job.info.target_graph != self.target_graph:
+            return
+        self._adjacency.clear()
+
+    def _read(self, node_ids: List[int], direction: str, types: Tuple[str, ...]) -> Dict[int, Adjacency]:
+        """Adjacency lists of the nodes that exist among node_ids."""
+        adjacency: Dict[int, List[Tuple[RelationshipData, NodeData]]] = {}
+        parameters = {"ids": node_ids, "types": list(types), "limit": self.max_degree + 1}
+        with self._neo4j_service().driver.session() as session:
+            for source, rel, node in session.run(EXPAND_QUERIES[direction], parameters):
+                edges = adjacency.setdefault(source, [])
+                if rel is None:
+                    continue
+                edges.append((
+                    RelationshipData(id=str(rel.id), type=rel.type, start_node=str(rel.start_node.id),
+                                     end_node=str(rel.end_node.id), properties=dict(rel)),
+                    NodeData(id=str(node.id), labels=list(node.labels), properties=dict(node))
+                ))
+        return {
+            source: (edges[:self.max_degree], len(edges) > self.max_degree) for source, edges in adjacency.items()
+        }
+
+    async def expand(self, node_ids: List[int], direction: str = "both", relationship_types: List[str] = [],
+                     known_node_ids: Set[str] = set(), known_relationship_ids: Set[str] = set(),
+                     limit: int = 200) -> Dict[str, Any]:
+        """
+        Neighbors of nodes and the relationships to them that a client doesn't hold yet.
+
+        Args:
+            node_ids: Neo4j ids of the nodes to expand
+            direction: out, in or both
+            relationship_types: Relationship types to follow; empty follows all
+            known_node_ids: Ids of nodes the client holds, left out of the result
+            known_relationship_ids: Ids of relationships the client holds, left out of the result
+            limit: New nodes returned at most
+
+        Returns:
+            Dictionary with the new graph_data, the expanded and missing node ids,
+            whether anything was cut off, cache hits, seconds and the generation
+        """
+        started = time.perf_counter()
+        types = tuple(sorted(set(relationship_types)))
+        generation = self.generation()
+        if generation != self._generation:
+            self._adjacency.clear()
+            self._generation = generation
+        adjacency: Dict[int, Adjacency] = {}
+        for node_id in node_ids:
+            entry = self._adjacency.get((node_id, direction, types))
+            record_cache("adjacency", entry is not None)
+            if entry is not None:
+                self._adjacency.move_to_end((node_id, direction, types))
+                adjacency[node_id] = entry
+        hits = len(adjacency)
+        misses = [node_id for node_id in dict.fromkeys(node_ids) if node_id not in adjacency]
+        if misses:
+            read = await asyncio.to_thread(self._read, misses, direction, types)
+            adjacency.update(read)
+            # Nothing read while a job changes the graph, or read across a change, is cached
+            if generation is not None and self.generation() == generation:
+                for node_id, entry in read.items():
+                    self._adjacency[(node_id, direction, types)] = entry
+                while len(self._adjacency) > self.cache_size:
+                    self._adjacency.popitem(last=False)
+
+        expanded = {str(node_id) for node_id in adjacency}
+        seen_nodes = set(known_node_ids) | expanded
+        seen_relationships = set(known_relationship_ids)
+        nodes: List[NodeData] = []
+        relationships: List[RelationshipData] = []
+        truncated = False
+        for node_id in dict.fromkeys(node_ids):
+            if node_id not in adjacency:
+                continue
+            edges, cut = adjacency[node_id]
+            truncated = truncated or cut
+            for rel, neighbor in edges:
+                if rel.id in seen_relationships:
+                    continue
+                if neighbor.id not in seen_nodes:
+                    if len(nodes) >= limit:
+                        truncated = True
+                        continue
+                    seen_nodes.add(neighbor.id)
+                    nodes.append(neighbor)
+                seen_relationships.add(rel.id)
+                relationships.append(rel)
+        seconds = time.perf_counter() - started
+        EXPAND_SECONDS.observe(seconds)
+        return {
+            "graph_data": GraphData(nodes=nodes, relationships=relationships),
+            "expanded": [str(node_id) for node_id in dict.fromkeys(node_ids) if node_id in adjacency],
+            "missing": [str(node_id) for node_id in dict.fromkeys(node_ids) if node_id not in adjacency],
+            "truncated": truncated,
+            "cached": hits,
+            "seconds": round(seconds, 6),
+            "generation": generation or ""
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"cached": len(self._adjacency), "cache_size": self.cache_size, "generation": self._generation or ""}
\ No newline at end of file
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import json
+import time
+import logging
+from typing import Callable, Optional
+from app.services.neo4j_service import Neo4jService
+
+logger = logging.getLogger(__name__)
+
+# Writes made through this API are recorded on a node that follows Cartography's
+# ModuleSyncMetadata convention, next to the ones Cartography records per sync
+WRITE_MARKER_ID = "CloudCartography_api_writes"
+
+MARK_WRITE_QUERY = """
+MERGE (m:ModuleSyncMetadata {id: $id})
+SET m.syncedtype = 'graph', m.grouptype = 'CloudCartography', m.groupid = 'api',
+    m.lastupdated = timestamp() / 1000, m.write_id = randomUUID()
+"""
+
+# Counts come from the count store, so the cost doesn't grow with the graph
+GENERATION_QUERY = """
+CALL { MATCH (n) RETURN count(n) AS nodes }
+CALL { MATCH ()-[r]->() RETURN count(r) AS relationships }
+CALL {
+    OPTIONAL MATCH (m:ModuleSyncMetadata)
+    RETURN max(m.lastupdated) AS synced, collect(m.write_id) AS writes
+}
+RETURN nodes, relationships, synced, writes
+"""
+
+def mark_graph_written(neo4j_service: Neo4jService):
+    """Record a write on the graph so every API process sees a new generation."""
+    neo4j_service.execute_query(MARK_WRITE_QUERY, {"id": WRITE_MARKER_ID})
+
+class GraphGenerationWatcher:
+    def __init__(self, neo4j_service: Callable[[], Neo4jService], target_graph: str, interval: float = 2.0,
+                 timeout: float = 5.0):
+        """
+        Follow an identifier of a graph's contents that is read from the graph itself.
+
+        The identifier combines the node and relationship counts, the latest
+        Cartography sync and the write marker every write through this API
+        updates. It changes after jobs of any API process, Cartography runs
+        from the command line and anything that adds or deletes nodes or
+        relationships, e.g. in the Neo4j browser. Property-only edits made
+        outside the API and Cartography go unnoticed.
+
+        Args:
+            neo4j_service: Returns the Neo4j service to read from
+            target_graph: Identifier of the graph, as used by JobService
+            interval: Seconds between reads; a read older than interval + timeout isn't trusted
+            timeout: Seconds after which a read counts as failed
+        """
+        self._neo4j_service = neo4j_service
+        self.target_graph = target_graph
+        self.interval = interval
+        self.timeout = timeout
+        # Called with the target graph when a read finds a change this process didn't make
+        self.on_change: Optional[Callable[[str], None]] = None
+        self._generation: Optional[str] = None
+        self._read_at = 0.0
+        self._reads_started = 0
+        self._reads_applied = 0
+        self._error = ""
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def current(self) -> Optional[str]:
+        """The last generation read, or None when it is missing or too old to rely on."""
+        if self._generation is None or time.monotonic() - self._read_at > self.interval + self.timeout:
+            return None
+        return self._generation
+
+    async def refresh(self, mark_write: bool = False, notify: bool = True) -> Optional[str]:
+        """
+        Read the generation from the graph.
+
+        Args:
+            mark_write: Update the write marker first, for writes this process just finished
+            notify: Call on_change if the generation differs from the last one read
+
+        Returns:
+            The generation, or None if it could not be read
+        """
+        self._reads_started += 1
+        read = self._reads_started
+        try:
+            # A hung read keeps its thread, but the watcher moves on
+            generation = await asyncio.wait_for(asyncio.to_thread(self._read, mark_write), self.timeout)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            if not self._error:
+                logger.warning(f"Reading the graph generation of {self.target_graph} failed: {error}")
+            self._error = error
+            return None
+        if self._error:
+            logger.info(f"Reading the graph generation of {self.target_graph} works again")
+            self._error = ""
+        # An older read that finished late must not roll the generation back
+        if read < self._reads_applied:
+            return generation
+        self._reads_applied = read
+        previous = self._generation
+        self._generation = generation
+        self._read_at = time.monotonic()
+        if notify and previous is not None and generation != previous and self.on_change is not None:
+            self.on_change(self.target_graph)
+        return generation
+
+    def _read(self, mark_write: bool) -> str:
+        neo4j_service = self._neo4j_service()
+        if mark_write:
+            mark_graph_written(neo4j_service)
+        with neo4j_service.driver.session() as session:
+            record = session.run(GENERATION_QUERY).single()
+        state = [record["nodes"], record["relationships"], record["synced"], sorted(record["writes"])]
+        return hashlib.sha256(json.dumps(state, default=str).encode()).hexdigest()[:16]
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
\ No newline at end of file
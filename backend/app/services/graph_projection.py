@@ -0,0 +1,427 @@
+import json
+import os
+import shutil
+import time
+import uuid
+import logging
+from array import array
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PROJECTION_FORMAT = "cloud-cartography-projection"
+PROJECTION_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+ARRAY_NAMES = (
+    "node_ids", "label_bits", "key_offsets", "key_data", "key_order",
+    "out_indptr", "out_indices", "out_types", "in_indptr", "in_indices", "in_types"
+)
+DIRECTIONS = ("out", "in", "both")
+
+# Streamed from Neo4j; the key is what API callers use to name a node
+NODES_QUERY = """
+MATCH (n)
+RETURN id(n) AS id, labels(n) AS labels,
+       coalesce(toString(n.id), toString(n.arn), toString(n.name), toString(id(n))) AS key
+"""
+RELATIONSHIPS_QUERY = "MATCH (a)-[r]->(b) RETURN id(a) AS start, id(b) AS end, type(r) AS type"
+
+class GraphProjection:
+    def __init__(self, arrays: Dict[str, np.ndarray], labels: List[str], relationship_types: List[str],
+                 metadata: Optional[Dict[str, Any]] = None):
+        """
+        Read-only copy of the graph topology in compressed sparse row arrays.
+
+        Nodes are numbered 0..n-1 in order of their Neo4j id. Outgoing and
+        incoming edges are kept as two CSR structures (indptr, indices, types),
+        labels as a packed bit matrix, and node keys as one UTF-8 buffer with
+        offsets. Every array can be memory-mapped, so loading a saved
+        projection reads only the pages a query touches.
+
+        Use build or load rather than calling this directly.
+
+        Args:
+            arrays: The arrays named in ARRAY_NAMES
+            labels: Label of each bit column of label_bits
+            relationship_types: Relationship type of each type index
+            metadata: Stored with the projection (generation, build time, ...)
+        """
+        self.arrays = arrays
+        self.labels = labels
+        self.relationship_types = relationship_types
+        self.metadata = metadata or {}
+        self.node_ids = arrays["node_ids"]
+        self.node_count = len(self.node_ids)
+        self.relationship_count = len(arrays["out_indices"])
+        self._label_index = {label: i for i, label in enumerate(labels)}
+        self._type_index = {rel_type: i for i, rel_type in enumerate(relationship_types)}
+
+    @classmethod
+    def build(cls, nodes: Iterable[Tuple[int, Sequence[str], str]], relationships: Iterable[Tuple[int, int, str]],
+              metadata: Optional[Dict[str, Any]] = None) -> "GraphProjection":
+        """
+        Build a projection from streamed rows.
+
+        Args:
+            nodes: (neo4j id, labels, key) per node
+            relationships: (start neo4j id, end neo4j id, type) per relationship
+            metadata: Stored with the projection
+        """
+        ids = array("q")
+        keys: List[str] = []
+        label_index: Dict[str, int] = {}
+        label_nodes, label_columns = array("q"), array("q")
+        for node_id, node_labels, key in nodes:
+            for label in node_labels:
+                label_nodes.append(len(ids))
+                label_columns.append(label_index.setdefault(label, len(label_index)))
+            ids.append(node_id)
+            keys.append(key)
+
+        node_ids = np.frombuffer(ids, dtype=np.int64) if ids else np.zeros(0, dtype=np.int64)
+        order = np.argsort(node_ids, kind="stable")
+        node_ids = node_ids[order]
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        keys = [keys[i] for i in order]
+
+        # One bit per label, most significant bit first as np.unpackbits expects
+        label_bits = np.zeros((len(node_ids), max(1, (len(label_index) + 7) // 8)), dtype=np.uint8)
+        if label_nodes:
+            rows = position[np.frombuffer(label_nodes, dtype=np.int64)]
+            columns = np.frombuffer(label_columns, dtype=np.int64)
+            np.bitwise_or.at(label_bits, (rows, columns // 8), (0x80 >> (columns % 8)).astype(np.uint8))
+
+        encoded = [key.encode() for key in keys]
+        key_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(k) for k in encoded], out=key_offsets[1:])
+        key_data = np.frombuffer(b"".join(encoded), dtype=np.uint8) if encoded else np.zeros(0, dtype=np.uint8)
+        key_order = np.array(sorted(range(len(keys)), key=keys.__getitem__), dtype=np.int32)
+
+        starts, ends, types = array("q"), array("q"), array("q")
+        type_index: Dict[str, int] = {}
+        for start, end, rel_type in relationships:
+            starts.append(start)
+            ends.append(end)
+            types.append(type_index.setdefault(rel_type, len(type_index)))
+        src = cls._positions(node_ids, np.frombuffer(starts, dtype=np.int64) if starts else np.zeros(0, np.int64))
+        dst = cls._positions(node_ids, np.frombuffer(ends, dtype=np.int64) if ends else np.zeros(0, np.int64))
+        rel_types = np.frombuffer(types, dtype=np.int64).astype(np.uint16) if types else np.zeros(0, np.uint16)
+        # Relationships created after the node scan point at unknown nodes
+        known = (src >= 0) & (dst >= 0)
+        src, dst, rel_types = src[known], dst[known], rel_types[known]
+
+        arrays = {
+            "node_ids": node_ids,
+            "label_bits": label_bits,
+            "key_offsets": key_offsets,
+            "key_data": key_data,
+            "key_order": key_order
+        }
+        for prefix, frm, to in (("out", src, dst), ("in", dst, src)):
+            edge_order = np.argsort(frm, kind="stable")
+            indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(frm, minlength=len(node_ids)), out=indptr[1:])
+            arrays[f"{prefix}_indptr"] = indptr
+            arrays[f"{prefix}_indices"] = to[edge_order].astype(np.int32)
+            arrays[f"{prefix}_types"] = rel_types[edge_order]
+        labels = sorted(label_index, key=label_index.get)
+        relationship_types = sorted(type_index, key=type_index.get)
+        return cls(arrays, labels, relationship_types, metadata)
+
+    @classmethod
+    def from_neo4j(cls, neo4j_service, metadata: Optional[Dict[str, Any]] = None) -> "GraphProjection":
+        """Stream every node and relationship of the graph into a new projection."""
+        with neo4j_service.driver.session() as session:
+            # The node stream must be consumed before the next query runs on the session
+            nodes = [(record[0], record[1], record[2]) for record in session.run(NODES_QUERY)]
+            relationships = session.run(RELATIONSHIPS_QUERY)
+            return cls.build(nodes, ((record[0], record[1], record[2]) for record in relationships), metadata)
+
+    @staticmethod
+    def _positions(node_ids: np.ndarray, neo4j_ids: np.ndarray) -> np.ndarray:
+        """Node indices of Neo4j ids; -1 for ids not in the projection."""
+        if len(node_ids) == 0:
+            return np.full(len(neo4j_ids), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(node_ids, neo4j_ids), len(node_ids) - 1)
+        return np.where(node_ids[positions] == neo4j_ids, positions, -1).astype(np.int64)
+
+    def save(self, path: str):
+        """Write the projection as a directory of .npy files, replacing any previous one atomically."""
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        staging = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+        os.makedirs(staging)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(staging, f"{name}.npy"), self.arrays[name])
+        manifest = {
+            "format": PROJECTION_FORMAT,
+            "version": PROJECTION_VERSION,
+            "nodes": self.node_count,
+            "relationships": self.relationship_count,
+            "labels": self.labels,
+            "relationship_types": self.relationship_types,
+            "metadata": self.metadata
+        }
+        with open(os.path.join(staging, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+        previous = f"{path}.old-{uuid.uuid4().hex[:8]}"
+        if os.path.exists(path):
+            os.rename(path, previous)
+        os.rename(staging, path)
+        shutil.rmtree(previous, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str) -> "GraphProjection":
+        """Open a saved projection with every array memory-mapped read-only."""
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+        if manifest.get("format") != PROJECTION_FORMAT:
+            raise ValueError(f"{path} is not a graph projection")
+        if manifest.get("version") != PROJECTION_VERSION:
+            raise ValueError(f"Unsupported projection version: {manifest.get('version')}")
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAY_NAMES}
+        return cls(arrays, manifest["labels"], manifest["relationship_types"], manifest["metadata"])
+
+    # Lookups
+
+    def key(self, index: int) -> str:
+        offsets = self.arrays["key_offsets"]
+        return bytes(self.arrays["key_data"][offsets[index]:offsets[index + 1]]).decode()
+
+    def node_labels(self, index: int) -> List[str]:
+        bits = np.unpackbits(self.arrays["label_bits"][index])[:len(self.labels)]
+        return [self.labels[i] for i in np.flatnonzero(bits)]
+
+    def find(self, keys: Sequence[str] = (), node_ids: Sequence[int] = ()) -> Tuple[np.ndarray, List[str]]:
+        """
+        Node indices of keys and Neo4j ids.
+
+        Returns:
+            (indices, the keys and ids that were not found)
+        """
+        found, missing = [], []
+        key_order = self.arrays["key_order"]
+        for key in keys:
+            # Binary search over the sorted key order, decoding only the probed keys
+            low, high = 0, len(key_order)
+            while low < high:
+                middle = (low + high) // 2
+                if self.key(int(key_order[middle])) < key:
+                    low = middle + 1
+                else:
+                    high = middle
+            if low < len(key_order) and self.key(int(key_order[low])) == key:
+                found.append(int(key_order[low]))
+            else:
+                missing.append(key)
+        if node_ids:
+            positions = self._positions(self.node_ids, np.asarray(node_ids, dtype=np.int64))
+            found.extend(int(p) for p in positions if p >= 0)
+            missing.extend(str(i) for i, p in zip(node_ids, positions) if p < 0)
+        return np.unique(np.asarray(found, dtype=np.int64)), missing
+
+    def label_mask(self, labels: Sequence[str]) -> Optional[np.ndarray]:
+        """Boolean mask of nodes carrying any of labels; None when labels is empty (no filter)."""
+        if not labels:
+            return None
+        mask = np.zeros(self.node_count, dtype=bool)
+        bits = self.arrays["label_bits"]
+        for label in labels:
+            column = self._label_index.get(label)
+            if column is not None:
+                mask |= (bits[:, column // 8] & (0x80 >> (column % 8))) != 0
+        return mask
+
+    def type_mask(self, relationship_types: Sequence[str]) -> Optional[np.ndarray]:
+        if not relationship_types:
+            return None
+        mask = np.zeros(max(1, len(self.relationship_types)), dtype=bool)
+        for rel_type in relationship_types:
+            index = self._type_index.get(rel_type)
+            if index is not None:
+                mask[index] = True
+        return mask
+
+    # Traversal
+
+    def _adjacency(self, direction: str):
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+        prefixes = ("out", "in") if direction == "both" else (direction,)
+        return [(self.arrays[f"{p}_indptr"], self.arrays[f"{p}_indices"], self.arrays[f"{p}_types"]) for p in prefixes]
+
+    def expand(self, frontier: np.ndarray, direction: str = "out",
+               type_mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        All edges leaving a set of nodes, gathered without a Python loop over nodes.
+
+        Returns:
+            (neighbor index, frontier node it was reached from) per edge
+        """
+        neighbors, origins = [], []
+        for indptr, indices, types in self._adjacency(direction):
+            starts = indptr[frontier]
+            counts = indptr[frontier + 1] - starts
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            # Edge positions of all frontier nodes, concatenated
+            positions = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+            found = indices[positions]
+            origin = np.repeat(frontier, counts)
+            if type_mask is not None:
+                keep = type_mask[types[positions]]
+                found, origin = found[keep], origin[keep]
+            neighbors.append(found)
+            origins.append(origin)
+        if not neighbors:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(neighbors).astype(np.int64), np.concatenate(origins).astype(np.int64)
+
+    def traverse(self, sources: np.ndarray, max_depth: int, direction: str = "out",
+                 relationship_types: Sequence[str] = (), through_labels: Sequence[str] = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Breadth-first search from sources, one vectorized step per depth.
+
+        Args:
+            sources: Node indices to start from
+            max_depth: Hops to follow at most
+            direction: "out", "in" or "both"
+            relationship_types: Relationship types to follow; empty follows all
+            through_labels: Only nodes with one of these labels are expanded
+                further (others are reached but end the path); empty expands all
+
+        Returns:
+            (depth, parent) arrays over all nodes; -1 where not reached
+        """
+        depth = np.full(self.node_count, -1, dtype=np.int32)
+        parent = np.full(self.node_count, -1, dtype=np.int64)
+        type_mask = self.type_mask(relationship_types)
+        expand_mask = self.label_mask(through_labels)
+        frontier = np.unique(np.asarray(sources, dtype=np.int64))
+        depth[frontier] = 0
+        for level in range(1, max_depth + 1):
+            # Sources always expand; through_labels gates the nodes reached from them
+            if expand_mask is not None and level > 1:
+                frontier = frontier[expand_mask[frontier]]
+            if len(frontier) == 0:
+                break
+            neighbors, origins = self.expand(frontier, direction, type_mask)
+            new = depth[neighbors] == -1
+            neighbors, first = np.unique(neighbors[new], return_index=True)
+            if len(neighbors) == 0:
+                break
+            depth[neighbors] = level
+            parent[neighbors] = origins[new][first]
+            frontier = neighbors
+        return depth, parent
+
+    def path(self, parent: np.ndarray, index: int) -> List[int]:
+        """Node indices from the search source to index, following parents."""
+        nodes = [index]
+        while parent[nodes[-1]] >= 0:
+            nodes.append(int(parent[nodes[-1]]))
+        return nodes[::-1]
+
+    def edges_among(self, nodes: np.ndarray, relationship_types: Sequence[str] = ()) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(start, end, type index) of every relationship between the given nodes."""
+        member = np.zeros(self.node_count, dtype=bool)
+        member[nodes] = True
+        indptr, indices, types = self._adjacency("out")[0]
+        starts = indptr[nodes]
+        counts = indptr[nodes + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        positions = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        start = np.repeat(nodes, counts)
+        end = indices[positions].astype(np.int64)
+        rel_types = types[positions].astype(np.int64)
+        keep = member[end]
+        type_mask = self.type_mask(relationship_types)
+        if type_mask is not None:
+            keep &= type_mask[rel_types]
+        return start[keep], end[keep], rel_types[keep]
+
+    def describe(self, index: int, depth: Optional[int] = None) -> Dict[str, Any]:
+        node = {"id": int(self.node_ids[index]), "key": self.key(index), "labels": self.node_labels(index)}
+        if depth is not None:
+            node["depth"] = int(depth)
+        return node
+
+    def reachable(self, sources: np.ndarray, max_depth: int, direction: str = "out",
+                  relationship_types: Sequence[str] = (), through_labels: Sequence[str] = (),
+                  limit: int = 1000) -> Dict[str, Any]:
+        """Nodes reachable from sources within max_depth hops, nearest first."""
+        started = time.perf_counter()
+        depth, _ = self.traverse(sources, max_depth, direction, relationship_types, through_labels)
+        reached = np.flatnonzero(depth > 0)
+        reached = reached[np.argsort(depth[reached], kind="stable")]
+        return {
+            "total": int(len(reached)),
+            "truncated": len(reached) > limit,
+            "nodes": [self.describe(i, depth[i]) for i in reached[:limit]],
+            "seconds": round(time.perf_counter() - started, 6)
+        }
+
+    def neighborhood(self, sources: np.ndarray, hops: int, direction: str = "both",
+                     relationship_types: Sequence[str] = (), through_labels: Sequence[str] = (),
+                     limit: int = 1000) -> Dict[str, Any]:
+        """The k-hop neighborhood of sources with the relationships among its nodes."""
+        started = time.perf_counter()
+        depth, _ = self.traverse(sources, hops, direction, relationship_types, through_labels)
+        members = np.flatnonzero(depth >= 0)
+        members = members[np.argsort(depth[members], kind="stable")]
+        truncated = len(members) > limit
+        members = members[:limit]
+        start, end, rel_types = self.edges_among(members, relationship_types)
+        return {
+            "total": int(len(np.flatnonzero(depth >= 0))),
+            "truncated": truncated,
+            "nodes": [self.describe(i, depth[i]) for i in members],
+            "relationships": [
+                {"start": int(self.node_ids[s]), "end": int(self.node_ids[e]), "type": self.relationship_types[t]}
+                for s, e, t in zip(start, end, rel_types)
+            ],
+            "seconds": round(time.perf_counter() - started, 6)
+        }
+
+    def blast_radius(self, sources: np.ndarray, target_labels: Sequence[str], max_depth: int = 6,
+                     direction: str = "out", relationship_types: Sequence[str] = (),
+                     through_labels: Sequence[str] = (), limit: int = 100) -> Dict[str, Any]:
+        """
+        Endpoints with target_labels reachable from sources, with one shortest path each.
+
+        Returns:
+            Reached node count, endpoint counts per label, and the nearest endpoints
+        """
+        started = time.perf_counter()
+        depth, parent = self.traverse(sources, max_depth, direction, relationship_types, through_labels)
+        reached = depth > 0
+        target_mask = self.label_mask(target_labels)
+        endpoints = np.flatnonzero(reached & target_mask if target_mask is not None else reached)
+        endpoints = endpoints[np.argsort(depth[endpoints], kind="stable")]
+        counts: Dict[str, int] = {}
+        bits = self.arrays["label_bits"]
+        for label in (target_labels or self.labels):
+            column = self._label_index.get(label)
+            if column is not None:
+                count = int(((bits[endpoints, column // 8] & (0x80 >> (column % 8))) != 0).sum())
+                if count:
+                    counts[label] = count
+        nodes = []
+        for index in endpoints[:limit]:
+            node = self.describe(index, depth[index])
+            node["path"] = [self.key(i) for i in self.path(parent, int(index))]
+            nodes.append(node)
+        return {
+            "reached": int(reached.sum()),
+            "total": int(len(endpoints)),
+            "truncated": len(endpoints) > limit,
+            "counts": counts,
+            "endpoints": nodes,
+            "seconds": round(time.perf_counter() - started, 6)
+        }
\ No newline at end of file
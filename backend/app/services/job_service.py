@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict, deque
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple
+from app.models.job import JobInfo
+from app.services.graph_generation import GraphGenerationWatcher
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("pending", "running")
+
+class JobCancelled(Exception):
+    """Raised inside job code that notices a cancellation request."""
+
+class JobContext:
+    def __init__(self, job: "Job", max_events: int = 500, max_log_lines: int = 2000):
+        """
+        Handle given to a running job for reporting progress and observing cancellation.
+
+        Args:
+            job: The job being executed
+            max_events: Structured events kept for live consumers
+            max_log_lines: Output lines kept in the log ring buffer
+        """
+        self._job = job
+        self.cancel_event = threading.Event()
+        self.events = deque(maxlen=max_events)
+        self.logs = deque(maxlen=max_log_lines)
+        self._event_seq = 0
+
+    @property
+    def job_id(self) -> str:
+        return self._job.info.id
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def report_progress(self, progress: float, message: str = ""):
+        """
+        Update job progress. Safe to call from worker threads.
+
+        Args:
+            progress: Completion fraction between 0 and 1
+            message: Short human readable status
+        """
+        self._job.info.progress = max(0.0, min(1.0, progress))
+        if message:
+            self._job.info.message = message
+
+    def emit_event(self, event: Dict[str, Any]):
+        """Publish a structured progress event. Events get increasing sequence numbers."""
+        self._event_seq += 1
+        self.events.append({"seq": self._event_seq, **event})
+
+    def events_since(self, seq: int) -> List[Dict[str, Any]]:
+        return [event for event in list(self.events) if event["seq"] > seq]
+
+    def log(self, stream: str, line: str):
+        self.logs.append(f"[{stream}] {line}")
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested."""
+        if self.cancelled:
+            raise JobCancelled()
+
+    async def run_in_thread(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run blocking work in a thread.
+
+        If the job is cancelled while the thread is running, wait for the
+        thread to stop (it is expected to poll cancel_event) before propagating
+        the cancellation, so the graph is never written by two runs at once.
+        """
+        future = asyncio.ensure_future(asyncio.to_thread(func, *args, **kwargs))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.cancel_event.set()
+            try:
+                await future
+            except Exception:
+                pass
+            raise
+
+class Job:
+    def __init__(self, kind: str, target_graph: str, fingerprint: str, max_events: int = 500,
+                 max_log_lines: int = 2000):
+        self.info = JobInfo(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            target_graph=target_graph,
+            status="pending",
+            created_at=time.time()
+        )
+        self.fingerprint = fingerprint
+        self.context = JobContext(self, max_events=max_events, max_log_lines=max_log_lines)
+        self.result: Optional[Dict[str, Any]] = None
+        self.task: Optional[asyncio.Task] = None
+
+class JobService:
+    def __init__(self, max_concurrency: int = 2, history_limit: int = 100, max_events: int = 500,
+                 max_log_lines: int = 2000):
+        """
+        In-process background job runner.
+
+        Jobs run on the event loop with at most max_concurrency active at a time,
+        and at most one active job per target graph. Submitting a job identical
+        to one that is still pending or running returns the existing job.
+
+        Args:
+            max_concurrency: Maximum number of jobs running at once
+            history_limit: Number of finished jobs kept for status/result lookups
+            max_events: Progress events kept per job
+            max_log_lines: Log lines kept per job
+        """
+        self.max_concurrency = max_concurrency
+        self.history_limit = history_limit
+        self.max_events = max_events
+        self.max_log_lines = max_log_lines
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._graph_locks: Dict[str, asyncio.Lock] = {}
+        # Bumped whenever a job may have written to a graph; the boot id keeps
+        # generations from different processes apart. Only used for graphs
+        # without a watcher reading the generation from the graph itself
+        self._generations: Dict[str, int] = {}
+        self._boot_id = uuid.uuid4().hex[:12]
+        self._watchers: Dict[str, GraphGenerationWatcher] = {}
+        self._listeners: List[Callable[[Job], None]] = []
+
+    def submit(
+        self,
+        kind: str,
+        target_graph: str,
+        payload: Dict[str, Any],
+        func: Callable[[JobContext], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[Job, bool]:
+        """
+        Queue a job for execution. Must be called from the event loop.
+
+        Args:
+            kind: Job type, e.g. "aws_collect" or "cartography_run"
+            target_graph: Identifier of the graph the job writes to
+            payload: Job parameters, used to detect identical submissions
+            func: Coroutine function that performs the work
+
+        Returns:
+            Tuple of (job, deduplicated)
+        """
+        fingerprint = self._fingerprint(kind, target_graph, payload)
+        for job in self._jobs.values():
+            if job.fingerprint == fingerprint and job.info.status in ACTIVE_STATUSES:
+                return job, True
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        job = Job(kind, target_graph, fingerprint, self.max_events, self.max_log_lines)
+        self._jobs[job.info.id] = job
+        job.task = asyncio.create_task(self._run(job, func))
+        self._prune()
+        return job, False
+
+    def add_listener(self, listener: Callable[[Job], None]):
+        """
+        Call listener on the event loop after each job that ran against a graph finishes.
+
+        For a watched graph, listeners are also called when the graph changed
+        without a job of this service, with a finished job of kind
+        "external_change" that isn't listed.
+        """
+        self._listeners.append(listener)
+
+    def watch_generation(self, watcher: GraphGenerationWatcher):
+        """Take the generation of the watcher's graph from the graph instead of counting jobs."""
+        watcher.on_change = self._graph_changed
+        self._watchers[watcher.target_graph] = watcher
+
+    def tracks_graph(self, target_graph: str) -> bool:
+        """Whether generations of the graph are read from it, and so survive restarts."""
+        return target_graph in self._watchers
+
+    async def refresh_generation(self, target_graph: str) -> Optional[str]:
+        """Read the generation of a watched graph now instead of waiting for the watcher."""
+        watcher = self._watchers.get(target_graph)
+        if watcher is not None:
+            await watcher.refresh()
+        return self.graph_generation(target_graph)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[JobInfo]:
+        return [job.info for job in reversed(self._jobs.values())]
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Request cancellation of a pending or running job.
+
+        Returns:
+            The job, or None if it does not exist
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.info.status not in ACTIVE_STATUSES:
+            return job
+        job.context.cancel_event.set()
+        if job.task is not None:
+            job.task.cancel()
+        if job.info.started_at is None:
+            # A task cancelled before its first step never runs _run's handlers, so it would
+            # stay pending and keep absorbing identical submissions
+            job.info.status = "cancelled"
+            job.info.finished_at = time.time()
+        return job
+
+    async def _run(self, job: Job, func: Callable[[JobContext], Awaitable[Dict[str, Any]]]):
+        # Take the graph lock before a concurrency slot so jobs queued behind
+        # another run on the same graph don't hold slots other graphs could use
+        graph_lock = self._graph_locks.setdefault(job.info.target_graph, asyncio.Lock())
+        try:
+            async with graph_lock:
+                try:
+                    async with self._semaphore:
+                        job.context.check_cancelled()
+                        job.info.status = "running"
+                        job.info.started_at = time.time()
+                        job.result = await func(job.context)
+                        job.info.status = "succeeded"
+                        job.info.progress = 1.0
+                finally:
+                    # Still under the graph lock, so the old generation is never
+                    # reported for what the job wrote
+                    if job.info.started_at is not None:
+                        await self._job_wrote(job.info.target_graph)
+        except (asyncio.CancelledError, JobCancelled):
+            job.info.status = "cancelled"
+        except Exception as e:
+            logger.error(f"Job {job.info.id} ({job.info.kind}) failed: {str(e)}", exc_info=True)
+            job.info.status = "failed"
+            job.info.error = str(e)
+        finally:
+            job.info.finished_at = time.time()
+            if job.info.started_at is not None:
+                self._notify(job)
+
+    async def _job_wrote(self, target_graph: str):
+        self._generations[target_graph] = self._generations.get(target_graph, 0) + 1
+        watcher = self._watchers.get(target_graph)
+        if watcher is not None:
+            # Listeners are called for the job itself, not again for the change it made
+            await watcher.refresh(mark_write=True, notify=False)
+
+    def _graph_changed(self, target_graph: str):
+        lock = self._graph_locks.get(target_graph)
+        if lock is not None and lock.locked():
+            # The job holding the lock notifies when it finishes
+            return
+        job = Job("external_change", target_graph, "", self.max_events, self.max_log_lines)
+        job.info.status = "succeeded"
+        job.info.started_at = job.info.finished_at = time.time()
+        self._notify(job)
+
+    def _notify(self, job: Job):
+        for listener in self._listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                logger.error(f"Job listener failed for job {job.info.id}: {str(e)}", exc_info=True)
+
+    def running_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.info.status == "running")
+    
+    def graph_generation(self, target_graph: str) -> Optional[str]:
+        """
+        Identifier of the current contents of a graph.
+        
+        Changes every time a job that ran against the graph finishes. While a
+        job is queued or running on the graph its contents are in flux and
+        None is returned.
+        
+        For a graph with a GraphGenerationWatcher the generation is read from
+        the graph, so it also changes after writes by other API processes and
+        Cartography runs from the command line, and is the same in every
+        process. None is returned while the last read is too old to rely on,
+        e.g. when Neo4j is unreachable. Without a watcher only jobs run by
+        this service move the generation, and writes made any other way go
+        unnoticed until the next job or a restart.
+        """
+        lock = self._graph_locks.get(target_graph)
+        if lock is not None and lock.locked():
+            return None
+        watcher = self._watchers.get(target_graph)
+        if watcher is not None:
+            return watcher.current()
+        return f"{self._boot_id}-{self._generations.get(target_graph, 0)}"
+    
+    def _prune(self):
+        """Drop the oldest finished jobs beyond history_limit."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.info.status not in ACTIVE_STATUSES]
+        for job_id in finished[:max(0, len(finished) - self.history_limit)]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _fingerprint(kind: str, target_graph: str, payload: Dict[str, Any]) -> str:
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(f"{kind}|{target_graph}|{encoded}".encode()).hexdigest()
\ No newline at end of file
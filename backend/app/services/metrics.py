@@ -0,0 +1,231 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Callable, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond result processing to slow LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Result size buckets in nodes or relationships
+SIZE_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        """
+        Args:
+            collect: Called at scrape time for the current values by label values,
+                for gauges that read state owned elsewhere (pools, queues)
+        """
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self.collect = collect
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self) -> List[str]:
+        if self.collect is not None:
+            try:
+                items = list(self.collect().items())
+            except Exception:
+                items = []
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: non-cumulative bucket counts (last one is +Inf), sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        """Process-wide set of metrics rendered in the Prometheus text format."""
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              collect: Optional[Callable[[], Dict[LabelValues, float]]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+# Query path
+QUERY_STAGE_SECONDS = REGISTRY.histogram(
+    "cartography_query_stage_seconds", "Time spent in each stage of a natural language query", ["stage"])
+QUERY_REQUESTS = REGISTRY.counter(
+    "cartography_query_requests_total", "Natural language queries by outcome", ["outcome"])
+TRANSLATIONS = REGISTRY.counter(
+    "cartography_nlp_translations_total", "Cypher translations by path taken (cache, llm or fallback)", ["path"])
+RESULT_NODES = REGISTRY.histogram(
+    "cartography_query_result_nodes", "Nodes returned per query", buckets=SIZE_BUCKETS)
+RESULT_RELATIONSHIPS = REGISTRY.histogram(
+    "cartography_query_result_relationships", "Relationships returned per query", buckets=SIZE_BUCKETS)
+CACHE_REQUESTS = REGISTRY.counter(
+    "cartography_cache_requests_total", "Cache lookups by cache and result (hit or miss)", ["cache", "result"])
+
+VIEW_REFRESH_SECONDS = REGISTRY.histogram(
+    "cartography_view_refresh_seconds", "Time to recompute a materialized view", ["view"])
+
+PROJECTION_BUILD_SECONDS = REGISTRY.histogram(
+    "cartography_projection_build_seconds", "Time to build and save the in-memory graph projection")
+NETWORK_INDEX_BUILD_SECONDS = REGISTRY.histogram(
+    "cartography_network_index_build_seconds", "Time to read security group rules and rebuild their CIDR index")
+SEARCH_INDEX_BUILD_SECONDS = REGISTRY.histogram(
+    "cartography_search_index_build_seconds", "Time to read searchable properties and update the search index")
+EXPAND_SECONDS = REGISTRY.histogram(
+    "cartography_expand_seconds", "Time to expand nodes by one hop for graph exploration")
+GRAPH_SNAPSHOT_SECONDS = REGISTRY.histogram(
+    "cartography_graph_snapshot_seconds", "Time to hash the graph and record what changed since the last snapshot")
+GUARD_VERDICTS = REGISTRY.counter(
+    "cartography_query_guard_verdicts_total", "Generated queries checked before running, by verdict "
+    "(accepted, rewritten or rejected)", ["verdict"])
+WARMUP_SECONDS = REGISTRY.histogram(
+    "cartography_warmup_seconds", "Duration of cache and query plan warm-ups by reason (startup or ingest)", ["reason"])
+
+# HTTP
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "cartography_http_request_seconds", "HTTP request latency", ["method", "route", "status"])
+
+# Ingest
+INGEST_ROWS = REGISTRY.counter(
+    "cartography_ingest_rows_total", "Nodes and relationships written by ingest path", ["path"])
+INGEST_SECONDS = REGISTRY.histogram(
+    "cartography_ingest_seconds", "Duration of ingest loads by path", ["path"])
+INGEST_ROWS_PER_SECOND = REGISTRY.gauge(
+    "cartography_ingest_rows_per_second", "Throughput of the most recent load by ingest path", ["path"])
+
+def record_ingest(path: str, rows: int, seconds: float):
+    """Record one completed load of rows on an ingest path."""
+    INGEST_ROWS.inc(rows, path=path)
+    INGEST_SECONDS.observe(seconds, path=path)
+    if seconds > 0:
+        INGEST_ROWS_PER_SECOND.set(rows / seconds, path=path)
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
\ No newline at end of file
@@ -1,7 +1,8 @@
-from neo4j import GraphDatabase
 from app.models.query import GraphData, NodeData, RelationshipData
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import logging
+import time
+from app.services.metrics import QUERY_STAGE_SECONDS, RESULT_NODES, RESULT_RELATIONSHIPS
 
 logger = logging.getLogger(__name__)
 
@@ -15,43 +16,82 @@ class Neo4jService:
         self.uri = uri
         self.user = user
         
+        # The driver connects lazily; the readiness probe calls verify_connectivity
+        from neo4j import GraphDatabase
         logger.info(f"Connecting to Neo4j at {uri} with user {user}")
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
-        
-        # Test connection
-        try:
-            with self.driver.session() as session:
-                result = session.run("RETURN 1 as test")
-                result.single()
-            logger.info("Successfully connected to Neo4j")
-        except Exception as e:
-            logger.error(f"Failed to connect to Neo4j: {str(e)}")
-            raise
+    
+    def verify_connectivity(self):
+        """Run a trivial query, raising when Neo4j can't be reached."""
+        with self.driver.session() as session:
+            result = session.run("RETURN 1 as test")
+            result.single()
+
+    def explain(self, cypher_query: str, parameters: Dict[str, Any] = {}):
+        """
+        Plan a query without running it; the plan lands in Neo4j's query cache.
+
+        Returns:
+            The result summary, with the plan and the query type (r for read-only)
+        """
+        with self.driver.session() as session:
+            return session.run(f"EXPLAIN {cypher_query}", parameters).consume()
+
+    def touch_label(self, label: str, limit: int) -> int:
+        """Read up to limit nodes of a label with their relationships, pulling their pages into memory."""
+        with self.driver.session() as session:
+            record = session.run(
+                f"MATCH (n:`{label}`) WITH n LIMIT $limit "
+                "OPTIONAL MATCH (n)-[r]-() RETURN count(DISTINCT n) AS nodes, count(r) AS relationships",
+                {"limit": limit}
+            ).single()
+            return record["nodes"] + record["relationships"]
 
     def close(self):
         self.driver.close()
 
-    def execute_query(self, cypher_query: str, parameters: Dict[str, Any] = {}) -> GraphData:
+    def execute_query(self, cypher_query: str, parameters: Dict[str, Any] = {},
+                      record_metrics: bool = False) -> GraphData:
         """
         Execute a Cypher query and return the results in a standardized format.
         
         Args:
             cypher_query: The Cypher query to execute
             parameters: Parameters for the Cypher query
+            record_metrics: Record stage timings and result sizes; set by /queries only, so
+                ingest and maintenance queries stay out of the query histograms
             
         Returns:
             GraphData object containing nodes and relationships
         """
         try:
             with self.driver.session() as session:
+                started = time.perf_counter()
                 result = session.run(cypher_query, parameters)
-                return self._process_result(result)
+                processing = time.perf_counter()
+                # Records stream in while the result is processed
+                graph_data = self._process_result(result)
+                finished = time.perf_counter()
+            if record_metrics:
+                QUERY_STAGE_SECONDS.observe(processing - started, stage="execute")
+                QUERY_STAGE_SECONDS.observe(finished - processing, stage="process_result")
+                RESULT_NODES.observe(len(graph_data.nodes))
+                RESULT_RELATIONSHIPS.observe(len(graph_data.relationships))
+            return graph_data
         except Exception as e:
             logger.error(f"Error executing Cypher query: {str(e)}")
             logger.error(f"Query: {cypher_query}")
             logger.error(f"Parameters: {parameters}")
             raise
     
+    def pool_usage(self) -> Tuple[int, int]:
+        """Connections in use and the maximum pool size of the driver."""
+        pool = getattr(self.driver, "_pool", None)
+        if pool is None:
+            return 0, 0
+        in_use = sum(1 for connections in pool.connections.values() for c in connections if c.in_use)
+        return in_use, pool.pool_config.max_connection_pool_size
+    
     def _process_result(self, result):
         """
         Process Neo4j result into standardized GraphData format.
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.models.network import NetworkIndexInfo
+from app.services.job_service import Job, JobService
+from app.services.metrics import NETWORK_INDEX_BUILD_SECONDS
+from app.services.neo4j_service import Neo4jService
+
+logger = logging.getLogger(__name__)
+
+class NetworkIndexService:
+    def __init__(self, neo4j_service: Callable[[], Neo4jService], job_service: JobService, target_graph: str):
+        """
+        Keep a CIDR interval index of the security group rules of a graph.
+
+        The index is refreshed after every job on the graph and on first use.
+        A refresh reads only the rule and membership rows; when they are
+        unchanged the index is kept, otherwise it is rebuilt parsing only rule
+        definitions the previous index hadn't seen.
+
+        Args:
+            neo4j_service: Returns the Neo4j service; called on first refresh
+            job_service: Job runner whose finished jobs trigger refreshes
+            target_graph: Graph whose rules are indexed
+        """
+        self._neo4j_service = neo4j_service
+        self.job_service = job_service
+        self.target_graph = target_graph
+        self.index = None
+        self._generation: Optional[str] = None
+        self._error = ""
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        job_service.add_listener(self.on_job_finished)
+
+    def generation(self) -> Optional[str]:
+        return self.job_service.graph_generation(self.target_graph)
+
+    def is_fresh(self) -> bool:
+        return self.index is not None and self._generation == self.generation()
+
+    def status(self) -> NetworkIndexInfo:
+        stats = self.index.stats() if self.index is not None else {}
+        return NetworkIndexInfo(loaded=self.index is not None, generation=self._generation or "",
+                                fresh=self.is_fresh(), error=self._error, **stats)
+
+    def _read_rows(self) -> Tuple[List[Tuple], List[Tuple[str, str]]]:
+        from app.services.cidr_index import MEMBERSHIPS_QUERY, RULES_QUERY
+        with self._neo4j_service().driver.session() as session:
+            rows = [tuple(record.values()) for record in session.run(RULES_QUERY)]
+            memberships = [tuple(record.values()) for record in session.run(MEMBERSHIPS_QUERY)]
+        return rows, memberships
+
+    async def get(self, allow_stale: bool = False):
+        """
+        The index for the current graph, refreshed first if stale.
+
+        Args:
+            allow_stale: Return the last index while a job is changing the graph
+
+        Returns:
+            The index, or None when it can't be built now
+        """
+        generation = self.generation()
+        if self.index is not None and self._generation == generation:
+            return self.index
+        if generation is None:
+            return self.index if allow_stale else None
+        await self.refresh()
+        return self.index
+
+    async def refresh(self) -> Dict[str, Any]:
+        async with self._lock:
+            generation = self.generation()
+            if generation is None:
+                return {"status": "error", "message": "A job is changing the graph; the index is refreshed after it"}
+            if self.index is not None and self._generation == generation:
+                return {"status": "success", "message": "Index is up to date", "rebuilt": False}
+            from app.services.cidr_index import CidrIndex
+            started = time.perf_counter()
+            try:
+                rows, memberships = await asyncio.to_thread(self._read_rows)
+                rebuilt = self.index is None or CidrIndex.fingerprint_of(rows, memberships) != self.index.fingerprint
+                if rebuilt:
+                    self.index = await asyncio.to_thread(CidrIndex, rows, memberships, self.index)
+            except Exception as e:
+                logger.error(f"Building network index failed: {str(e)}")
+                self._error = str(e)
+                return {"status": "error", "message": f"Building network index failed: {str(e)}"}
+            seconds = time.perf_counter() - started
+            NETWORK_INDEX_BUILD_SECONDS.observe(seconds)
+            # A job that ran meanwhile may have changed what was read
+            self._generation = generation if self.generation() == generation else ""
+            self._error = ""
+            return {
+                "status": "success",
+                "message": "Index rebuilt" if rebuilt else "Rules unchanged",
+                "rebuilt": rebuilt,
+                "parsed_rules": self.index.parsed_rules if rebuilt else 0,
+                "seconds": round(seconds, 4)
+            }
+
+    def on_job_finished(self, job: Job):
+        if job.info.target_graph != self.target_graph:
+            return
+        self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
\ No newline at end of file
@@ -1,31 +1,212 @@
-import requests
-from typing import Dict, Any
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 from app.models.query import CypherQueryDetails
+from app.services.metrics import TRANSLATIONS, record_cache
 import logging
 import json
 import os
+import re
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Starts the explanation of keyword fallback answers
+FALLBACK_EXPLANATION = "Error translating query"
+# Template queries answering by keyword when the model can't be used: (cypher, explanation)
+FALLBACK_QUERIES: Dict[str, Tuple[str, str]] = {
+    "ec2_vpc": ("""
+    MATCH (i:EC2Instance)-[:PART_OF_VPC]->(v:AWSVpc)
+    RETURN i, v LIMIT 100
+    """, "Finding EC2 instances and their VPCs"),
+    "ec2_security_groups": ("""
+    MATCH (i:EC2Instance)-[:MEMBER_OF_EC2_SECURITY_GROUP]->(sg:EC2SecurityGroup)
+    RETURN i, sg LIMIT 100
+    """, "Finding EC2 instances and their security groups"),
+    "ec2_roles": ("""
+    MATCH (i:EC2Instance)-[:HAS_ROLE]->(r:IAMRole)
+    RETURN i, r LIMIT 100
+    """, "Finding EC2 instances and their IAM roles"),
+    "ec2": ("""
+    MATCH (i:EC2Instance)
+    WITH i LIMIT 100
+    OPTIONAL MATCH (i)-[r]-(related)
+    RETURN i, r, related
+    """, "Showing EC2 instances and their relationships"),
+    "s3_public": ("""
+    MATCH (b:S3Bucket)
+    WHERE b.public = true
+    WITH b LIMIT 100
+    OPTIONAL MATCH (b)-[r]-(related)
+    RETURN b, r, related
+    """, "Finding public S3 buckets"),
+    "s3": ("""
+    MATCH (b:S3Bucket)
+    WITH b LIMIT 100
+    OPTIONAL MATCH (b)-[r]-(related)
+    RETURN b, r, related
+    """, "Showing S3 buckets and their relationships"),
+    "security_groups_internet": ("""
+    MATCH (sg:EC2SecurityGroup)-[:HAS_INBOUND_RULE]->(rule:EC2SecurityGroupRule)
+    WHERE rule.cidr_block = '0.0.0.0/0'
+    RETURN sg, rule LIMIT 100
+    """, "Finding security groups that allow access from the internet"),
+    "security_groups": ("""
+    MATCH (sg:EC2SecurityGroup)
+    WITH sg LIMIT 100
+    OPTIONAL MATCH (sg)-[r]-(related)
+    RETURN sg, r, related
+    """, "Showing security groups and their relationships"),
+    "vpc": ("""
+    MATCH (v:AWSVpc)
+    WITH v LIMIT 100
+    OPTIONAL MATCH (v)-[r]-(related)
+    RETURN v, r, related
+    """, "Showing VPCs and their relationships"),
+    "iam_admin": ("""
+    MATCH (r:IAMRole)-[:HAS_POLICY]->(p:IAMPolicy)
+    WHERE p.name CONTAINS 'Admin' OR p.policyname CONTAINS 'Admin'
+    RETURN r, p LIMIT 100
+    """, "Finding IAM roles with admin access"),
+    "iam": ("""
+    MATCH (r:IAMRole)
+    WITH r LIMIT 100
+    OPTIONAL MATCH (r)-[rel]-(related)
+    RETURN r, rel, related
+    """, "Showing IAM roles and their relationships"),
+    "overview": ("""
+    MATCH (n)
+    WHERE n:AWSAccount OR n:EC2Instance OR n:S3Bucket OR n:EC2SecurityGroup OR n:AWSVpc OR n:IAMRole
+    WITH n LIMIT 50
+    OPTIONAL MATCH (n)-[r]-(related)
+    RETURN n, r, related
+    """, "Showing general cloud infrastructure overview"),
+}
+
+def fallback_intent(natural_language_query: str) -> str:
+    """Key of the FALLBACK_QUERIES entry answering a query, picked by keywords."""
+    query = natural_language_query.lower()
+    if "ec2" in query or "instance" in query:
+        if "vpc" in query:
+            return "ec2_vpc"
+        if "security" in query:
+            return "ec2_security_groups"
+        if "role" in query or "iam" in query:
+            return "ec2_roles"
+        return "ec2"
+    if "s3" in query or "bucket" in query:
+        return "s3_public" if "public" in query else "s3"
+    if "security" in query or "group" in query:
+        if "rule" in query or "allow" in query or "internet" in query:
+            return "security_groups_internet"
+        return "security_groups"
+    if "vpc" in query:
+        return "vpc"
+    if "role" in query or "iam" in query:
+        return "iam_admin" if "admin" in query else "iam"
+    return "overview"
+
+class TranslationCache:
+    def __init__(self, size: int = 512):
+        """
+        Model translations by model, question and resolved entities, least
+        recently used dropped beyond size. Shared by the clients of all API
+        keys, since the translation doesn't depend on whose key asked.
+        
+        Args:
+            size: Translations kept; 0 disables caching
+        """
+        self.size = size
+        self._translations: "OrderedDict[Tuple, CypherQueryDetails]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(openai_model: str, natural_language_query: str,
+            entities: Optional[List[Dict[str, Any]]] = None) -> Tuple:
+        question = " ".join(natural_language_query.lower().split())
+        return (openai_model, question, tuple(sorted(entity["id"] for entity in entities or ())))
+    
+    def get(self, key: Tuple) -> Optional[CypherQueryDetails]:
+        with self._lock:
+            details = self._translations.get(key)
+            if details is not None:
+                self._translations.move_to_end(key)
+        return details
+    
+    def put(self, key: Tuple, details: CypherQueryDetails):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._translations[key] = details
+            self._translations.move_to_end(key)
+            while len(self._translations) > self.size:
+                self._translations.popitem(last=False)
+    
+    def pop(self, key: Tuple):
+        with self._lock:
+            self._translations.pop(key, None)
+    
+    def __len__(self) -> int:
+        return len(self._translations)
+
 class NLPService:
-    def __init__(self, openai_api_key: str, openai_model: str = "gpt-3.5-turbo"):  # Changed default model
+    def __init__(self, openai_api_key: str, openai_model: str = "gpt-3.5-turbo",  # Changed default model
+                 openai_base_url: str = "https://api.openai.com/v1", cache_size: int = 512,
+                 translation_cache: Optional[TranslationCache] = None):
         self.openai_api_key = openai_api_key
         self.openai_model = openai_model
+        # Any OpenAI-compatible server, e.g. the load test stub
+        self.openai_base_url = openai_base_url.rstrip("/")
+        # Model translations by question; fallbacks aren't cached so the model is retried
+        self.translations = translation_cache if translation_cache is not None else TranslationCache(cache_size)
+    
+    @property
+    def answer_path(self) -> str:
+        """How questions are answered: by the model, or by keyword fallback queries without a key."""
+        return f"llm:{self.openai_model}" if self.openai_api_key else "fallback"
+    
+    def cache_key(self, natural_language_query: str, entities: Optional[List[Dict[str, Any]]] = None) -> Tuple:
+        return TranslationCache.key(self.openai_model, natural_language_query, entities)
+    
+    def cached_translation(self, natural_language_query: str,
+                           entities: Optional[List[Dict[str, Any]]] = None) -> Optional[CypherQueryDetails]:
+        return self.translations.get(self.cache_key(natural_language_query, entities))
+    
+    def forget(self, natural_language_query: str, entities: Optional[List[Dict[str, Any]]] = None):
+        """Drop a cached translation, e.g. one whose query was rejected."""
+        self.translations.pop(self.cache_key(natural_language_query, entities))
         
-    async def translate_to_cypher(self, natural_language_query: str) -> CypherQueryDetails:
+    def build_prompt(self, natural_language_query: str, entities: Optional[List[Dict[str, Any]]] = None,
+                     feedback: Optional[str] = None) -> str:
         """
-        Translate a natural language query to a Cypher query.
+        Build the prompt asking the model to translate a query into Cypher.
         
         Args:
             natural_language_query: The natural language query to translate
+            entities: Resources the query names, resolved by the search index
+            feedback: Why the previous translation was rejected
             
         Returns:
-            CypherQueryDetails object containing the Cypher query and parameters
+            The user message sent to the model
         """
-        try:
-            # Cartography's schema is different from our custom schema
-            # We need to use a specific prompt that reflects Cartography's data model
-            prompt = f"""
+        resources = ""
+        if entities:
+            # Exact ids let the model match on them instead of writing CONTAINS filters
+            lines = [
+                f'- "{entity["mention"]}" is the {"/".join(entity["labels"])} with '
+                + ", ".join(f"{field}: '{value}'" for field, value in entity["properties"].items())
+                for entity in entities
+            ]
+            resources = "Resources named in the query, found in the inventory (match on these exact values):\n" \
+                + "".join(f"            {line}\n" for line in lines) + "            \n            "
+        retry = ""
+        if feedback:
+            retry = f"{feedback} Write a cheaper query: filter on labels and properties early, bound " \
+                "variable-length relationships and avoid unconnected patterns.\n            \n            "
+        
+        # Cartography's schema is different from our custom schema
+        # We need to use a specific prompt that reflects Cartography's data model
+        prompt = f"""
             You are an expert in translating natural language queries about AWS cloud infrastructure into Cypher queries for Neo4j.
             The data was collected using Cartography, which creates a graph database with AWS resources and their relationships.
             
@@ -63,7 +244,7 @@ class NLPService:
             Always include LIMIT 100 at the end of your query to prevent returning too many results.
             If the query involves relationships, make sure to return the full path.
             
-            Natural language query: {natural_language_query}
+            {resources}{retry}Natural language query: {natural_language_query}
             
             Your response must be a valid JSON object with the following structure:
             {{
@@ -74,6 +255,53 @@ class NLPService:
             
             Return ONLY the JSON object and nothing else.
             """
+        return prompt
+
+    def parse_response(self, content: str) -> Dict[str, Any]:
+        """
+        Parse the JSON object out of a model response.
+        
+        Args:
+            content: Message content returned by the model, possibly with text around the JSON
+            
+        Returns:
+            The parsed JSON object
+        """
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            # If parsing fails, try to extract JSON from the text
+            json_match = re.search(r'({.*})', content.replace('\n', ' '), re.DOTALL)
+            if json_match:
+                try:
+                    return json.loads(json_match.group(1))
+                except json.JSONDecodeError:
+                    raise Exception("Could not extract valid JSON from OpenAI response")
+            raise Exception("Could not extract JSON from OpenAI response")
+    
+    async def translate_to_cypher(self, natural_language_query: str,
+                                  entities: Optional[List[Dict[str, Any]]] = None,
+                                  feedback: Optional[str] = None) -> CypherQueryDetails:
+        """
+        Translate a natural language query to a Cypher query.
+        
+        Args:
+            natural_language_query: The natural language query to translate
+            entities: Resources the query names, resolved by the search index
+            feedback: Why the previous translation was rejected; asks the model again, bypassing the cache
+            
+        Returns:
+            CypherQueryDetails object containing the Cypher query and parameters
+        """
+        if feedback is None:
+            cached = self.cached_translation(natural_language_query, entities)
+            record_cache("translation", cached is not None)
+            if cached is not None:
+                TRANSLATIONS.inc(path="cache")
+                return cached.model_copy(deep=True)
+        
+        try:
+            prompt = self.build_prompt(natural_language_query, entities, feedback)
             
             # Using the OpenAI REST API directly instead of the Python client
             headers = {
@@ -97,8 +325,12 @@ class NLPService:
             if any(supported_model in self.openai_model for supported_model in supported_models):
                 payload["response_format"] = {"type": "json_object"}
             
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
+            # Imported on first translation; requests is slow to import
+            import requests
+            # The post blocks for the whole completion, so it runs off the event loop
+            response = await asyncio.to_thread(
+                requests.post,
+                f"{self.openai_base_url}/chat/completions",
                 headers=headers,
                 json=payload
             )
@@ -110,132 +342,69 @@ class NLPService:
             response_data = response.json()
             result_content = response_data['choices'][0]['message']['content']
             
-            # Try to parse the response as JSON
-            try:
-                result = json.loads(result_content)
-            except json.JSONDecodeError:
-                # If parsing fails, try to extract JSON from the text
-                import re
-                json_match = re.search(r'({.*})', result_content.replace('\n', ' '), re.DOTALL)
-                if json_match:
-                    try:
-                        result = json.loads(json_match.group(1))
-                    except json.JSONDecodeError:
-                        raise Exception("Could not extract valid JSON from OpenAI response")
-                else:
-                    raise Exception("Could not extract JSON from OpenAI response")
+            result = self.parse_response(result_content)
             
-            return CypherQueryDetails(
+            TRANSLATIONS.inc(path="llm")
+            details = CypherQueryDetails(
                 cypher_query=result.get("cypher_query", ""),
                 parameters=result.get("parameters", {}),
                 explanation=result.get("explanation", "")
             )
+            if details.cypher_query:
+                self.translations.put(self.cache_key(natural_language_query, entities), details.model_copy(deep=True))
+            return details
             
         except Exception as e:
             logger.error(f"Error translating query to Cypher: {str(e)}", exc_info=True)
+            TRANSLATIONS.inc(path="fallback")
             
-            # Determine which type of query the user is asking for
-            query = natural_language_query.lower()
-            
-            # Use template-based fallback queries based on keywords
-            if "ec2" in query or "instance" in query:
-                if "vpc" in query:
-                    cypher = """
-                    MATCH (i:EC2Instance)-[:PART_OF_VPC]->(v:AWSVpc)
-                    RETURN i, v LIMIT 100
-                    """
-                    explanation = "Finding EC2 instances and their VPCs"
-                elif "security" in query:
-                    cypher = """
-                    MATCH (i:EC2Instance)-[:MEMBER_OF_EC2_SECURITY_GROUP]->(sg:EC2SecurityGroup)
-                    RETURN i, sg LIMIT 100
-                    """
-                    explanation = "Finding EC2 instances and their security groups"
-                elif "role" in query or "iam" in query:
-                    cypher = """
-                    MATCH (i:EC2Instance)-[:HAS_ROLE]->(r:IAMRole)
-                    RETURN i, r LIMIT 100
-                    """
-                    explanation = "Finding EC2 instances and their IAM roles"
-                else:
-                    cypher = """
-                    MATCH (i:EC2Instance)
-                    WITH i LIMIT 100
-                    OPTIONAL MATCH (i)-[r]-(related)
-                    RETURN i, r, related
-                    """
-                    explanation = "Showing EC2 instances and their relationships"
-            elif "s3" in query or "bucket" in query:
-                if "public" in query:
-                    cypher = """
-                    MATCH (b:S3Bucket)
-                    WHERE b.public = true
-                    WITH b LIMIT 100
-                    OPTIONAL MATCH (b)-[r]-(related)
-                    RETURN b, r, related
-                    """
-                    explanation = "Finding public S3 buckets"
-                else:
-                    cypher = """
-                    MATCH (b:S3Bucket)
-                    WITH b LIMIT 100
-                    OPTIONAL MATCH (b)-[r]-(related)
-                    RETURN b, r, related
-                    """
-                    explanation = "Showing S3 buckets and their relationships"
-            elif "security" in query or "group" in query:
-                if "rule" in query or "allow" in query or "internet" in query:
-                    cypher = """
-                    MATCH (sg:EC2SecurityGroup)-[:HAS_INBOUND_RULE]->(rule:EC2SecurityGroupRule)
-                    WHERE rule.cidr_block = '0.0.0.0/0'
-                    RETURN sg, rule LIMIT 100
-                    """
-                    explanation = "Finding security groups that allow access from the internet"
-                else:
-                    cypher = """
-                    MATCH (sg:EC2SecurityGroup)
-                    WITH sg LIMIT 100
-                    OPTIONAL MATCH (sg)-[r]-(related)
-                    RETURN sg, r, related
-                    """
-                    explanation = "Showing security groups and their relationships"
-            elif "vpc" in query:
-                cypher = """
-                MATCH (v:AWSVpc)
-                WITH v LIMIT 100
-                OPTIONAL MATCH (v)-[r]-(related)
-                RETURN v, r, related
-                """
-                explanation = "Showing VPCs and their relationships"
-            elif "role" in query or "iam" in query:
-                if "admin" in query:
-                    cypher = """
-                    MATCH (r:IAMRole)-[:HAS_POLICY]->(p:IAMPolicy)
-                    WHERE p.name CONTAINS 'Admin' OR p.policyname CONTAINS 'Admin'
-                    RETURN r, p LIMIT 100
-                    """
-                    explanation = "Finding IAM roles with admin access"
-                else:
-                    cypher = """
-                    MATCH (r:IAMRole)
-                    WITH r LIMIT 100
-                    OPTIONAL MATCH (r)-[rel]-(related)
-                    RETURN r, rel, related
-                    """
-                    explanation = "Showing IAM roles and their relationships"
-            else:
-                # Default fallback query
-                cypher = """
-                MATCH (n)
-                WHERE n:AWSAccount OR n:EC2Instance OR n:S3Bucket OR n:EC2SecurityGroup OR n:AWSVpc OR n:IAMRole
-                WITH n LIMIT 50
-                OPTIONAL MATCH (n)-[r]-(related)
-                RETURN n, r, related
-                """
-                explanation = "Showing general cloud infrastructure overview"
-            
+            cypher, explanation = FALLBACK_QUERIES[fallback_intent(natural_language_query)]
             return CypherQueryDetails(
                 cypher_query=cypher,
                 parameters={},
-                explanation=f"Error translating query: {str(e)}. {explanation}."
-            )
\ No newline at end of file
+                explanation=f"{FALLBACK_EXPLANATION}: {str(e)}. {explanation}."
+            )
+
+class NLPClientPool:
+    def __init__(self, openai_model: str, openai_base_url: str, max_clients: int = 32, cache_size: int = 512):
+        """
+        NLPService instances keyed by OpenAI API key.
+        
+        Each request picks the client of its own key, so requests with
+        different keys run side by side instead of replacing a shared client.
+        The least recently used client is dropped beyond max_clients. All
+        clients share one translation cache, so a question translated for one
+        key (e.g. by the warm-up with the server's key) is answered from the
+        cache for every other key.
+        
+        Args:
+            openai_model: Model used by every client
+            openai_base_url: API base URL used by every client
+            max_clients: Number of keys whose clients are kept
+            cache_size: Translations cached, across all clients
+        """
+        self.openai_model = openai_model
+        self.openai_base_url = openai_base_url
+        self.max_clients = max_clients
+        self.translations = TranslationCache(cache_size)
+        self._clients: "OrderedDict[str, NLPService]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, openai_api_key: str) -> NLPService:
+        with self._lock:
+            client = self._clients.get(openai_api_key)
+            if client is None:
+                client = self._clients[openai_api_key] = NLPService(
+                    openai_api_key=openai_api_key,
+                    openai_model=self.openai_model,
+                    openai_base_url=self.openai_base_url,
+                    translation_cache=self.translations
+                )
+                while len(self._clients) > self.max_clients:
+                    self._clients.popitem(last=False)
+            else:
+                self._clients.move_to_end(openai_api_key)
+            return client
+    
+    def __len__(self) -> int:
+        return len(self._clients)
\ No newline at end of file
@@ -0,0 +1,199 @@
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, Any, List, Optional
+
+# Functions whose samples are also counted on their own in the continuous profile
+HOT_PATHS = {
+    "process_result": ("_process_result",),
+    "json_encoding": ("model_dump_json", "jsonable_encoder", "encode", "dumps"),
+    "prompt_building": ("build_prompt",),
+}
+# Frames from the profiler itself are cut from every stack
+_OWN_FILE = __file__
+
+def _frame_name(code) -> str:
+    module = code.co_filename.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+def sample_stack(frame) -> List[str]:
+    """Function names of a frame's stack, outermost first."""
+    stack = []
+    while frame is not None:
+        if frame.f_code.co_filename != _OWN_FILE:
+            stack.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+class SamplingProfiler:
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005, max_stacks: int = 5000):
+        """
+        Wall-clock sampling profiler of one thread.
+
+        A background thread records the target thread's stack every interval
+        seconds, so the profiled code runs unmodified. Stacks are kept folded
+        ("outer;inner count"), the input format of flamegraph.pl and speedscope.
+
+        Args:
+            thread_id: Thread to sample; defaults to the calling thread
+            interval: Seconds between samples
+            max_stacks: Distinct stacks kept; further ones are counted as "[other]"
+        """
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.hot_paths: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def folded(self) -> str:
+        with self._lock:
+            items = self.stacks.most_common()
+        return "\n".join(f"{stack} {count}" for stack, count in items)
+
+    def summary(self, top: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "samples": self.samples,
+                "interval_seconds": self.interval,
+                "hot_paths": {name: self.hot_paths.get(name, 0) for name in HOT_PATHS},
+                "top_stacks": [{"stack": stack, "samples": count} for stack, count in self.stacks.most_common(top)]
+            }
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.hot_paths.clear()
+            self.samples = 0
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = sample_stack(frame)
+            del frame
+            if stack:
+                self._record(stack)
+
+    def _record(self, stack: List[str]):
+        folded = ";".join(stack)
+        functions = {name.rsplit(".", 1)[-1].rsplit(":", 1)[-1] for name in stack}
+        with self._lock:
+            self.samples += 1
+            if folded in self.stacks or len(self.stacks) < self.max_stacks:
+                self.stacks[folded] += 1
+            else:
+                self.stacks["[other]"] += 1
+            for path, names in HOT_PATHS.items():
+                if functions.intersection(names):
+                    self.hot_paths[path] += 1
+
+class AllocationTracker:
+    # tracemalloc is process wide, so only one request is traced at a time
+    _lock = threading.Lock()
+
+    def __init__(self, frames: int = 25):
+        """
+        Diff tracemalloc snapshots taken around a block of code.
+
+        Args:
+            frames: Stack depth recorded per allocation
+        """
+        self.frames = frames
+        self.active = False
+        self._started_tracing = False
+        self._before: Optional[tracemalloc.Snapshot] = None
+
+    def start(self) -> bool:
+        """Start tracking; returns False when another request is being traced."""
+        if not AllocationTracker._lock.acquire(blocking=False):
+            return False
+        self.active = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+        self._before = tracemalloc.take_snapshot()
+        return True
+
+    def stop(self, top: int = 20) -> Dict[str, Any]:
+        """Stop tracking and return the top allocation sites by size growth."""
+        if not self.active:
+            return {"error": "another request was being traced"}
+        try:
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, _OWN_FILE)]
+            stats = after.filter_traces(filters).compare_to(self._before.filter_traces(filters), "lineno")
+            return {
+                "peak_bytes": peak,
+                "net_bytes": sum(stat.size_diff for stat in stats),
+                "top_allocations": [
+                    {
+                        "file": stat.traceback[0].filename,
+                        "line": stat.traceback[0].lineno,
+                        "size_diff_bytes": stat.size_diff,
+                        "count_diff": stat.count_diff,
+                        "size_bytes": stat.size
+                    }
+                    for stat in stats[:top]
+                ]
+            }
+        finally:
+            if self._started_tracing:
+                tracemalloc.stop()
+            self._before = None
+            self.active = False
+            AllocationTracker._lock.release()
+
+class ProfileStore:
+    def __init__(self, limit: int = 50):
+        """Most recent request profiles, by id."""
+        self.limit = limit
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def new_id(self) -> str:
+        return uuid.uuid4().hex[:16]
+
+    def add(self, profile: Dict[str, Any], profile_id: Optional[str] = None) -> str:
+        profile_id = profile_id or self.new_id()
+        profile["id"] = profile_id
+        profile["created_at"] = time.time()
+        with self._lock:
+            self._profiles[profile_id] = profile
+            while len(self._profiles) > self.limit:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [{"id": p["id"], "created_at": p["created_at"], "method": p["method"], "path": p["path"],
+                 "seconds": p["seconds"]} for p in reversed(profiles)]
\ No newline at end of file
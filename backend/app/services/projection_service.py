@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+from app.models.projection import ProjectionInfo
+from app.services.job_service import Job, JobService
+from app.services.metrics import PROJECTION_BUILD_SECONDS
+from app.services.neo4j_service import Neo4jService
+
+logger = logging.getLogger(__name__)
+
+class ProjectionService:
+    def __init__(self, neo4j_service: Callable[[], Neo4jService], job_service: JobService, target_graph: str,
+                 path: str, enabled: bool = True):
+        """
+        Keep an in-memory CSR projection of the graph for traversal queries.
+
+        The projection is rebuilt from Neo4j after every job that changed the
+        graph and saved to path, from where the next process start maps it
+        instead of reading the whole graph again. Queries keep using the
+        previous projection while a rebuild runs, so results can lag an
+        ingest by the rebuild time; status() tells which generation is served.
+
+        numpy is imported with the projection module on first load, not at
+        API startup.
+
+        Args:
+            neo4j_service: Returns the Neo4j service; called on first rebuild
+            job_service: Job runner whose finished jobs trigger rebuilds
+            target_graph: Graph that is projected
+            path: Directory the projection is saved to
+            enabled: Whether projections are built at all
+        """
+        self._neo4j_service = neo4j_service
+        self.job_service = job_service
+        self.target_graph = target_graph
+        self.path = path
+        self.enabled = enabled
+        self.projection = None
+        self._generation = ""
+        self._built_at: Optional[float] = None
+        self._build_seconds = 0.0
+        self._error = ""
+        self._lock = asyncio.Lock()
+        self._rebuild_task: Optional[asyncio.Task] = None
+        if enabled:
+            job_service.add_listener(self.on_job_finished)
+
+    @property
+    def generation(self) -> str:
+        return self._generation
+
+    def is_fresh(self) -> bool:
+        return self.projection is not None and self._generation == self.job_service.graph_generation(self.target_graph)
+
+    def status(self) -> ProjectionInfo:
+        projection = self.projection
+        return ProjectionInfo(
+            enabled=self.enabled,
+            loaded=projection is not None,
+            building=self._lock.locked(),
+            generation=self._generation,
+            fresh=self.is_fresh(),
+            built_at=self._built_at,
+            build_seconds=self._build_seconds,
+            nodes=projection.node_count if projection is not None else 0,
+            relationships=projection.relationship_count if projection is not None else 0,
+            labels=len(projection.labels) if projection is not None else 0,
+            relationship_types=len(projection.relationship_types) if projection is not None else 0,
+            path=self.path,
+            error=self._error
+        )
+
+    async def load_from_disk(self) -> bool:
+        """
+        Map the projection saved by a previous process, if any.
+
+        When the generation is read from the graph, the one saved with the
+        projection tells whether the graph changed since, and a stale
+        projection is rebuilt. Otherwise it is taken as the current graph's
+        projection: it was saved after the last ingest this API ran, and the
+        next job rebuilds it anyway.
+        """
+        if not self.enabled or self.projection is not None or not os.path.isdir(self.path):
+            return False
+        from app.services.graph_projection import GraphProjection
+        try:
+            projection = await asyncio.to_thread(GraphProjection.load, self.path)
+        except Exception as e:
+            logger.warning(f"Could not load graph projection from {self.path}: {str(e)}")
+            self._error = str(e)
+            return False
+        tracked = self.job_service.tracks_graph(self.target_graph)
+        if tracked:
+            await self.job_service.refresh_generation(self.target_graph)
+        async with self._lock:
+            if self.projection is None:
+                self.projection = projection
+                if tracked:
+                    self._generation = projection.metadata.get("generation") or ""
+                else:
+                    self._generation = self.job_service.graph_generation(self.target_graph) or ""
+                self._built_at = projection.metadata.get("built_at")
+                self._build_seconds = projection.metadata.get("build_seconds", 0.0)
+        logger.info(f"Loaded graph projection with {projection.node_count} nodes and "
+                    f"{projection.relationship_count} relationships from {self.path}")
+        if tracked and self.job_service.graph_generation(self.target_graph) is not None and not self.is_fresh():
+            self._rebuild_task = asyncio.get_running_loop().create_task(self.rebuild())
+        return True
+
+    async def rebuild(self) -> Dict[str, Any]:
+        """
+        Build a new projection from Neo4j, save it, then swap it in.
+
+        Returns:
+            Status of the rebuild
+        """
+        if not self.enabled:
+            return {"status": "error", "message": "Graph projection is disabled"}
+        async with self._lock:
+            generation = self.job_service.graph_generation(self.target_graph)
+            if generation is None:
+                return {"status": "error", "message": "A job is changing the graph; the projection is rebuilt after it"}
+            if self.projection is not None and generation == self._generation:
+                return {"status": "success", "message": "Projection is up to date", "generation": generation}
+            from app.services.graph_projection import GraphProjection
+            started = time.perf_counter()
+            try:
+                metadata = {"built_at": time.time(), "generation": generation}
+                projection = await asyncio.to_thread(GraphProjection.from_neo4j, self._neo4j_service(), metadata)
+                projection.metadata["build_seconds"] = round(time.perf_counter() - started, 4)
+                await asyncio.to_thread(projection.save, self.path)
+                # Serve the mapped copy so the built arrays can be freed
+                projection = await asyncio.to_thread(GraphProjection.load, self.path)
+            except Exception as e:
+                logger.error(f"Building graph projection failed: {str(e)}")
+                self._error = str(e)
+                return {"status": "error", "message": f"Building graph projection failed: {str(e)}"}
+            seconds = time.perf_counter() - started
+            PROJECTION_BUILD_SECONDS.observe(seconds)
+            self.projection = projection
+            # A job that ran meanwhile may have changed what was read
+            self._generation = generation if self.job_service.graph_generation(self.target_graph) == generation else ""
+            self._built_at = projection.metadata["built_at"]
+            self._build_seconds = round(seconds, 4)
+            self._error = ""
+            logger.info(f"Built graph projection with {projection.node_count} nodes and "
+                        f"{projection.relationship_count} relationships in {seconds:.2f}s")
+            return {
+                "status": "success",
+                "message": "Projection rebuilt",
+                "generation": self._generation,
+                "nodes": projection.node_count,
+                "relationships": projection.relationship_count,
+                "seconds": round(seconds, 4)
+            }
+
+    def on_job_finished(self, job: Job):
+        if job.info.target_graph != self.target_graph:
+            return
+        self._rebuild_task = asyncio.get_running_loop().create_task(self.rebuild())
\ No newline at end of file
@@ -0,0 +1,241 @@
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.models.query import CypherQueryDetails
+from app.services.job_service import Job, JobService
+from app.services.metrics import GUARD_VERDICTS, record_cache
+from app.services.neo4j_service import Neo4jService
+
+logger = logging.getLogger(__name__)
+
+# String literals, backtick names and comments, blanked out before the query text is inspected
+LITERALS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|//[^\n]*|/\*.*?\*/", re.DOTALL)
+# The hops of a variable-length relationship: -[r:TYPE*2..5]-
+VAR_LENGTH = re.compile(r"(-\s*\[[^\[\]]*?)\*\s*(\d*)\s*(\.\.)?\s*(\d*)([^\[\]]*\]\s*-)")
+FINAL_LIMIT = re.compile(r"\bLIMIT\s+(\d+|\$\w+)\s*$", re.IGNORECASE)
+UNION = re.compile(r"\bUNION\b", re.IGNORECASE)
+# Operators reported as warnings when found in a plan
+FLAGGED_OPERATORS = {"CartesianProduct": "Cartesian product", "AllNodesScan": "scan of all nodes"}
+
+def strip_comments(cypher_query: str) -> str:
+    """The query without comments; a trailing one would hide the final LIMIT."""
+    return LITERALS.sub(lambda match: " " if match.group(0)[:2] in ("//", "/*") else match.group(0), cypher_query)
+
+def mask_literals(cypher_query: str) -> str:
+    """The query with literals and comments replaced by underscores, keeping every position."""
+    return LITERALS.sub(lambda match: "_" * len(match.group(0)), cypher_query)
+
+class QueryGuard:
+    def __init__(self, neo4j_service: Callable[[], Neo4jService], job_service: JobService, target_graph: str,
+                 max_rows: int = 1000, max_hops: int = 5, max_estimated_rows: float = 1e6,
+                 max_cartesian_rows: float = 1e5, cache_size: int = 1024, enabled: bool = True):
+        """
+        Check generated Cypher before it runs.
+
+        The query is rewritten first: its final LIMIT is added or lowered to
+        max_rows (a UNION is wrapped in CALL { } with that LIMIT after it)
+        and variable-length relationships get an upper bound of max_hops. The rewritten query is then EXPLAINed and rejected when the
+        planner expects more than max_estimated_rows rows at any operator, a
+        Cartesian product of more than max_cartesian_rows rows, or writes to
+        the graph. Plan assessments are cached by normalized query text for
+        the current graph generation, since estimates follow the data.
+
+        Args:
+            neo4j_service: Returns the Neo4j service
+            job_service: Job runner whose finished jobs invalidate cached plans
+            target_graph: Graph the queries run on
+            max_rows: LIMIT enforced on the final clause
+            max_hops: Upper bound of variable-length relationships
+            max_estimated_rows: Rows any operator may be estimated to produce
+            max_cartesian_rows: Rows a Cartesian product may be estimated to produce
+            cache_size: Plan assessments kept
+            enabled: Whether queries are checked at all
+        """
+        self._neo4j_service = neo4j_service
+        self.job_service = job_service
+        self.target_graph = target_graph
+        self.max_rows = max_rows
+        self.max_hops = max_hops
+        self.max_estimated_rows = max_estimated_rows
+        self.max_cartesian_rows = max_cartesian_rows
+        self.cache_size = cache_size
+        self.enabled = enabled
+        self._plans: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._generation: Optional[str] = None
+        self._lock = threading.Lock()
+        job_service.add_listener(self.on_job_finished)
+
+    def on_job_finished(self, job: Job):
+        if job.info.target_graph != self.target_graph:
+            return
+        with self._lock:
+            self._plans.clear()
+
+    def rewrite(self, cypher_query: str,
+                parameters: Dict[str, Any]) -> Tuple[str, Dict[str, Any], List[str], List[str]]:
+        """
+        Bound variable-length relationships and the number of rows returned.
+
+        Returns:
+            Tuple of (query, parameters, rewrites made, violations)
+        """
+        cypher_query = strip_comments(cypher_query).strip().rstrip(";").rstrip()
+        parameters = dict(parameters)
+        rewrites: List[str] = []
+        violations: List[str] = []
+        if not cypher_query:
+            return cypher_query, parameters, rewrites, ["the query is empty"]
+
+        masked = mask_literals(cypher_query)
+        pieces = []
+        position = 0
+        for match in VAR_LENGTH.finditer(masked):
+            low, dots, high = match.group(2), match.group(3), match.group(4)
+            if not dots and low:
+                # Exactly low hops
+                low_hops = high_hops = int(low)
+            else:
+                low_hops = int(low) if low else 1
+                high_hops = int(high) if high else None
+            if low_hops > self.max_hops:
+                violations.append(f"a variable-length relationship of at least {low_hops} hops, "
+                                  f"more than {self.max_hops}")
+                continue
+            if high_hops is not None and high_hops <= self.max_hops:
+                continue
+            # Positions match between the masked and the original query
+            pieces.append(cypher_query[position:match.end(1)])
+            pieces.append(f"*{low_hops}..{self.max_hops}")
+            position = match.start(5)
+            original = " ".join(cypher_query[match.start():match.end()].split())
+            rewrites.append(f"bounded {original} to {self.max_hops} hops")
+        pieces.append(cypher_query[position:])
+        cypher_query = "".join(pieces)
+
+        masked = mask_literals(cypher_query)
+        limit = FINAL_LIMIT.search(masked)
+        if UNION.search(masked):
+            # A LIMIT after UNION only caps its last part, so the whole union is capped as a subquery
+            cypher_query = f"CALL {{\n{cypher_query}\n}}\nRETURN *\nLIMIT {self.max_rows}"
+            rewrites.append(f"limited the UNION to {self.max_rows} rows")
+        elif limit is not None:
+            value = limit.group(1)
+            if value.startswith("$"):
+                current = parameters.get(value[1:])
+                if not isinstance(current, int) or current > self.max_rows:
+                    parameters[value[1:]] = self.max_rows
+                    rewrites.append(f"set {value} to {self.max_rows}")
+            elif int(value) > self.max_rows:
+                cypher_query = f"{cypher_query[:limit.start(1)]}{self.max_rows}"
+                rewrites.append(f"lowered LIMIT {value} to {self.max_rows}")
+        else:
+            cypher_query = f"{cypher_query}\nLIMIT {self.max_rows}"
+            rewrites.append(f"added LIMIT {self.max_rows}")
+        return cypher_query, parameters, rewrites, violations
+
+    def assess(self, plan: Optional[Dict[str, Any]], query_type: Optional[str]) -> Dict[str, Any]:
+        """Violations and warnings of an EXPLAIN plan, from its operators and row estimates."""
+        violations: List[str] = []
+        warnings: List[str] = []
+        if query_type not in (None, "r"):
+            violations.append("the query writes to the graph")
+        operators: List[Tuple[str, float]] = []
+        stack = [plan] if plan else []
+        while stack:
+            operator = stack.pop()
+            # Neo4j 4 suffixes operators with the runtime, e.g. AllNodesScan@neo4j
+            name = operator.get("operatorType", "").split("@")[0]
+            operators.append((name, float(operator.get("arguments", {}).get("EstimatedRows", 0.0))))
+            stack.extend(operator.get("children", []))
+        peak_name, peak = max(operators, key=lambda operator: operator[1], default=("", 0.0))
+        # An oversized Cartesian product is reported once, below
+        if peak > self.max_estimated_rows and not (peak_name == "CartesianProduct" and peak > self.max_cartesian_rows):
+            violations.append(f"an estimated {peak:,.0f} rows at {peak_name}, "
+                              f"more than the budget of {self.max_estimated_rows:,.0f}")
+        for name, rows in operators:
+            if name == "CartesianProduct" and rows > self.max_cartesian_rows:
+                violations.append(f"a Cartesian product of an estimated {rows:,.0f} rows")
+            elif name in FLAGGED_OPERATORS:
+                warnings.append(f"{FLAGGED_OPERATORS[name]} of an estimated {rows:,.0f} rows")
+            elif name.startswith("VarLengthExpand"):
+                warnings.append(f"variable-length expand of an estimated {rows:,.0f} rows")
+        return {
+            "estimated_rows": operators[0][1] if operators else 0.0,
+            "peak_rows": peak,
+            "operators": sorted({name for name, _ in operators}),
+            "violations": violations,
+            "warnings": warnings
+        }
+
+    def plan(self, cypher_query: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """The assessment of a query's plan, EXPLAINed once per normalized query and graph generation."""
+        key = " ".join(cypher_query.split())
+        generation = self.job_service.graph_generation(self.target_graph)
+        with self._lock:
+            if generation != self._generation:
+                self._plans.clear()
+                self._generation = generation
+            assessment = self._plans.get(key)
+            if assessment is not None:
+                self._plans.move_to_end(key)
+        record_cache("query_plan", assessment is not None)
+        if assessment is not None:
+            return assessment
+        from neo4j.exceptions import ClientError
+        try:
+            summary = self._neo4j_service().explain(cypher_query, parameters)
+        except ClientError as e:
+            # Syntax errors, unknown functions or missing parameters; worth telling the model
+            assessment = {"estimated_rows": 0.0, "peak_rows": 0.0, "operators": [], "warnings": [],
+                          "violations": [f"Neo4j can't plan it: {e.message}"]}
+        else:
+            assessment = self.assess(summary.plan, summary.query_type)
+        # Nothing planned while a job changes the graph is kept
+        if generation is not None and self.cache_size > 0:
+            with self._lock:
+                self._plans[key] = assessment
+                while len(self._plans) > self.cache_size:
+                    self._plans.popitem(last=False)
+        return assessment
+
+    def check(self, details: CypherQueryDetails) -> Dict[str, Any]:
+        """
+        Rewrite and assess a generated query. Blocks on EXPLAIN when its plan isn't cached.
+
+        Args:
+            details: The translated query
+
+        Returns:
+            Dictionary with status (accepted, rewritten or rejected), the query
+            to run as details, and the rewrites, violations and warnings found
+        """
+        if not self.enabled:
+            return {"status": "accepted", "details": details, "rewrites": [], "violations": [], "warnings": []}
+        cypher_query, parameters, rewrites, violations = self.rewrite(details.cypher_query, details.parameters)
+        assessment: Dict[str, Any] = {"warnings": [], "estimated_rows": None}
+        if not violations:
+            assessment = self.plan(cypher_query, parameters)
+            violations = assessment["violations"]
+        status = "rejected" if violations else "rewritten" if rewrites else "accepted"
+        GUARD_VERDICTS.inc(verdict=status)
+        if status == "rejected":
+            logger.warning(f"Rejected generated query ({'; '.join(violations)}): {details.cypher_query}")
+        explanation = details.explanation
+        if rewrites:
+            explanation = f"{explanation} (adjusted before running: {'; '.join(rewrites)})".strip()
+        return {
+            "status": status,
+            "details": CypherQueryDetails(cypher_query=cypher_query, parameters=parameters, explanation=explanation),
+            "rewrites": rewrites,
+            "violations": violations,
+            "warnings": assessment["warnings"],
+            "estimated_rows": assessment["estimated_rows"]
+        }
+
+    @staticmethod
+    def feedback(verdict: Dict[str, Any], details: CypherQueryDetails) -> str:
+        """What to tell the model about a rejected query when asking again."""
+        return f"The query {details.cypher_query!r} was rejected before running because of " \
+               f"{'; '.join(verdict['violations'])}."
\ No newline at end of file
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ReadinessProbe:
+    def __init__(self, checks: Dict[str, Callable[[], Any]], interval: float = 15.0, timeout: float = 5.0):
+        """
+        Run blocking dependency checks periodically off the event loop.
+
+        Startup doesn't wait for any dependency; /ready reports the result of
+        the latest round, so orchestrators route traffic once it passes.
+
+        Args:
+            checks: Check name -> blocking callable that raises when the dependency is unavailable
+            interval: Seconds between rounds of checks
+            timeout: Seconds after which a check counts as failed
+        """
+        self.checks = checks
+        self.interval = interval
+        self.timeout = timeout
+        self._results: Dict[str, Dict[str, Any]] = {
+            name: {"ready": False, "error": "not checked yet"} for name in checks
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        results = dict(self._results)
+        return {"ready": all(result["ready"] for result in results.values()), "checks": results}
+
+    async def check_all(self):
+        await asyncio.gather(*(self._check(name, check) for name, check in self.checks.items()))
+
+    async def _run(self):
+        while True:
+            await self.check_all()
+            await asyncio.sleep(self.interval)
+
+    async def _check(self, name: str, check: Callable[[], Any]):
+        started = time.perf_counter()
+        try:
+            # A hung check keeps its thread, but the probe moves on
+            await asyncio.wait_for(asyncio.to_thread(check), self.timeout)
+            result = {"ready": True}
+        except asyncio.TimeoutError:
+            result = {"ready": False, "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            result = {"ready": False, "error": str(e)}
+        if result["ready"] != self._results[name]["ready"]:
+            logger.info(f"Readiness check {name}: {'ready' if result['ready'] else result['error']}")
+        result["checked_at"] = time.time()
+        result["seconds"] = round(time.perf_counter() - started, 4)
+        self._results[name] = result
\ No newline at end of file
@@ -0,0 +1,265 @@
+import hashlib
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+
+# Properties searched on nodes of every label; tags come from AWSTag nodes
+SEARCH_FIELDS = ["name", "arn", "bucketname", "instanceid", "groupid", "rolename", "policyname", "id"]
+SEARCH_QUERY = """
+MATCH (n)
+WITH n, [field IN $fields WHERE n[field] IS NOT NULL | [field, toString(n[field])]] AS fields
+OPTIONAL MATCH (n)-[:TAGGED]->(tag:AWSTag)
+WITH n, fields, [t IN collect(tag) WHERE t.key IS NOT NULL | t.key + '=' + coalesce(toString(t.value), '')] AS tags
+WHERE size(fields) > 0 OR size(tags) > 0
+RETURN id(n) AS id, labels(n) AS labels, fields, tags
+"""
+
+# Rebuild from scratch once this share of the indexed values was replaced
+COMPACT_DEAD_FRACTION = 0.3
+# Updates changing more nodes than this build a new index aside instead of editing the live one
+INCREMENTAL_CHANGES = 1000
+# Attributes holding the index contents, swapped as a whole after a rebuild
+STATE = ("_postings", "_values", "_lower", "_fields", "_value_node", "_value_grams", "_alive", "_dead", "_node_ids",
+         "_node_labels", "_node_properties", "_node_alive", "_slots", "_fingerprints", "_node_values", "_rows",
+         "_label_masks")
+# Postings entries read per query to select candidates, rarest trigrams first
+HIT_BUDGET = 100000
+# Values scored exactly per query, at least
+CANDIDATES = 200
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of the lowercased text padded with a space, so starts and ends of values weigh more."""
+    padded = f" {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchIndex:
+    def __init__(self):
+        """
+        Trigram inverted index over identifying properties of graph nodes.
+
+        Every field value (name, ARN, bucket name, ..., tag) is a document.
+        Postings are append-only int32 arrays, read through numpy without
+        copying. A query counts the hits of its rarer trigrams with one
+        concatenate and unique, keeps the values with the most hits, and
+        ranks those by the Dice coefficient of their trigram sets with a
+        bonus for containing the query as a substring.
+
+        update applies the difference to the previous ingest: values of
+        removed or changed nodes are tombstoned and new ones appended.
+        Once too many values are dead, or many nodes changed, the index is
+        rebuilt aside and swapped in, so searches only ever wait for small
+        edits.
+        """
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._reset()
+        self.built_at: Optional[float] = None
+        self.last_update: Dict[str, Any] = {}
+
+    def _reset(self):
+        self._postings: Dict[str, array] = {}
+        self._values: List[str] = []
+        self._lower: List[str] = []
+        self._fields: List[str] = []
+        self._value_node = array("i")
+        self._value_grams = array("i")
+        self._alive = bytearray()
+        self._dead = 0
+        self._node_ids: List[int] = []
+        self._node_labels: List[List[str]] = []
+        self._node_properties: List[Dict[str, str]] = []
+        self._node_alive = bytearray()
+        # Neo4j id -> node slot, row fingerprint and value ids
+        self._slots: Dict[int, int] = {}
+        self._fingerprints: Dict[int, str] = {}
+        self._node_values: Dict[int, List[int]] = {}
+        self._rows: Dict[int, Tuple] = {}
+        self._label_masks: Dict[Tuple[str, ...], np.ndarray] = {}
+
+    @property
+    def node_count(self) -> int:
+        return len(self._slots)
+
+    @property
+    def value_count(self) -> int:
+        return len(self._values) - self._dead
+
+    @staticmethod
+    def fingerprint(row: Tuple) -> str:
+        return hashlib.sha1(repr(row[1:]).encode()).hexdigest()
+
+    def update(self, rows: Iterable[Tuple[int, Sequence[str], Sequence[Sequence[str]], Sequence[str]]]) -> Dict[str, Any]:
+        """
+        Bring the index in line with the current nodes.
+
+        Args:
+            rows: (neo4j id, labels, [[field, value], ...], tags) of every searchable node
+
+        Returns:
+            Counts of added, removed and unchanged nodes
+        """
+        started = time.perf_counter()
+        current: Dict[int, Tuple] = {}
+        fingerprints: Dict[int, str] = {}
+        for row in rows:
+            current[row[0]] = row
+            fingerprints[row[0]] = self.fingerprint(row)
+        with self._update_lock:
+            # Only updates change the fingerprints, so they're read without blocking searches
+            changed = [node_id for node_id, fp in fingerprints.items() if self._fingerprints.get(node_id) != fp]
+            removed = [node_id for node_id in self._fingerprints if node_id not in current]
+            unchanged = len(current) - len(changed)
+            replaced = removed + [node_id for node_id in changed if node_id in self._fingerprints]
+            dead = self._dead + sum(len(self._node_values[node_id]) for node_id in replaced)
+            if (len(changed) + len(removed) > INCREMENTAL_CHANGES
+                    or dead > COMPACT_DEAD_FRACTION * max(1, len(self._values))):
+                fresh = SearchIndex()
+                for node_id in current:
+                    fresh._add(current[node_id], fingerprints[node_id])
+                with self._lock:
+                    for name in STATE:
+                        setattr(self, name, getattr(fresh, name))
+            else:
+                with self._lock:
+                    for node_id in replaced:
+                        self._remove(node_id)
+                    for node_id in changed:
+                        self._add(current[node_id], fingerprints[node_id])
+                    self._label_masks.clear()
+            self.built_at = time.time()
+            self.last_update = {
+                "added": len(changed),
+                "removed": len(removed),
+                "unchanged": unchanged,
+                "seconds": round(time.perf_counter() - started, 4)
+            }
+            return self.last_update
+
+    def _add(self, row: Tuple, fingerprint: str):
+        node_id, labels, fields, tags = row
+        slot = len(self._node_ids)
+        self._node_ids.append(node_id)
+        self._node_labels.append(list(labels))
+        self._node_properties.append({field: value for field, value in fields})
+        self._node_alive.append(1)
+        self._slots[node_id] = slot
+        self._fingerprints[node_id] = fingerprint
+        self._rows[node_id] = row
+        value_ids = []
+        for field, value in [*fields, *(("tag", tag) for tag in tags)]:
+            if not value:
+                continue
+            value_id = len(self._values)
+            grams = trigrams(value)
+            for gram in grams:
+                postings = self._postings.get(gram)
+                if postings is None:
+                    postings = self._postings[gram] = array("i")
+                postings.append(value_id)
+            self._values.append(value)
+            self._lower.append(value.lower())
+            self._fields.append(field)
+            self._value_node.append(slot)
+            self._value_grams.append(len(grams))
+            self._alive.append(1)
+            value_ids.append(value_id)
+        self._node_values[node_id] = value_ids
+
+    def _remove(self, node_id: int):
+        for value_id in self._node_values.pop(node_id, []):
+            self._alive[value_id] = 0
+            self._dead += 1
+        self._node_alive[self._slots.pop(node_id)] = 0
+        self._fingerprints.pop(node_id, None)
+        self._rows.pop(node_id, None)
+
+    def search(self, query: str, limit: int = 20, labels: Sequence[str] = (), min_score: float = 0.3) -> List[Dict[str, Any]]:
+        """
+        Nodes whose searchable values best match query, best first.
+
+        Args:
+            query: Text to look for; any part of a name, ARN, id or tag
+            limit: Nodes returned at most
+            labels: Only return nodes with one of these labels
+            min_score: Lowest score returned
+
+        Returns:
+            One hit per node with the best matching field, value and score
+        """
+        needle = query.strip().lower()
+        if not needle:
+            return []
+        grams = trigrams(needle)
+        with self._lock:
+            postings = sorted((self._postings[gram] for gram in grams if gram in self._postings), key=len)
+            if not postings:
+                return []
+            # Trigrams like "arn" or "-pr" are in most values; the rarest ones
+            # pick the candidates and every candidate is scored exactly below
+            rare, total = [], 0
+            for p in postings:
+                if rare and total + len(p) > HIT_BUDGET:
+                    break
+                rare.append(p)
+                total += len(p)
+            hits = np.concatenate([np.frombuffer(p, dtype=np.int32) for p in rare])
+            if len(hits) > len(self._values) // 8:
+                counts = np.bincount(hits, minlength=len(self._values))
+                value_ids = np.flatnonzero(counts)
+                counts = counts[value_ids]
+            else:
+                value_ids, counts = np.unique(hits, return_counts=True)
+            keep = np.frombuffer(self._alive, dtype=np.uint8)[value_ids].astype(bool)
+            if labels:
+                slots = np.frombuffer(self._value_node, dtype=np.int32)[value_ids]
+                keep &= self._label_mask(labels)[slots]
+            value_ids, counts = value_ids[keep], counts[keep]
+            candidates = min(len(value_ids), max(limit * 10, CANDIDATES))
+            if candidates < len(value_ids):
+                grams_per_value = np.frombuffer(self._value_grams, dtype=np.int32)[value_ids]
+                estimate = counts / (len(rare) + grams_per_value)
+                value_ids = value_ids[np.argpartition(-estimate, candidates - 1)[:candidates]]
+            best: Dict[int, Dict[str, Any]] = {}
+            for value_id in value_ids.tolist():
+                lower = self._lower[value_id]
+                score = 2.0 * len(grams & trigrams(lower)) / (len(grams) + self._value_grams[value_id])
+                if lower == needle:
+                    score += 1.0
+                elif needle in lower:
+                    score += 0.5 if lower.startswith(needle) else 0.3
+                if score < min_score:
+                    continue
+                slot = self._value_node[value_id]
+                if slot not in best or score > best[slot]["score"]:
+                    best[slot] = {
+                        "id": self._node_ids[slot],
+                        "labels": self._node_labels[slot],
+                        "properties": self._node_properties[slot],
+                        "field": self._fields[value_id],
+                        "value": self._values[value_id],
+                        "score": round(score, 4)
+                    }
+        return sorted(best.values(), key=lambda hit: (-hit["score"], len(hit["value"])))[:limit]
+
+    def _label_mask(self, labels: Sequence[str]) -> np.ndarray:
+        """Node slots with any of labels; computed once per update and label set."""
+        key = tuple(sorted(labels))
+        mask = self._label_masks.get(key)
+        if mask is None:
+            wanted = set(labels)
+            mask = np.fromiter((not wanted.isdisjoint(node_labels) for node_labels in self._node_labels),
+                               dtype=bool, count=len(self._node_labels))
+            self._label_masks[key] = mask
+        return mask
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "nodes": self.node_count,
+            "values": self.value_count,
+            "dead_values": self._dead,
+            "trigrams": len(self._postings),
+            "built_at": self.built_at,
+            "last_update": self.last_update
+        }
\ No newline at end of file
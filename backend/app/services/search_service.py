@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.models.search import SearchIndexInfo
+from app.services.job_service import Job, JobService
+from app.services.metrics import SEARCH_INDEX_BUILD_SECONDS
+from app.services.neo4j_service import Neo4jService
+from app.services.view_service import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+# Words naming kinds of resources or their qualities rather than one resource
+SCHEMA_WORDS = {
+    "access", "account", "accounts", "admin", "allow", "allows", "arn", "attached", "aws", "belong", "belongs",
+    "bucket", "buckets", "connected", "ec2", "exposed", "group", "groups", "iam", "inbound", "instance",
+    "instances", "internet", "named", "open", "policies", "policy", "port", "ports", "private", "public", "reach",
+    "region", "related", "relationships", "role", "roles", "rule", "rules", "running", "s3", "security", "sg",
+    "stopped", "tag", "tagged", "tags", "uses", "vpc", "vpcs"
+}
+QUOTED = re.compile(r"[\"'`]([^\"'`]{2,})[\"'`]")
+WORD = re.compile(r"[A-Za-z0-9][A-Za-z0-9._:/@+=-]*[A-Za-z0-9]")
+
+def mention_candidates(question: str) -> List[str]:
+    """Parts of a question that may name a resource: quoted text and words that aren't schema vocabulary."""
+    candidates = QUOTED.findall(question)
+    remainder = QUOTED.sub(" ", question)
+    for word in WORD.findall(remainder):
+        lower = word.lower()
+        if len(lower) >= 3 and lower not in STOPWORDS and lower not in SCHEMA_WORDS:
+            candidates.append(word)
+    return list(dict.fromkeys(candidates))
+
+class SearchService:
+    def __init__(self, neo4j_service: Callable[[], Neo4jService], job_service: JobService, target_graph: str,
+                 mention_min_score: float = 0.8):
+        """
+        Keep a fuzzy search index of the graph's resource names, ARNs, ids and tags.
+
+        The index is updated after every job on the graph with the nodes
+        that changed, and built on first use.
+
+        Args:
+            neo4j_service: Returns the Neo4j service; called on first refresh
+            job_service: Job runner whose finished jobs trigger updates
+            target_graph: Graph whose nodes are indexed
+            mention_min_score: Lowest score at which a word of a question is
+                taken to name a resource for the translator
+        """
+        self._neo4j_service = neo4j_service
+        self.job_service = job_service
+        self.target_graph = target_graph
+        self.mention_min_score = mention_min_score
+        self.index = None
+        self._generation: Optional[str] = None
+        self._error = ""
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        job_service.add_listener(self.on_job_finished)
+
+    def generation(self) -> Optional[str]:
+        return self.job_service.graph_generation(self.target_graph)
+
+    def is_fresh(self) -> bool:
+        return self.index is not None and self._generation == self.generation()
+
+    def status(self) -> SearchIndexInfo:
+        stats = self.index.stats() if self.index is not None else {}
+        return SearchIndexInfo(loaded=self.index is not None, generation=self._generation or "",
+                               fresh=self.is_fresh(), error=self._error, **stats)
+
+    def _read_rows(self) -> List[Tuple]:
+        from app.services.search_index import SEARCH_FIELDS, SEARCH_QUERY
+        with self._neo4j_service().driver.session() as session:
+            return [
+                (record["id"], tuple(record["labels"]), tuple(map(tuple, record["fields"])), tuple(record["tags"]))
+                for record in session.run(SEARCH_QUERY, fields=SEARCH_FIELDS)
+            ]
+
+    async def get(self, allow_stale: bool = False):
+        """
+        The index for the current graph, updated first if stale.
+
+        Args:
+            allow_stale: Return the last index while a job is changing the graph
+
+        Returns:
+            The index, or None when it can't be built now
+        """
+        generation = self.generation()
+        if self.index is not None and self._generation == generation:
+            return self.index
+        if generation is None or (allow_stale and self.index is not None and self._lock.locked()):
+            return self.index if allow_stale else None
+        await self.refresh()
+        return self.index
+
+    async def refresh(self) -> Dict[str, Any]:
+        async with self._lock:
+            generation = self.generation()
+            if generation is None:
+                return {"status": "error", "message": "A job is changing the graph; the index is updated after it"}
+            if self.index is not None and self._generation == generation:
+                return {"status": "success", "message": "Index is up to date"}
+            from app.services.search_index import SearchIndex
+            started = time.perf_counter()
+            try:
+                rows = await asyncio.to_thread(self._read_rows)
+                index = self.index if self.index is not None else SearchIndex()
+                update = await asyncio.to_thread(index.update, rows)
+            except Exception as e:
+                logger.error(f"Updating search index failed: {str(e)}")
+                self._error = str(e)
+                return {"status": "error", "message": f"Updating search index failed: {str(e)}"}
+            seconds = time.perf_counter() - started
+            SEARCH_INDEX_BUILD_SECONDS.observe(seconds)
+            self.index = index
+            # A job that ran meanwhile may have changed what was read
+            self._generation = generation if self.generation() == generation else ""
+            self._error = ""
+            return {"status": "success", "message": "Index updated", **update, "seconds": round(seconds, 4)}
+
+    def on_job_finished(self, job: Job):
+        if job.info.target_graph != self.target_graph:
+            return
+        self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
+
+    def resolve_mentions(self, question: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Resources named in a question, for the translator to filter on exact ids.
+
+        Only uses an index that is already loaded. Searches wait for small
+        index edits, so callers on the event loop run this in a thread.
+        """
+        index = self.index
+        if index is None:
+            return []
+        mentions = []
+        for candidate in mention_candidates(question):
+            hits = index.search(candidate, limit=1, min_score=self.mention_min_score)
+            if hits:
+                mentions.append({"mention": candidate, **hits[0]})
+            if len(mentions) >= limit:
+                break
+        return mentions
\ No newline at end of file
@@ -0,0 +1,230 @@
+import argparse
+import gzip
+import json
+import os
+import time
+import logging
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from app.services.bulk_loader import BulkLoader, GraphBatch
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "cloud-cartography-snapshot"
+SNAPSHOT_VERSION = 2
+# Version 1 snapshots have no label lists and are still read
+READABLE_VERSIONS = (1, 2)
+MANIFEST_NAME = "manifest.json"
+
+def write_snapshot(batch: GraphBatch, path: str, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Write a batch as an inventory snapshot.
+
+    A snapshot is a directory with a manifest and one gzip compressed JSON
+    lines file per label and per relationship group. Column names are stored
+    once in the manifest and every line is a JSON array of values, so files
+    stay compact and can be streamed back chunk by chunk. Node files of labels
+    whose nodes carry further labels start every line with the list of them.
+
+    Args:
+        batch: Nodes and relationships to write
+        path: Snapshot directory, created if missing
+        metadata: Extra information stored in the manifest (source, targets, ...)
+
+    Returns:
+        The manifest
+    """
+    os.makedirs(path, exist_ok=True)
+    files = []
+
+    for label, nodes in batch.nodes.items():
+        key = batch.key_for(label)
+        rows = list(nodes.values())
+        columns = [key] + sorted({name for row in rows for name in row} - {key})
+        extra_labels = bool(batch.extra_labels.get(label))
+        name = f"nodes_{label}.jsonl.gz"
+        _write_lines(os.path.join(path, name), (
+            ([list(batch.labels_of(label, row[key]))] if extra_labels else []) + [row.get(c) for c in columns]
+            for row in rows
+        ))
+        files.append({"kind": "nodes", "label": label, "key": key, "path": name,
+                      "columns": columns, "extra_labels": extra_labels, "rows": len(rows)})
+
+    for (rel_type, start_label, end_label), rels in batch.relationships.items():
+        columns = sorted({name for _, _, props in rels for name in props})
+        name = f"rels_{rel_type}_{start_label}_{end_label}.jsonl.gz"
+        _write_lines(os.path.join(path, name), (
+            [start, end] + [props.get(c) for c in columns] for start, end, props in rels
+        ))
+        files.append({"kind": "relationships", "type": rel_type, "start_label": start_label,
+                      "end_label": end_label, "path": name, "columns": columns, "rows": len(rels)})
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "created_at": time.time(),
+        "node_keys": {label: batch.key_for(label) for label in batch.nodes},
+        "nodes": batch.node_count,
+        "relationships": batch.relationship_count,
+        "metadata": metadata or {},
+        "files": files
+    }
+    with open(os.path.join(path, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"{path} is not an inventory snapshot")
+    if manifest.get("version") not in READABLE_VERSIONS:
+        raise ValueError(f"Unsupported snapshot version: {manifest.get('version')}")
+    return manifest
+
+def iter_snapshot_chunks(path: str, chunk_size: int = 100000) -> Iterator[GraphBatch]:
+    """
+    Stream a snapshot as batches of at most chunk_size rows.
+
+    All node files are read before any relationship file, so relationship
+    endpoints already exist when their chunk is loaded. Only one chunk is held
+    in memory at a time.
+    """
+    manifest = read_manifest(path)
+    node_keys = manifest["node_keys"]
+    ordered = [f for f in manifest["files"] if f["kind"] == "nodes"] + \
+              [f for f in manifest["files"] if f["kind"] == "relationships"]
+
+    for entry in ordered:
+        columns = entry["columns"]
+        batch = GraphBatch(node_keys)
+        rows_in_batch = 0
+        for values in _read_lines(os.path.join(path, entry["path"])):
+            if entry["kind"] == "nodes":
+                labels = values.pop(0) if entry.get("extra_labels") else ()
+                batch.add_node(entry["label"], {c: v for c, v in zip(columns, values) if v is not None}, labels)
+            else:
+                props = {c: v for c, v in zip(columns, values[2:]) if v is not None}
+                batch.add_relationship(entry["type"], entry["start_label"], values[0],
+                                       entry["end_label"], values[1], props)
+            rows_in_batch += 1
+            if rows_in_batch >= chunk_size:
+                yield batch
+                batch = GraphBatch(node_keys)
+                rows_in_batch = 0
+        if rows_in_batch:
+            yield batch
+
+def replay_snapshot(path: str, loader: BulkLoader, mode: str = "auto", chunk_size: int = 100000) -> Dict[str, Any]:
+    """
+    Load a snapshot into Neo4j through the bulk loader.
+
+    Args:
+        path: Snapshot directory
+        loader: Loader to write with
+        mode: BulkLoader mode used for every chunk. "auto" picks the path from
+            the total snapshot size rather than per chunk
+        chunk_size: Rows read and loaded per chunk
+
+    Returns:
+        Dictionary with row counts and timings
+    """
+    manifest = read_manifest(path)
+    if mode == "auto":
+        total_rows = manifest["nodes"] + manifest["relationships"]
+        mode = "load_csv" if total_rows >= loader.min_bulk_rows and loader.import_dir else "transactional"
+
+    started = time.monotonic()
+    if mode == "admin_import":
+        # The offline importer needs every file at once, so the snapshot is materialized
+        batch = GraphBatch(manifest["node_keys"])
+        for chunk in iter_snapshot_chunks(path, chunk_size):
+            batch.merge(chunk)
+        chunks = [loader.load(batch, mode=mode)]
+    else:
+        chunks = [loader.load(chunk, mode=mode) for chunk in iter_snapshot_chunks(path, chunk_size)]
+
+    seconds = time.monotonic() - started
+    return {
+        "status": "success",
+        "mode": mode,
+        "nodes": manifest["nodes"],
+        "relationships": manifest["relationships"],
+        "chunks": len(chunks),
+        "seconds": round(seconds, 4),
+        "rows_per_second": round((manifest["nodes"] + manifest["relationships"]) / seconds) if seconds else None
+    }
+
+def export_graph(neo4j_service, path: str, node_keys: Optional[Dict[str, str]] = None,
+                 fetch_size: int = 10000) -> Dict[str, Any]:
+    """
+    Write the current Neo4j graph (e.g. after a Cartography run) as a snapshot.
+
+    Every node keeps all of its labels. It is keyed on the first of its sorted
+    labels that has an entry in node_keys, or on "id" under its first sorted
+    label when none has. Nodes without their key property, and relationships
+    touching them, are skipped.
+    """
+    batch = GraphBatch(node_keys or {})
+    key_by_node: Dict[int, Tuple[str, Any]] = {}
+    with neo4j_service.driver.session(fetch_size=fetch_size) as session:
+        for record in session.run("MATCH (n) RETURN id(n) AS node_id, labels(n) AS labels, properties(n) AS props"):
+            labels = sorted(record["labels"])
+            if not labels:
+                continue
+            label = _key_label(labels, batch.node_keys)
+            props = record["props"]
+            key = props.get(batch.key_for(label))
+            if key is None:
+                continue
+            batch.add_node(label, props, labels)
+            key_by_node[record["node_id"]] = (label, key)
+
+        for record in session.run(
+            "MATCH (a)-[r]->(b) RETURN id(a) AS start, id(b) AS end, type(r) AS type, properties(r) AS props"
+        ):
+            start = key_by_node.get(record["start"])
+            end = key_by_node.get(record["end"])
+            if start is None or end is None:
+                continue
+            batch.add_relationship(record["type"], start[0], start[1], end[0], end[1], record["props"])
+
+    return write_snapshot(batch, path, metadata={"source": "neo4j_export", "uri": neo4j_service.uri})
+
+def _key_label(labels: List[str], node_keys: Dict[str, str]) -> str:
+    """Label a node is keyed on, independent of the order Neo4j lists labels in."""
+    return next((label for label in labels if label in node_keys), labels[0])
+
+def _write_lines(path: str, rows) -> None:
+    with gzip.open(path, "wt", compresslevel=6) as f:
+        for row in rows:
+            f.write(json.dumps(row, separators=(",", ":"), default=str))
+            f.write("\n")
+
+def _read_lines(path: str) -> Iterator[List[Any]]:
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            yield json.loads(line)
+
+if __name__ == "__main__":
+    from app.dependencies import get_bulk_loader, get_neo4j_service
+
+    parser = argparse.ArgumentParser(description="Inventory snapshot tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    replay_parser = subparsers.add_parser("replay", help="Load a snapshot into Neo4j")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--mode", default="auto")
+    replay_parser.add_argument("--chunk-size", type=int, default=100000)
+    replay_parser.add_argument("--clear", action="store_true", help="Delete the existing graph first")
+    export_parser = subparsers.add_parser("export", help="Write the current graph to a snapshot")
+    export_parser.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "replay":
+        loader = get_bulk_loader()
+        if args.clear:
+            loader.neo4j_service.execute_query("MATCH (n) DETACH DELETE n")
+        result = replay_snapshot(args.path, loader, mode=args.mode, chunk_size=args.chunk_size)
+    else:
+        manifest = export_graph(get_neo4j_service(), args.path)
+        result = {"status": "success", "nodes": manifest["nodes"], "relationships": manifest["relationships"]}
+    print(json.dumps(result, indent=2))
\ No newline at end of file
@@ -0,0 +1,367 @@
+import asyncio
+import bisect
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from app.services.job_service import Job, JobService
+from app.services.neo4j_service import Neo4jService
+from app.services.view_service import STOPWORDS, MaterializedView
+from app.utils.cypher_templates import INTENT_TEMPLATES, RELATIONSHIP_TEMPLATES, RESOURCE_TEMPLATES
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_NAMES_QUERY = """
+MATCH (n)
+WITH n, coalesce(n.name, n.bucketname) AS name
+WHERE name IS NOT NULL
+RETURN DISTINCT toString(name) AS name, labels(n)[0] AS label
+LIMIT $limit
+"""
+RESOURCES_TABLE = """
+CREATE TABLE IF NOT EXISTS {table} (
+    name TEXT PRIMARY KEY,
+    label TEXT
+)
+"""
+# Resource names written per transaction, so question writes can go in between
+RESOURCE_CHUNK = 5000
+# Past questions are evicted down to this fraction of the maximum, so rebuilds stay rare
+EVICT_TO = 0.9
+# Ranking weight of suggestions that weren't asked before; one past ask outweighs them
+KIND_WEIGHTS = {"view": 0.9, "template": 0.5}
+SPACES = re.compile(r"\s+")
+
+def normalize(text: str) -> str:
+    return SPACES.sub(" ", text.strip().lower())
+
+def as_question(description: str) -> str:
+    # "Public S3 buckets" -> "Show public S3 buckets", but "EC2 instances" keeps its case
+    if description[1:2].islower():
+        description = description[0].lower() + description[1:]
+    return f"Show {description}"
+
+class PrefixTrie:
+    def __init__(self, top: int = 10):
+        """
+        Character trie keeping the best entries of each prefix at its node, so
+        a lookup is one walk down the prefix with no search below it.
+
+        Args:
+            top: Entries kept per node; the most a lookup can return
+        """
+        self.top = top
+        self._children: List[Dict[str, int]] = [{}]
+        self._best: List[List[Tuple[float, str]]] = [[]]
+
+    def __len__(self) -> int:
+        return len(self._children)
+
+    def insert(self, key: str, text: str, weight: float):
+        """Add or re-rank the entry text under key; an existing ranking of text is replaced."""
+        node = 0
+        self._rank(node, text, weight)
+        for char in key:
+            child = self._children[node].get(char)
+            if child is None:
+                child = len(self._children)
+                self._children[node][char] = child
+                self._children.append({})
+                self._best.append([])
+            node = child
+            self._rank(node, text, weight)
+
+    def _rank(self, node: int, text: str, weight: float):
+        best = [entry for entry in self._best[node] if entry[1] != text]
+        if len(best) < self.top or weight > best[-1][0]:
+            best.append((weight, text))
+            best.sort(key=lambda entry: -entry[0])
+            del best[self.top:]
+        self._best[node] = best
+
+    def lookup(self, prefix: str) -> List[Tuple[float, str]]:
+        node = 0
+        for char in prefix:
+            node = self._children[node].get(char)
+            if node is None:
+                return []
+        return self._best[node]
+
+class SuggestService:
+    def __init__(self, path: str, neo4j_service: Callable[[], Neo4jService], job_service: JobService,
+                 target_graph: str, views: Iterable[MaterializedView] = (), max_resources: int = 50000,
+                 max_questions: int = 10000):
+        """
+        Typeahead suggestions for the query box.
+
+        Questions come from past successful queries ranked by how often they
+        were asked, from the materialized views and from the Cypher templates,
+        and sit in a prefix trie. Each is also keyed without its leading filler
+        words, so "public s3" finds "Show me all public S3 buckets". Resource
+        names complete the word being typed; they have no ranking, so a sorted
+        list searched with bisect holds them instead of trie nodes per name.
+
+        Past questions and resource names are stored in SQLite and loaded at
+        startup; resource names are re-read after every ingest. Questions are
+        written in the background, off the event loop. Beyond max_questions
+        the least asked are forgotten and the trie is rebuilt aside.
+
+        Args:
+            path: SQLite database file, or ":memory:"
+            neo4j_service: Returns the Neo4j service; called when resource names are refreshed
+            job_service: Job runner whose finished jobs trigger a refresh of resource names
+            target_graph: Graph the resource names are read from
+            views: Materialized views, suggested as questions
+            max_resources: Resource names kept at most
+            max_questions: Past questions kept at most
+        """
+        self.path = path
+        self._neo4j_service = neo4j_service
+        self.job_service = job_service
+        self.target_graph = target_graph
+        self.max_resources = max_resources
+        self.max_questions = max_questions
+        # Lookups only wait for in-memory updates, never for SQLite writes
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS questions (
+                normalized TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                last_asked REAL NOT NULL
+            );
+        """ + RESOURCES_TABLE.format(table="resources"))
+        self._trie = PrefixTrie()
+        self._kinds: Dict[str, str] = {}
+        self._texts: Dict[str, str] = {}
+        self._counts: Dict[str, int] = {}
+        self._asked_at: Dict[str, float] = {}
+        self._seeds: Dict[str, Tuple[str, str]] = {}
+        # Asks not yet written: normalized -> (text, asks, last asked)
+        self._unsaved: Dict[str, Tuple[str, int, float]] = {}
+        # Entries added while the trie is rebuilt aside, replayed into the new one
+        self._replay: Optional[List[Tuple[str, float]]] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        for description, kind in self._seed_questions(views):
+            self._seeds[normalize(description)] = (description, kind)
+            self._add(description, kind, KIND_WEIGHTS[kind])
+        rows = self._conn.execute(
+            "SELECT text, count, last_asked FROM questions ORDER BY count DESC, last_asked DESC LIMIT ?",
+            (max_questions,)
+        ).fetchall()
+        for text, count, last_asked in rows:
+            key = normalize(text)
+            self._counts[key] = count
+            self._asked_at[key] = last_asked
+            self._add(text, "history", count)
+        self._set_resources(self._conn.execute("SELECT name, label FROM resources").fetchall())
+        job_service.add_listener(self.on_job_finished)
+
+    @staticmethod
+    def _seed_questions(views: Iterable[MaterializedView]) -> List[Tuple[str, str]]:
+        # Views offer their canonical question, which maps back to the view rather than the LLM
+        seeds = [(view.question, "view") for view in views]
+        for templates in (INTENT_TEMPLATES, RESOURCE_TEMPLATES, RELATIONSHIP_TEMPLATES):
+            seeds.extend((as_question(template["description"]), "template") for template in templates.values())
+        return seeds
+
+    def _add(self, text: str, kind: str, weight: float):
+        # Entries are their normalized text; the latest spelling is shown
+        key = normalize(text)
+        with self._lock:
+            if self._kinds.get(key) == "history" and kind != "history":
+                return
+            self._kinds[key] = kind
+            self._texts[key] = text
+            self._index(self._trie, key, weight)
+            if self._replay is not None:
+                self._replay.append((key, weight))
+
+    @staticmethod
+    def _index(trie: PrefixTrie, key: str, weight: float):
+        trie.insert(key, key, weight)
+        words = key.split(" ")
+        # Also reachable from the first meaningful word ("show me all public ..." from "public")
+        start = 0
+        while start < len(words) - 1 and words[start] in STOPWORDS:
+            start += 1
+        if start:
+            trie.insert(" ".join(words[start:]), key, weight)
+
+    def _set_resources(self, rows: List[Tuple[str, Optional[str]]]):
+        resources = sorted((name.lower(), name, label) for name, label in rows if name)
+        with self._lock:
+            self._resource_keys = [key for key, _, _ in resources]
+            self._resources = [(name, label) for _, name, label in resources]
+
+    def record(self, question: str):
+        """
+        Count a successful question so it ranks higher next time. Must be called
+        from the event loop; the write to SQLite happens in the background.
+        """
+        text = SPACES.sub(" ", question.strip())
+        if not text:
+            return
+        key = normalize(text)
+        now = time.time()
+        with self._lock:
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+            self._asked_at[key] = now
+            _, asks, _ = self._unsaved.get(key, (text, 0, now))
+            self._unsaved[key] = (text, asks + 1, now)
+        self._add(text, "history", count)
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self):
+        # One writer at a time; asks arriving meanwhile go out with the next batch
+        try:
+            while True:
+                with self._lock:
+                    batch, self._unsaved = self._unsaved, {}
+                if not batch:
+                    return
+                await asyncio.to_thread(self._store_questions, batch)
+                if len(self._counts) > self.max_questions:
+                    await asyncio.to_thread(self._evict)
+        except Exception as e:
+            logger.error(f"Saving asked questions failed: {str(e)}")
+        finally:
+            self._flush_task = None
+
+    def _store_questions(self, batch: Dict[str, Tuple[str, int, float]]):
+        with self._db_lock:
+            self._conn.executemany(
+                "INSERT INTO questions (normalized, text, count, last_asked) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(normalized) DO UPDATE SET count = count + excluded.count, text = excluded.text, "
+                "last_asked = excluded.last_asked",
+                [(key, text, asks, last_asked) for key, (text, asks, last_asked) in batch.items()]
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        """Forget the least asked questions and rebuild the trie without them. Blocking."""
+        keep = int(self.max_questions * EVICT_TO)
+        with self._lock:
+            ranked = sorted(self._counts, key=lambda key: (self._counts[key], self._asked_at[key]), reverse=True)
+            evicted = ranked[keep:]
+            for key in evicted:
+                del self._counts[key]
+                del self._asked_at[key]
+            entries = [(key, KIND_WEIGHTS[kind]) for key, (_, kind) in self._seeds.items()]
+            entries.extend((key, self._counts[key]) for key in ranked[:keep])
+            self._replay = []
+        # Lookups keep using the old trie meanwhile
+        trie = PrefixTrie(self._trie.top)
+        for key, weight in entries:
+            self._index(trie, key, weight)
+        with self._lock:
+            for key, weight in self._replay:
+                self._index(trie, key, weight)
+            self._replay = None
+            self._trie = trie
+            for key in evicted:
+                if key in self._counts:
+                    continue
+                if key in self._seeds:
+                    self._texts[key], self._kinds[key] = self._seeds[key]
+                else:
+                    self._kinds.pop(key, None)
+                    self._texts.pop(key, None)
+        with self._db_lock:
+            self._conn.execute(
+                "DELETE FROM questions WHERE normalized NOT IN "
+                "(SELECT normalized FROM questions ORDER BY count DESC, last_asked DESC LIMIT ?)",
+                (keep,)
+            )
+            self._conn.commit()
+        logger.info(f"Forgot {len(evicted)} rarely asked questions")
+
+    def top_questions(self, limit: int) -> List[str]:
+        """The past questions asked most often."""
+        with self._lock:
+            keys = sorted(self._counts, key=self._counts.get, reverse=True)[:limit]
+            return [self._texts[key] for key in keys]
+
+    def suggest(self, prefix: str, limit: int = 8) -> Dict[str, Any]:
+        """
+        Completions of what was typed so far, best first.
+
+        Args:
+            prefix: Text in the query box
+            limit: Suggestions returned at most
+
+        Returns:
+            Question completions followed by completions of the last word with resource names
+        """
+        started = time.perf_counter()
+        key = normalize(prefix)
+        suggestions = []
+        if key:
+            with self._lock:
+                matches = self._trie.lookup(key)[:limit]
+                suggestions = [{"text": self._texts[entry], "kind": self._kinds[entry], "score": round(weight, 3)}
+                               for weight, entry in matches]
+                # Complete the word being typed with resource names
+                head, _, word = prefix.rpartition(" ")
+                word_key = word.lower()
+                if len(word_key) >= 2 and len(suggestions) < limit:
+                    first = bisect.bisect_left(self._resource_keys, word_key)
+                    last = bisect.bisect_right(self._resource_keys, word_key + "\uffff", first)
+                    for name, label in self._resources[first:min(last, first + limit - len(suggestions))]:
+                        suggestions.append({"text": f"{head} {name}".lstrip(), "kind": "resource", "score": 0.0,
+                                            "label": label})
+        return {"prefix": prefix, "suggestions": suggestions, "seconds": round(time.perf_counter() - started, 6)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "questions": len(self._kinds),
+            "asked": len(self._counts),
+            "trie_nodes": len(self._trie),
+            "resources": len(self._resources)
+        }
+
+    def _read_resources(self) -> List[Tuple[str, Optional[str]]]:
+        with self._neo4j_service().driver.session() as session:
+            return [(record["name"], record["label"])
+                    for record in session.run(RESOURCE_NAMES_QUERY, limit=self.max_resources)]
+
+    def _store_resources(self, rows: List[Tuple[str, Optional[str]]]):
+        # Filled aside in chunks and swapped in, so question writes never wait for the whole list
+        with self._db_lock:
+            self._conn.executescript(
+                "DROP TABLE IF EXISTS resources_next;" + RESOURCES_TABLE.format(table="resources_next")
+            )
+        for start in range(0, len(rows), RESOURCE_CHUNK):
+            with self._db_lock:
+                self._conn.executemany("INSERT OR IGNORE INTO resources_next (name, label) VALUES (?, ?)",
+                                       rows[start:start + RESOURCE_CHUNK])
+                self._conn.commit()
+        with self._db_lock:
+            self._conn.executescript(
+                "BEGIN; DROP TABLE resources; ALTER TABLE resources_next RENAME TO resources; COMMIT;"
+            )
+
+    async def refresh_resources(self) -> int:
+        """Re-read resource names from the graph; returns how many are suggested."""
+        try:
+            rows = await asyncio.to_thread(self._read_resources)
+            await asyncio.to_thread(self._store_resources, rows)
+        except Exception as e:
+            logger.error(f"Refreshing resource name suggestions failed: {str(e)}")
+            return len(self._resources)
+        self._set_resources(rows)
+        return len(self._resources)
+
+    def on_job_finished(self, job: Job):
+        if job.info.target_graph != self.target_graph:
+            return
+        self._refresh_task = asyncio.get_running_loop().create_task(self.refresh_resources())
@@ -0,0 +1,197 @@
+import argparse
+import json
+import random
+from typing import Dict, Any, List
+from app.models.synthetic import SyntheticEstateOptions
+from app.services.bulk_loader import LOAD_MODES, GraphBatch
+
+REGIONS = ["us-east-1", "us-east-2", "us-west-2", "eu-west-1", "eu-central-1", "ap-southeast-2"]
+INSTANCE_TYPES = ["t3.micro", "t3.medium", "m5.large", "m5.xlarge", "c5.2xlarge", "r5.large"]
+RULE_PORTS = [(22, 22, "tcp"), (80, 80, "tcp"), (443, 443, "tcp"), (3306, 3306, "tcp"),
+              (5432, 5432, "tcp"), (6379, 6379, "tcp"), (0, 65535, "tcp"), (53, 53, "udp")]
+MANAGED_POLICIES = [
+    ("AmazonS3ReadOnlyAccess", "arn:aws:iam::aws:policy/AmazonS3ReadOnlyAccess"),
+    ("AmazonEC2ReadOnlyAccess", "arn:aws:iam::aws:policy/AmazonEC2ReadOnlyAccess"),
+    ("CloudWatchAgentServerPolicy", "arn:aws:iam::aws:policy/CloudWatchAgentServerPolicy"),
+    ("AmazonSSMManagedInstanceCore", "arn:aws:iam::aws:policy/AmazonSSMManagedInstanceCore"),
+    ("AmazonDynamoDBFullAccess", "arn:aws:iam::aws:policy/AmazonDynamoDBFullAccess"),
+]
+ADMIN_POLICY = ("AdminPolicy", "arn:aws:iam::aws:policy/AdministratorAccess")
+DEGREE_DISTRIBUTIONS = ("fixed", "exponential", "powerlaw")
+
+class SyntheticEstateGenerator:
+    def __init__(self, options: SyntheticEstateOptions):
+        """
+        Generate a synthetic AWS estate in the Cartography schema used by
+        CartographyService.run_sample_data_load.
+
+        The same options (including the seed) always produce the same graph,
+        also when generate() is called again.
+
+        Args:
+            options: Size, degree distribution and exposure knobs
+        """
+        if options.degree_distribution not in DEGREE_DISTRIBUTIONS:
+            raise ValueError(f"Unknown degree distribution: {options.degree_distribution}")
+        self.options = options
+
+    def generate(self) -> GraphBatch:
+        """
+        Build the estate.
+
+        Returns:
+            GraphBatch keyed on "id" for every label
+        """
+        o = self.options
+        self.rng = random.Random(o.seed)
+        batch = GraphBatch({})
+
+        for a in range(o.accounts):
+            account_number = f"{100000000000 + a * 7919:012d}"
+            account_id = f"acct-{a}"
+            batch.add_node("AWSAccount", {"id": account_id, "name": f"Synthetic Account {a}",
+                                          "accountid": account_number})
+
+            policy_ids = self._add_policies(batch, a)
+            role_ids = self._add_roles(batch, a, account_id, account_number, policy_ids)
+            self._add_buckets(batch, a, account_id)
+
+            for v in range(o.vpcs_per_account):
+                region = REGIONS[(a + v) % len(REGIONS)]
+                vpc_id = f"vpc-{a:04x}{v:04x}"
+                batch.add_node("AWSVpc", {"id": vpc_id, "name": f"vpc-{a}-{v}", "vpcid": vpc_id,
+                                          "cidr_block": f"10.{v % 256}.0.0/16", "region": region})
+                batch.add_relationship("RESOURCE_OF", "AWSVpc", vpc_id, "AWSAccount", account_id)
+
+                group_ids = self._add_security_groups(batch, a, v, account_id, vpc_id)
+                self._add_instances(batch, a, v, account_id, vpc_id, region, group_ids, role_ids)
+
+        return batch
+
+    def _count(self, mean: float) -> int:
+        """Draw a child count with the configured distribution and the given mean."""
+        if mean <= 0:
+            return 0
+        distribution = self.options.degree_distribution
+        if distribution == "fixed":
+            return int(round(mean))
+        if distribution == "exponential":
+            return int(round(self.rng.expovariate(1.0 / mean)))
+        # Pareto with alpha 2 has mean 2 * xm, so xm = mean / 2 keeps the requested mean
+        return int(round(mean / 2 * self.rng.paretovariate(2.0)))
+
+    def _add_policies(self, batch: GraphBatch, a: int) -> List[str]:
+        policy_ids = []
+        for name, arn in [ADMIN_POLICY] + MANAGED_POLICIES:
+            policy_id = f"policy-{a}-{name}"
+            batch.add_node("IAMPolicy", {"id": policy_id, "name": name, "policyname": name, "arn": arn})
+            policy_ids.append(policy_id)
+        return policy_ids
+
+    def _add_roles(self, batch: GraphBatch, a: int, account_id: str, account_number: str,
+                   policy_ids: List[str]) -> List[str]:
+        o = self.options
+        admin_policy, managed = policy_ids[0], policy_ids[1:]
+        role_ids = []
+        for r in range(max(1, self._count(o.roles_per_account))):
+            role_name = f"role-{a}-{r}"
+            role_id = f"role-{a}-{r}"
+            batch.add_node("IAMRole", {"id": role_id, "name": role_name, "rolename": role_name,
+                                       "arn": f"arn:aws:iam::{account_number}:role/{role_name}"})
+            batch.add_relationship("RESOURCE_OF", "IAMRole", role_id, "AWSAccount", account_id)
+
+            if self.rng.random() < o.admin_role_fraction:
+                batch.add_relationship("HAS_POLICY", "IAMRole", role_id, "IAMPolicy", admin_policy)
+            attached = min(len(managed), self._count(o.policies_per_role))
+            for policy_id in self.rng.sample(managed, attached):
+                batch.add_relationship("HAS_POLICY", "IAMRole", role_id, "IAMPolicy", policy_id)
+            role_ids.append(role_id)
+        return role_ids
+
+    def _add_buckets(self, batch: GraphBatch, a: int, account_id: str):
+        o = self.options
+        for b in range(self._count(o.buckets_per_account)):
+            name = f"synthetic-{a}-bucket-{b}"
+            props: Dict[str, Any] = {"id": f"s3-{a}-{b}", "name": name, "bucketname": name,
+                                     "region": REGIONS[b % len(REGIONS)], "created": "2023-01-01"}
+            if self.rng.random() < o.public_bucket_fraction:
+                props["public"] = True
+            batch.add_node("S3Bucket", props)
+            batch.add_relationship("RESOURCE_OF", "S3Bucket", props["id"], "AWSAccount", account_id)
+
+    def _add_security_groups(self, batch: GraphBatch, a: int, v: int, account_id: str, vpc_id: str) -> List[str]:
+        o = self.options
+        group_ids = []
+        for g in range(max(1, self._count(o.security_groups_per_vpc))):
+            group_id = f"sg-{a:04x}{v:04x}{g:05x}"
+            batch.add_node("EC2SecurityGroup", {"id": group_id, "name": f"sg-{a}-{v}-{g}", "groupid": group_id,
+                                                "description": f"Synthetic security group {g}"})
+            batch.add_relationship("RESOURCE_OF", "EC2SecurityGroup", group_id, "AWSAccount", account_id)
+            batch.add_relationship("MEMBER_OF_VPC", "EC2SecurityGroup", group_id, "AWSVpc", vpc_id)
+
+            for r in range(self._count(o.rules_per_security_group)):
+                fromport, toport, protocol = self.rng.choice(RULE_PORTS)
+                if self.rng.random() < o.open_rule_fraction:
+                    cidr = "0.0.0.0/0"
+                else:
+                    cidr = f"10.{self.rng.randrange(256)}.{self.rng.randrange(256)}.0/24"
+                rule_id = f"sgr-{group_id[3:]}-{r}"
+                batch.add_node("EC2SecurityGroupRule", {"id": rule_id, "ruleid": rule_id, "protocol": protocol,
+                                                        "fromport": fromport, "toport": toport, "cidr_block": cidr})
+                batch.add_relationship("HAS_INBOUND_RULE", "EC2SecurityGroup", group_id,
+                                       "EC2SecurityGroupRule", rule_id)
+            group_ids.append(group_id)
+        return group_ids
+
+    def _add_instances(self, batch: GraphBatch, a: int, v: int, account_id: str, vpc_id: str, region: str,
+                       group_ids: List[str], role_ids: List[str]):
+        o = self.options
+        for i in range(self._count(o.instances_per_vpc)):
+            instance_id = f"i-{a:04x}{v:04x}{i:07x}"
+            batch.add_node("EC2Instance", {
+                "id": instance_id,
+                "name": f"instance-{a}-{v}-{i}",
+                "instanceid": instance_id,
+                "instancetype": self.rng.choice(INSTANCE_TYPES),
+                "region": region,
+                "state": "stopped" if self.rng.random() < o.stopped_instance_fraction else "running"
+            })
+            batch.add_relationship("RESOURCE_OF", "EC2Instance", instance_id, "AWSAccount", account_id)
+            batch.add_relationship("PART_OF_VPC", "EC2Instance", instance_id, "AWSVpc", vpc_id)
+
+            memberships = min(len(group_ids), max(1, self._count(o.security_groups_per_instance)))
+            for group_id in self.rng.sample(group_ids, memberships):
+                batch.add_relationship("MEMBER_OF_EC2_SECURITY_GROUP", "EC2Instance", instance_id,
+                                       "EC2SecurityGroup", group_id)
+
+            if role_ids and self.rng.random() < o.instance_role_fraction:
+                batch.add_relationship("HAS_ROLE", "EC2Instance", instance_id, "IAMRole", self.rng.choice(role_ids))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic estate and load or snapshot it")
+    for name, field in SyntheticEstateOptions.model_fields.items():
+        flag = f"--{name.replace('_', '-')}"
+        # Typed from the annotation: float fields have int defaults, and bool("false") is True
+        if field.annotation is bool:
+            parser.add_argument(flag, action=argparse.BooleanOptionalAction, default=field.default)
+        elif name == "degree_distribution":
+            parser.add_argument(flag, choices=DEGREE_DISTRIBUTIONS, default=field.default)
+        else:
+            parser.add_argument(flag, type=field.annotation, default=field.default)
+    parser.add_argument("--load", action="store_true", help="Load into the configured Neo4j")
+    parser.add_argument("--mode", default="auto", choices=LOAD_MODES, help="BulkLoader mode used with --load")
+    parser.add_argument("--snapshot", default="", help="Write an inventory snapshot to this directory")
+    args = vars(parser.parse_args())
+
+    load, mode, snapshot = args.pop("load"), args.pop("mode"), args.pop("snapshot")
+    batch = SyntheticEstateGenerator(SyntheticEstateOptions(**args)).generate()
+    result: Dict[str, Any] = {"nodes": batch.node_count, "relationships": batch.relationship_count}
+
+    if snapshot:
+        from app.services.snapshot_service import write_snapshot
+        write_snapshot(batch, snapshot, metadata={"source": "synthetic", "options": args})
+        result["snapshot"] = snapshot
+    if load:
+        from app.dependencies import get_bulk_loader
+        result["load"] = get_bulk_loader().load(batch, mode=mode)
+    print(json.dumps(result, indent=2))
\ No newline at end of file
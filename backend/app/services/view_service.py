@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+from app.models.query import CypherQueryDetails
+from app.models.view import ViewInfo
+from app.services.job_service import Job, JobService
+from app.services.metrics import VIEW_REFRESH_SECONDS
+from app.services.neo4j_service import Neo4jService
+
+logger = logging.getLogger(__name__)
+
+# Words that carry no meaning for matching a question to a view
+STOPWORDS = {
+    "a", "all", "an", "and", "any", "are", "be", "by", "can", "do", "does", "display", "find", "for", "from",
+    "get", "give", "have", "has", "in", "is", "list", "me", "my", "of", "on", "our", "show", "that", "the",
+    "their", "there", "to", "what", "which", "with"
+}
+TOKEN = re.compile(r"[a-z0-9][a-z0-9./-]*")
+
+def tokenize(question: str) -> Set[str]:
+    return {token.rstrip(".") for token in TOKEN.findall(question.lower())} - STOPWORDS
+
+class MaterializedView:
+    def __init__(self, name: str, description: str, cypher_query: str, required: List[Set[str]],
+                 vocabulary: Set[str], question: str):
+        """
+        A named query whose result is precomputed after every ingest.
+
+        A question maps to the view when it contains a word of every required
+        set and no word outside the view's vocabulary, so "public S3 buckets"
+        does while "public S3 buckets in account 1234" doesn't.
+
+        Args:
+            name: Identifier used in /views/{name}
+            description: What the result shows
+            cypher_query: Query computing the result
+            required: Word sets a matching question must each contain one word of
+            vocabulary: Further words a matching question may contain
+            question: Canonical question answered by the view, offered as a suggestion;
+                must match the view
+        """
+        self.name = name
+        self.description = description
+        self.cypher_query = cypher_query
+        self.required = required
+        self.vocabulary = vocabulary.union(*required)
+        if not self.matches(tokenize(question)):
+            raise ValueError(f"The question of view {name} doesn't match it: {question}")
+        self.question = question
+        details = CypherQueryDetails(cypher_query=cypher_query, explanation=f"{description} (materialized view {name})")
+        self.details_json = details.model_dump_json()
+
+    def matches(self, tokens: Set[str]) -> bool:
+        return bool(tokens) and all(tokens & words for words in self.required) and tokens <= self.vocabulary
+
+# The questions asked most often; the same ones the NLP fallback answers
+VIEWS = [
+    MaterializedView(
+        "public_s3_buckets",
+        "Public S3 buckets and their relationships",
+        """
+        MATCH (b:S3Bucket)
+        WHERE b.public = true
+        WITH b LIMIT 100
+        OPTIONAL MATCH (b)-[r]-(related)
+        RETURN b, r, related
+        """,
+        required=[{"public", "publicly"}, {"s3", "bucket", "buckets"}],
+        vocabulary={"access", "accessible", "anonymous", "exposed", "open", "readable"},
+        question="Show public S3 buckets"
+    ),
+    MaterializedView(
+        "internet_open_security_groups",
+        "Security groups with inbound rules open to 0.0.0.0/0",
+        """
+        MATCH (sg:EC2SecurityGroup)-[h:HAS_INBOUND_RULE]->(rule:EC2SecurityGroupRule)
+        WHERE rule.cidr_block = '0.0.0.0/0'
+        RETURN sg, h, rule LIMIT 100
+        """,
+        required=[{"security", "sg", "sgs"}, {"internet", "0.0.0.0/0", "0.0.0.0", "world", "anywhere"}],
+        vocabulary={"access", "allow", "allows", "group", "groups", "inbound", "ingress", "open", "rule", "rules",
+                    "traffic"},
+        question="Show security groups open to the internet"
+    ),
+    MaterializedView(
+        "admin_roles",
+        "IAM roles with admin policies",
+        """
+        MATCH (r:IAMRole)-[h:HAS_POLICY]->(p:IAMPolicy)
+        WHERE p.name CONTAINS 'Admin' OR p.policyname CONTAINS 'Admin'
+        RETURN r, h, p LIMIT 100
+        """,
+        required=[{"role", "roles"}, {"admin", "administrator", "administrative"}],
+        vocabulary={"access", "attached", "iam", "permissions", "policies", "policy", "privileges", "rights"},
+        question="Show IAM roles with admin policies"
+    ),
+    MaterializedView(
+        "instances_per_vpc",
+        "EC2 instances and the VPC each belongs to",
+        """
+        MATCH (i:EC2Instance)-[r:PART_OF_VPC]->(v:AWSVpc)
+        RETURN i, r, v LIMIT 100
+        """,
+        required=[{"ec2", "instance", "instances"}, {"vpc", "vpcs"}],
+        vocabulary={"each", "group", "grouped", "per"},
+        question="Show EC2 instances per VPC"
+    ),
+]
+
+class ViewService:
+    def __init__(self, neo4j_service: Callable[[], Neo4jService], job_service: JobService, target_graph: str,
+                 views: List[MaterializedView] = VIEWS):
+        """
+        Store materialized view results and refresh them after each ingest.
+
+        Results are tagged with the graph generation they were computed at and
+        kept pre-serialized, so serving a fresh one is a lookup and a string
+        join. A stale view is recomputed on its next request. The version is a
+        hash of the result, so a refresh that finds nothing changed keeps it
+        and clients revalidating /views/{name} still get 304.
+
+        Args:
+            neo4j_service: Returns the Neo4j service; called on first refresh
+            job_service: Job runner whose finished jobs trigger refreshes
+            target_graph: Graph the views are computed on
+            views: View definitions
+        """
+        self._neo4j_service = neo4j_service
+        self.job_service = job_service
+        self.target_graph = target_graph
+        self.views: Dict[str, MaterializedView] = {view.name: view for view in views}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._errors: Dict[str, str] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        job_service.add_listener(self.on_job_finished)
+
+    def match(self, question: str) -> Optional[MaterializedView]:
+        tokens = tokenize(question)
+        return next((view for view in self.views.values() if view.matches(tokens)), None)
+
+    def generation(self) -> Optional[str]:
+        return self.job_service.graph_generation(self.target_graph)
+
+    def is_fresh(self, name: str) -> bool:
+        result = self._results.get(name)
+        return result is not None and result["generation"] == self.generation()
+
+    def info(self, name: str) -> ViewInfo:
+        view = self.views[name]
+        result = self._results.get(name, {})
+        return ViewInfo(
+            name=name,
+            description=view.description,
+            cypher_query=view.cypher_query,
+            version=result.get("version", ""),
+            generation=result.get("generation") or "",
+            fresh=self.is_fresh(name),
+            refreshed_at=result.get("refreshed_at"),
+            refresh_seconds=result.get("refresh_seconds", 0.0),
+            nodes=result.get("nodes", 0),
+            relationships=result.get("relationships", 0),
+            error=self._errors.get(name, "")
+        )
+
+    def list(self) -> List[ViewInfo]:
+        return [self.info(name) for name in self.views]
+
+    async def get(self, name: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Result of a view for the current graph, refreshed first if stale.
+
+        Args:
+            name: View name
+            allow_stale: Return the last result while a job is changing the graph
+
+        Returns:
+            The stored result, or None when it can't be computed now
+        """
+        result = self._results.get(name)
+        generation = self.generation()
+        if result is not None and result["generation"] == generation:
+            return result
+        if generation is None:
+            return result if allow_stale else None
+        return await self.refresh(name)
+
+    async def refresh(self, name: str) -> Optional[Dict[str, Any]]:
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            generation = self.generation()
+            previous = self._results.get(name)
+            if generation is None or (previous is not None and previous["generation"] == generation):
+                return previous
+            view = self.views[name]
+            started = time.perf_counter()
+            try:
+                graph_data = await asyncio.to_thread(self._neo4j_service().execute_query, view.cypher_query)
+            except Exception as e:
+                logger.error(f"Refreshing view {name} failed: {str(e)}")
+                self._errors[name] = str(e)
+                return None
+            graph_json = graph_data.model_dump_json()
+            seconds = time.perf_counter() - started
+            VIEW_REFRESH_SECONDS.observe(seconds, view=name)
+            version = hashlib.sha256(graph_json.encode()).hexdigest()[:32]
+            result = {
+                # A job that ran meanwhile may have changed what was read
+                "generation": generation if self.generation() == generation else "",
+                "version": version,
+                "graph_json": graph_json,
+                "refreshed_at": time.time(),
+                "refresh_seconds": round(seconds, 4),
+                "nodes": len(graph_data.nodes),
+                "relationships": len(graph_data.relationships)
+            }
+            self._results[name] = result
+            self._errors.pop(name, None)
+            return result
+
+    async def refresh_all(self):
+        await asyncio.gather(*(self.refresh(name) for name in self.views))
+
+    def on_job_finished(self, job: Job):
+        if job.info.target_graph != self.target_graph:
+            return
+        self._refresh_task = asyncio.get_running_loop().create_task(self.refresh_all())
+
+    def query_response_body(self, view: MaterializedView, result: Dict[str, Any], include_details: bool) -> str:
+        """A QueryResponse body, joined from the stored JSON instead of serializing it again."""
+        details = view.details_json if include_details else "null"
+        return f'{{"graph_data":{result["graph_json"]},"query_details":{details}}}'
+
+    def view_body(self, view: MaterializedView, result: Dict[str, Any], stale: bool) -> str:
+        header = json.dumps({
+            "name": view.name,
+            "description": view.description,
+            "version": result["version"],
+            "generation": result["generation"],
+            "refreshed_at": result["refreshed_at"],
+            "stale": stale
+        })
+        return f'{header[:-1]},"graph_data":{result["graph_json"]}}}'
\ No newline at end of file
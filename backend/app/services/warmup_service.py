@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.services.expansion_service import EXPAND_PLAN_PARAMETERS, EXPAND_QUERIES
+from app.services.job_service import Job, JobService
+from app.services.metrics import WARMUP_SECONDS
+from app.services.neo4j_service import Neo4jService
+from app.services.network_service import NetworkIndexService
+from app.services.nlp_service import FALLBACK_QUERIES, NLPService
+from app.services.query_guard import QueryGuard
+from app.services.search_service import SearchService
+from app.services.suggest_service import SuggestService
+from app.services.view_service import ViewService
+from app.utils.cypher_templates import INTENT_TEMPLATES, RELATIONSHIP_TEMPLATES, RESOURCE_TEMPLATES
+
+logger = logging.getLogger(__name__)
+
+# Labels read by the views and the fallback queries
+HOT_LABELS = ["AWSAccount", "EC2Instance", "S3Bucket", "EC2SecurityGroup", "EC2SecurityGroupRule", "AWSVpc",
+              "IAMRole", "IAMPolicy"]
+
+class WarmupService:
+    def __init__(self, neo4j_service: Callable[[], Neo4jService], nlp_service: Callable[[], Optional[NLPService]],
+                 view_service: ViewService, search_service: SearchService, network_service: NetworkIndexService,
+                 suggest_service: SuggestService, query_guard: QueryGuard, job_service: JobService, target_graph: str,
+                 top_questions: int = 20, touch_limit: int = 10000, step_timeout: float = 10.0,
+                 readiness_budget: float = 30.0):
+        """
+        Pay the cold costs of a new process or a changed graph before users do.
+
+        A warm-up runs at startup and after every job on the graph, in the
+        background. It EXPLAINs the Cypher templates, the fallback queries, the
+        views and the expansion queries so their plans are cached, reads the
+        nodes of the hot labels so their pages are in memory, and replays the
+        most asked questions, which fills the translation cache and plans the
+        translated queries.
+        The startup run also builds the views and the search and network
+        indexes, which otherwise rebuild themselves after ingests.
+
+        The startup run holds readiness for at most readiness_budget seconds;
+        past it the warm-up carries on while traffic is served.
+
+        Args:
+            neo4j_service: Returns the Neo4j service
+            nlp_service: Returns the translator of the server's own OpenAI key; None skips translating
+            view_service: Materialized views, refreshed at startup and used by replayed questions
+            search_service: Search index, built at startup and used to resolve replayed questions
+            network_service: Security group rule index, built at startup
+            suggest_service: Source of the most asked questions
+            query_guard: Checks replayed translations, caching their plan assessments
+            job_service: Job runner whose finished jobs trigger warm-ups
+            target_graph: Graph that is warmed up
+            top_questions: Past questions replayed
+            touch_limit: Nodes read per hot label
+            step_timeout: Seconds after which a step counts as failed
+            readiness_budget: Seconds the startup warm-up may hold readiness
+        """
+        self._neo4j_service = neo4j_service
+        self._nlp_service = nlp_service
+        self.view_service = view_service
+        self.search_service = search_service
+        self.network_service = network_service
+        self.suggest_service = suggest_service
+        self.query_guard = query_guard
+        self.job_service = job_service
+        self.target_graph = target_graph
+        self.top_questions = top_questions
+        self.touch_limit = touch_limit
+        self.step_timeout = step_timeout
+        self.readiness_budget = readiness_budget
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Optional[str] = None
+        self._status: Dict[str, Any] = {"state": "idle"}
+        job_service.add_listener(self.on_job_finished)
+
+    def status(self) -> Dict[str, Any]:
+        return dict(self._status)
+
+    def blocks_readiness(self) -> bool:
+        status = self._status
+        return (status.get("state") == "running" and status.get("reason") == "startup"
+                and time.time() - status["started_at"] < self.readiness_budget)
+
+    def start(self, reason: str):
+        """Run a warm-up in the background; one requested while another runs follows it."""
+        if self._task is not None and not self._task.done():
+            self._pending = reason
+            return
+        self._task = asyncio.get_running_loop().create_task(self.run(reason))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def on_job_finished(self, job: Job):
+        if job.info.target_graph != self.target_graph:
+            return
+        self.start("ingest")
+
+    def _plan_queries(self) -> List[Tuple[str, str, Dict[str, Any]]]:
+        queries = [(f"template {name}", template["query"], {})
+                   for templates in (INTENT_TEMPLATES, RESOURCE_TEMPLATES, RELATIONSHIP_TEMPLATES)
+                   for name, template in templates.items()]
+        queries.extend((f"fallback {name}", cypher, {}) for name, (cypher, _) in FALLBACK_QUERIES.items())
+        queries.extend((f"view {name}", view.cypher_query, {}) for name, view in self.view_service.views.items())
+        queries.extend((f"expand {direction}", cypher, EXPAND_PLAN_PARAMETERS)
+                       for direction, cypher in EXPAND_QUERIES.items())
+        return queries
+
+    def _steps(self, reason: str) -> List[Tuple[str, str, Callable[[], Awaitable[Any]]]]:
+        """(stage, name, step) of a warm-up, in order."""
+        steps: List[Tuple[str, str, Callable[[], Awaitable[Any]]]] = []
+        if reason == "startup":
+            steps.append(("indexes", "views", self.view_service.refresh_all))
+            steps.append(("indexes", "search", self.search_service.refresh))
+            steps.append(("indexes", "network", self.network_service.refresh))
+        for name, cypher, parameters in self._plan_queries():
+            steps.append(("plans", name, lambda cypher=cypher, parameters=parameters: self._blocking(
+                self._neo4j_service().explain, cypher, parameters)))
+        for label in HOT_LABELS:
+            steps.append(("labels", label, lambda label=label: self._blocking(
+                self._neo4j_service().touch_label, label, self.touch_limit)))
+        for question in self.suggest_service.top_questions(self.top_questions):
+            steps.append(("questions", question, lambda question=question: self._replay(question)))
+        return steps
+
+    async def _blocking(self, func: Callable, *args) -> Any:
+        return await asyncio.to_thread(func, *args)
+
+    async def _replay(self, question: str):
+        """Answer a past question the way /queries would, minus running it."""
+        view = self.view_service.match(question)
+        if view is not None:
+            await self.view_service.get(view.name)
+            return
+        nlp_service = self._nlp_service()
+        if nlp_service is None:
+            return
+        entities = await self._blocking(self.search_service.resolve_mentions, question)
+        details = await nlp_service.translate_to_cypher(question, entities)
+        if self.query_guard.enabled:
+            # Plans the query as it will run, after the guard's rewrites
+            await self._blocking(self.query_guard.check, details)
+        else:
+            await self._blocking(self._neo4j_service().explain, details.cypher_query, details.parameters)
+
+    async def run(self, reason: str) -> Dict[str, Any]:
+        """
+        Warm up now.
+
+        Args:
+            reason: "startup" also builds the views and indexes; anything else only warms plans, pages and questions
+
+        Returns:
+            The final status
+        """
+        started = time.perf_counter()
+        self._status = {"state": "running", "reason": reason, "started_at": time.time(), "stage": "connect",
+                        "progress": 0.0, "steps": 0, "completed": 0, "failed": 0, "errors": []}
+        try:
+            await asyncio.wait_for(self._blocking(self._neo4j_service().verify_connectivity), self.step_timeout)
+        except Exception as e:
+            logger.warning(f"Warm-up ({reason}) skipped, Neo4j is not reachable: {str(e)}")
+            self._status.update(state="failed", errors=[f"connect: {str(e)}"], finished_at=time.time())
+            return self._finish(reason, started)
+        steps = self._steps(reason)
+        self._status["steps"] = len(steps)
+        for position, (stage, name, step) in enumerate(steps):
+            self._status["stage"] = stage
+            try:
+                # A hung step keeps its thread, but the warm-up moves on
+                await asyncio.wait_for(step(), self.step_timeout)
+                self._status["completed"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._status["failed"] += 1
+                # Keep the first few errors; the rest are counted
+                if len(self._status["errors"]) < 10:
+                    self._status["errors"].append(f"{stage} {name}: {str(e) or type(e).__name__}")
+            self._status["progress"] = round((position + 1) / len(steps), 4)
+        self._status.update(state="finished", stage="", finished_at=time.time())
+        return self._finish(reason, started)
+
+    def _finish(self, reason: str, started: float) -> Dict[str, Any]:
+        seconds = time.perf_counter() - started
+        WARMUP_SECONDS.observe(seconds, reason=reason)
+        self._status["seconds"] = round(seconds, 4)
+        logger.info(f"Warm-up ({reason}) {self._status['state']} in {seconds:.2f}s: "
+                    f"{self._status.get('completed', 0)} steps done, {self._status.get('failed', 0)} failed")
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            self._task = asyncio.get_running_loop().create_task(self.run(pending))
+        return self.status()
\ No newline at end of file
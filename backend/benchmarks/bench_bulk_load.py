@@ -0,0 +1,81 @@
+"""
+Benchmark initial graph load time for each BulkLoader mode.
+
+Usage (from the backend directory, against the Neo4j configured in app.config):
+
+    python -m benchmarks.bench_bulk_load --nodes 1000000 --modes transactional load_csv
+
+The graph is wiped before every mode. load_csv needs NEO4J_IMPORT_DIR to point
+at the server import directory; admin_import needs the database stopped.
+--csv-only measures normalization and CSV writing without a database.
+"""
+import argparse
+import json
+import tempfile
+import time
+from app.services.bulk_loader import BulkLoader, GraphBatch
+
+def build_batch(node_count: int, instances_per_vpc: int = 200) -> GraphBatch:
+    """One VPC per instances_per_vpc instances, each instance attached to its VPC."""
+    batch = GraphBatch({"AWSVpc": "id", "EC2Instance": "id"})
+    vpc_count = max(1, node_count // (instances_per_vpc + 1))
+    for v in range(vpc_count):
+        batch.add_node("AWSVpc", {"id": f"vpc-{v:08x}", "cidr_block": f"10.{v % 256}.0.0/16", "region": "us-east-1"})
+    for i in range(node_count - vpc_count):
+        instance_id = f"i-{i:012x}"
+        batch.add_node("EC2Instance", {
+            "id": instance_id,
+            "instancetype": "t3.micro",
+            "state": "running",
+            "launch_index": i % 16,
+            "public": i % 10 == 0
+        })
+        batch.add_relationship("PART_OF_VPC", "EC2Instance", instance_id, "AWSVpc", f"vpc-{i % vpc_count:08x}")
+    return batch
+
+def clear_graph(neo4j_service, chunk: int = 10000):
+    """Delete everything in chunks so large graphs don't need one huge transaction."""
+    with neo4j_service.driver.session() as session:
+        while session.run(
+            "MATCH (n) WITH n LIMIT $chunk DETACH DELETE n RETURN count(*) AS deleted", {"chunk": chunk}
+        ).single()["deleted"]:
+            pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--modes", nargs="+", default=["transactional", "load_csv"])
+    parser.add_argument("--csv-only", action="store_true")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    batch = build_batch(args.nodes)
+    results = {
+        "nodes": batch.node_count,
+        "relationships": batch.relationship_count,
+        "build_seconds": round(time.monotonic() - started, 2),
+        "modes": {}
+    }
+
+    if args.csv_only:
+        with tempfile.TemporaryDirectory() as directory:
+            started = time.monotonic()
+            BulkLoader(neo4j_service=None).write_csv(batch, directory)
+            results["modes"]["csv_write"] = {"seconds": round(time.monotonic() - started, 2)}
+        print(json.dumps(results, indent=2))
+        return
+
+    from app.dependencies import get_bulk_loader
+
+    loader = get_bulk_loader()
+    for mode in args.modes:
+        if mode != "admin_import":
+            clear_graph(loader.neo4j_service)
+        details = loader.load(batch, mode=mode)
+        details["nodes_per_second"] = round(batch.node_count / details["seconds"]) if details["seconds"] else None
+        results["modes"][mode] = details
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
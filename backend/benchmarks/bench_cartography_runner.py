@@ -0,0 +1,72 @@
+"""
+Benchmark per-run overhead of the cartography CLI subprocess path against
+warm in-process workers.
+
+Usage (from the backend directory, with cartography installed):
+
+    python -m benchmarks.bench_cartography_runner --runs 20 --workers 2
+
+The default "--help" invocation does no syncing at all, so its wall time is
+pure overhead: interpreter start, imports and argument parsing for the CLI,
+IPC for the warm pool. Pass e.g. --argv "--selected-modules create-indexes"
+to include connecting to the Neo4j configured in app.config.
+"""
+import argparse
+import asyncio
+import json
+import shlex
+import statistics
+import time
+from typing import Dict, Any, List
+from app.config import settings
+from app.services.cartography_log import CartographyRunLog
+from app.services.cartography_service import CartographyService
+from app.services.cartography_worker import CartographyWorkerPool
+
+def summarize(seconds: List[float]) -> Dict[str, Any]:
+    ordered = sorted(seconds)
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 1),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+        "min_ms": round(ordered[0] * 1000, 1)
+    }
+
+async def time_runs(service: CartographyService, argv: List[str], runs: int) -> Dict[str, Any]:
+    env = service._build_env("", "", settings.AWS_REGION)
+    cmd = service._base_command() + argv
+    seconds, codes = [], set()
+    for _ in range(runs):
+        started = time.monotonic()
+        codes.add(await service._run_process(cmd, env, CartographyRunLog()))
+        seconds.append(time.monotonic() - started)
+    return {**summarize(seconds), "exit_codes": sorted(codes)}
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--argv", default="--help", help="Cartography arguments of every run")
+    args = parser.parse_args()
+    argv = shlex.split(args.argv)
+
+    cli = CartographyService(settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD)
+    results: Dict[str, Any] = {"argv": argv, "cli": await time_runs(cli, argv, args.runs)}
+
+    pool = CartographyWorkerPool(size=args.workers, max_jobs_per_worker=args.runs + 1)
+    started = time.monotonic()
+    if await pool.start():
+        results["warm_pool_start_seconds"] = round(time.monotonic() - started, 3)
+        results["worker_import_seconds"] = pool.import_seconds
+        warm = CartographyService(settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD,
+                                  worker_pool=pool)
+        results["warm"] = await time_runs(warm, argv, args.runs)
+        results["overhead_saved_ms"] = round(results["cli"]["mean_ms"] - results["warm"]["mean_ms"], 1)
+        await pool.close()
+    else:
+        results["warm"] = "unavailable: cartography could not be imported by the workers"
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""
+Microbenchmarks of the query hot paths, with baselines for regression gating.
+
+Usage (from the backend directory, no database or OpenAI key needed):
+
+    python -m benchmarks.bench_hot_paths                    # print timings
+    python -m benchmarks.bench_hot_paths --save             # record the baseline
+    python -m benchmarks.bench_hot_paths --compare          # exit 1 on regression
+    python -m benchmarks.bench_hot_paths --compare --threshold 0.5 --only process_result
+
+Every timing is also divided by a fixed pure-Python calibration loop run in
+the same process, so a baseline recorded on one machine can gate runs on
+another. The fastest call is used rather than the median, since noise on a
+shared machine only ever adds time. --compare checks those normalized timings
+against the baseline and fails when any path is slower by more than --threshold (0.3 = 30%), after
+re-measuring regressed paths --retries times.
+
+The frontend's graph building needs networkx; it is skipped when missing.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+from neo4j import Record
+from neo4j.graph import Graph
+from app.models.query import CypherQueryDetails, QueryResponse
+from app.services.neo4j_service import Neo4jService
+from app.services.nlp_service import NLPService
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baselines", "hot_paths.json")
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(BENCHMARK_DIR)), "frontend")
+SIZES = (100, 10_000, 100_000)
+
+def build_records(size: int, instances_per_vpc: int = 50) -> List[Record]:
+    """
+    Records of "MATCH (i:EC2Instance)-[r:PART_OF_VPC]->(v:AWSVpc) RETURN i, r, v",
+    hydrated the way the driver does it. VPCs repeat across records, so
+    _process_result also does its de-duplication work.
+    """
+    graph = Graph()
+    hydrator = Graph.Hydrator(graph)
+    vpc_count = max(1, size // instances_per_vpc)
+    vpcs = [
+        hydrator.hydrate_node(v, ["AWSVpc"], {"id": f"vpc-{v:08x}", "cidr_block": f"10.{v % 256}.0.0/16",
+                                              "region": "us-east-1"})
+        for v in range(vpc_count)
+    ]
+    records = []
+    for i in range(size):
+        node_id = vpc_count + i
+        instance = hydrator.hydrate_node(node_id, ["EC2Instance"], {
+            "id": f"i-{i:012x}",
+            "instanceid": f"i-{i:012x}",
+            "instancetype": "t3.micro",
+            "state": "running",
+            "launch_index": i % 16,
+            "publicipaddress": f"54.{i % 256}.{(i // 256) % 256}.{i % 200}"
+        })
+        vpc = vpcs[i % vpc_count]
+        rel = hydrator.hydrate_relationship(i, node_id, vpc.id, "PART_OF_VPC", {"lastupdated": 1700000000})
+        records.append(Record(zip(["i", "r", "v"], [instance, rel, vpc])))
+    return records
+
+def calibrate() -> float:
+    """Seconds taken by a fixed mix of dict, string and list work; the unit of normalized timings."""
+    def loop():
+        items = {}
+        for i in range(20000):
+            items[f"key-{i}"] = [i, str(i), {"n": i}]
+        return sorted(items, reverse=True)[:10]
+    return measure(loop, min_time=0.5)["min_seconds"]
+
+def measure(func: Callable[[], Any], min_time: float = 0.2, min_repeats: int = 5,
+            max_repeats: int = 1000) -> Dict[str, Any]:
+    """
+    Call func until min_time has passed and at least min_repeats calls were made.
+
+    The garbage collector is paused while timing, as timeit does, so
+    collections triggered by earlier benchmarks' objects don't land in this one.
+    """
+    func()  # warm caches and lazy imports
+    seconds = []
+    gc.collect()
+    gc.disable()
+    try:
+        deadline = time.perf_counter() + min_time
+        while len(seconds) < max_repeats and (len(seconds) < min_repeats or time.perf_counter() < deadline):
+            started = time.perf_counter()
+            func()
+            seconds.append(time.perf_counter() - started)
+    finally:
+        gc.enable()
+    return {
+        "repeats": len(seconds),
+        "median_seconds": statistics.median(seconds),
+        "min_seconds": min(seconds)
+    }
+
+def load_build_graph() -> Optional[Callable]:
+    if FRONTEND_DIR not in sys.path:
+        sys.path.insert(0, FRONTEND_DIR)
+    try:
+        from graph_builder import build_graph
+    except ImportError:
+        return None
+    return build_graph
+
+def hot_paths(sizes=SIZES) -> Dict[str, Callable[[], Any]]:
+    """Benchmark name -> zero-argument callable exercising one hot path."""
+    # _process_result only reads its argument, so no driver is needed
+    neo4j_service = Neo4jService.__new__(Neo4jService)
+    nlp_service = NLPService(openai_api_key="")
+    build_graph = load_build_graph()
+    details = CypherQueryDetails(
+        cypher_query="MATCH (i:EC2Instance)-[r:PART_OF_VPC]->(v:AWSVpc) RETURN i, r, v LIMIT 100",
+        explanation="Instances and their VPCs"
+    )
+    content = json.dumps(details.model_dump())
+    wrapped = f"Here is the query you asked for:\n```json\n{json.dumps(details.model_dump(), indent=2)}\n```\nDone."
+
+    paths: Dict[str, Callable[[], Any]] = {}
+    for size in sizes:
+        records = build_records(size)
+        graph_data = neo4j_service._process_result(records)
+        response = QueryResponse(graph_data=graph_data, query_details=details)
+        plain = json.loads(response.model_dump_json())["graph_data"]
+        paths[f"process_result[{size}]"] = lambda records=records: neo4j_service._process_result(records)
+        paths[f"serialize_response[{size}]"] = response.model_dump_json
+        if build_graph is not None:
+            paths[f"frontend_build_graph[{size}]"] = lambda plain=plain: build_graph(plain)
+    paths["build_prompt"] = lambda: nlp_service.build_prompt("Which EC2 instances are open to the internet?")
+    paths["parse_response[json]"] = lambda: nlp_service.parse_response(content)
+    paths["parse_response[extracted]"] = lambda: nlp_service.parse_response(wrapped)
+    return paths
+
+def run(only: Optional[List[str]] = None, sizes=SIZES) -> Dict[str, Any]:
+    before = calibrate()
+    timings = {}
+    for name, func in hot_paths(sizes).items():
+        if only and not any(part in name for part in only):
+            continue
+        timings[name] = measure(func)
+    # Calibrating on both sides of the run dampens a burst of load during either
+    unit = min(before, calibrate())
+    results = {}
+    for name, timing in timings.items():
+        timing["normalized"] = timing["min_seconds"] / unit
+        results[name] = timing
+        print(f"{name:36s} {timing['min_seconds'] * 1000:10.3f} ms  x{timing['normalized']:10.4g}  "
+              f"({timing['repeats']} runs)", file=sys.stderr)
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "calibration_seconds": unit,
+        "results": results
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Regressions of normalized timings beyond threshold, for paths present in both runs."""
+    regressions = []
+    for name, timing in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        ratio = timing["normalized"] / reference["normalized"]
+        timing["baseline_ratio"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append({"path": name, "ratio": round(ratio, 3)})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline (ignored with --compare)")
+    parser.add_argument("--compare", action="store_true", help="Fail when a path regressed against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.3, help="Allowed slowdown, as a fraction")
+    parser.add_argument("--retries", type=int, default=1, help="Re-measure regressed paths this many times")
+    parser.add_argument("--only", nargs="+", help="Run only paths whose name contains one of these")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES), help="Record counts")
+    args = parser.parse_args()
+
+    results = run(args.only, args.sizes)
+    regressions = []
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for _ in range(args.retries):
+            if not regressions:
+                break
+            # A real regression reproduces; noise on a shared runner usually doesn't
+            rerun = run([regression["path"] for regression in regressions], args.sizes)
+            for name, timing in rerun["results"].items():
+                if timing["normalized"] < results["results"][name]["normalized"]:
+                    results["results"][name] = timing
+            regressions = compare(results, baseline, args.threshold)
+        results["regressions"] = regressions
+    elif args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    print(json.dumps(results, indent=2))
+    for regression in regressions:
+        print(f"REGRESSION {regression['path']}: {regression['ratio']}x baseline "
+              f"(threshold {1 + args.threshold}x)", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
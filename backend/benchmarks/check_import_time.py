@@ -0,0 +1,93 @@
+"""
+Import-time budget check for the API.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.check_import_time
+    python -m benchmarks.check_import_time --budget-ms 800 --top 30
+
+Imports the target module (app.main by default) in a fresh interpreter with
+-X importtime and reports the cost per module and per top-level package. Exits
+1 when the total exceeds --budget-ms, or when a module in --forbid was
+imported: heavy libraries such as boto3, the neo4j driver, requests and numpy
+belong inside the services that use them, so they load on first use rather
+than at worker boot.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List
+
+DEFAULT_FORBIDDEN = ["boto3", "botocore", "neo4j", "numpy", "requests"]
+
+def import_times(module: str) -> List[Dict[str, Any]]:
+    """Self and cumulative import time of every module imported by module, in microseconds."""
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    # The first run writes bytecode caches, which would otherwise be billed to the imports
+    subprocess.run(command, capture_output=True, check=True)
+    process = subprocess.run(command, capture_output=True, text=True, check=True)
+    entries = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us)
+        })
+    return entries
+
+def report(module: str, top: int) -> Dict[str, Any]:
+    entries = import_times(module)
+    target = next((e for e in entries if e["module"] == module), None)
+    packages: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        packages[entry["module"].split(".")[0]] += entry["self_us"]
+    slowest = sorted(entries, key=lambda e: e["self_us"], reverse=True)[:top]
+    return {
+        "module": module,
+        "total_ms": round(target["cumulative_us"] / 1000, 1) if target else 0.0,
+        "modules_imported": len(entries),
+        "packages_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "slowest_modules_ms": {e["module"]: round(e["self_us"] / 1000, 1) for e in slowest},
+        "app_modules_ms": {
+            e["module"]: round(e["cumulative_us"] / 1000, 1) for e in entries if e["module"].startswith("app.")
+        },
+        "imported": {e["module"] for e in entries}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main", help="Module whose import is measured")
+    parser.add_argument("--budget-ms", type=float, default=1500, help="Allowed total import time")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN,
+                        help="Top-level packages that must not be imported eagerly")
+    parser.add_argument("--top", type=int, default=15, help="Modules and packages listed")
+    args = parser.parse_args()
+
+    result = report(args.module, args.top)
+    imported = result.pop("imported")
+    forbidden = sorted(name for name in args.forbid if name in imported)
+    result["budget_ms"] = args.budget_ms
+    result["forbidden_imports"] = forbidden
+    print(json.dumps(result, indent=2))
+
+    failures = []
+    if result["total_ms"] > args.budget_ms:
+        failures.append(f"importing {args.module} took {result['total_ms']} ms, budget is {args.budget_ms} ms")
+    for name in forbidden:
+        failures.append(f"{name} is imported eagerly by {args.module}")
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
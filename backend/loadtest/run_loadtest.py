@@ -0,0 +1,327 @@
+"""
+End-to-end load test of the query API.
+
+Starts a stub OpenAI-compatible server and the FastAPI app (uvicorn) pointed
+at it and at the Neo4j configured in app.config, loads a synthetic estate
+through the app's job API (merged into the existing graph unless
+--reset-graph is given), then drives a weighted mix of query workloads from
+concurrent clients while optionally re-ingesting in the background. Results
+are written as JSON.
+
+Usage (from the backend directory, with Neo4j running):
+
+    python -m loadtest.run_loadtest --duration 60 --concurrency 16 \\
+        --mix repeated_small=4,unique_small=2,large=1,revalidate=3 \\
+        --ingest-interval 10 --output loadtest-results.json
+
+    # Compare against a previous run, failing if p95 got more than 20% worse
+    python -m loadtest.run_loadtest --baseline old.json --max-regression 0.2
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import requests
+from loadtest.stub_openai import StubOpenAIServer
+
+# Questions answered with a handful of nodes
+SMALL_QUESTIONS = [
+    "Which IAM roles have admin access?",
+    "Show public S3 buckets",
+    "Which security groups allow internet access?",
+    "List stopped EC2 instances",
+    "Show AWS accounts",
+]
+# Questions answered with thousands of nodes
+LARGE_QUESTIONS = [
+    "Show all EC2 instances and their VPCs",
+    "Show EC2 instances and everything they are connected to",
+]
+DEFAULT_MIX = "repeated_small=4,unique_small=2,large=1,revalidate=3"
+
+def percentile(ordered: List[float], fraction: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def summarize(samples: List[Tuple[float, int, bool]], seconds: float) -> Dict[str, Any]:
+    """Latency percentiles (ms), throughput and error rate of (latency, bytes, ok) samples."""
+    latencies = sorted(latency for latency, _, _ in samples)
+    errors = sum(1 for _, _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / seconds, 2) if seconds else None,
+        "p50_ms": _ms(percentile(latencies, 0.50)),
+        "p95_ms": _ms(percentile(latencies, 0.95)),
+        "p99_ms": _ms(percentile(latencies, 0.99)),
+        "max_ms": _ms(latencies[-1] if latencies else None),
+        "mean_ms": _ms(statistics.mean(latencies) if latencies else None),
+        "mean_bytes": round(statistics.mean(b for _, b, _ in samples)) if samples else 0
+    }
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+class LoadTest:
+    def __init__(self, base_url: str, mix: Dict[str, float], concurrency: int, seed: int = 0):
+        """
+        Drive the query API with a weighted mix of workloads.
+
+        Workloads:
+            repeated_small: one of a few small questions, asked over and over
+            unique_small: a small question made unique, so nothing can be reused
+            large: questions returning thousands of nodes
+            revalidate: repeated small questions sent with If-None-Match
+
+        Args:
+            base_url: API root, e.g. http://127.0.0.1:8000/api/v1
+            mix: Relative weight per workload
+            concurrency: Concurrent client threads
+            seed: Seed of the workload draws
+        """
+        unknown = set(mix) - {"repeated_small", "unique_small", "large", "revalidate"}
+        if unknown:
+            raise ValueError(f"Unknown workloads: {', '.join(sorted(unknown))}")
+        self.queries_url = f"{base_url}/queries/"
+        self.mix = mix
+        self.concurrency = concurrency
+        self.seed = seed
+        self.samples: Dict[str, List[Tuple[float, int, bool]]] = {name: [] for name in mix}
+        self.statuses: Dict[str, Dict[int, int]] = {name: {} for name in mix}
+        self._etags: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def run(self, duration: float, warmup: float = 0.0) -> float:
+        """Run the clients for warmup + duration seconds; returns the measured seconds."""
+        measure_from = time.monotonic() + warmup
+        deadline = measure_from + duration
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for client in range(self.concurrency):
+                executor.submit(self._client, client, measure_from, deadline)
+        return duration
+
+    def _client(self, client: int, measure_from: float, deadline: float):
+        rng = random.Random(self.seed * 1000 + client)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            workload = rng.choices(names, weights)[0]
+            question, headers = self._request_for(workload, rng)
+            started = time.monotonic()
+            try:
+                response = session.post(self.queries_url, json={"natural_language_query": question},
+                                        headers={"Accept-Encoding": "gzip", **headers}, timeout=120)
+                status, size = response.status_code, len(response.content)
+                if status == 200 and response.headers.get("ETag"):
+                    with self._lock:
+                        self._etags[question] = response.headers["ETag"]
+            except requests.RequestException:
+                status, size = 0, 0
+            latency = time.monotonic() - started
+            if started >= measure_from:
+                with self._lock:
+                    self.samples[workload].append((latency, size, status in (200, 304)))
+                    self.statuses[workload][status] = self.statuses[workload].get(status, 0) + 1
+
+    def _request_for(self, workload: str, rng: random.Random) -> Tuple[str, Dict[str, str]]:
+        if workload == "unique_small":
+            return f"{rng.choice(SMALL_QUESTIONS)} (request {uuid.uuid4().hex[:8]})", {}
+        if workload == "large":
+            return rng.choice(LARGE_QUESTIONS), {}
+        question = rng.choice(SMALL_QUESTIONS)
+        if workload == "revalidate":
+            etag = self._etags.get(question)
+            return question, {"If-None-Match": etag} if etag else {}
+        return question, {}
+
+def run_job(base_url: str, path: str, body: Dict[str, Any], params: Dict[str, Any], timeout: float = 3600) -> Dict[str, Any]:
+    """Submit a job to the app and wait for it; returns the job's result."""
+    response = requests.post(f"{base_url}{path}", json=body, params=params, timeout=30)
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = requests.get(f"{base_url}/jobs/{job_id}", timeout=30).json()
+        if info["status"] not in ("pending", "running"):
+            result = requests.get(f"{base_url}/jobs/{job_id}/result", timeout=30).json()
+            if result["status"] != "succeeded":
+                raise RuntimeError(f"Job {job_id} {result['status']}: {result.get('error', '')}")
+            return result["result"]
+        time.sleep(0.2)
+    raise RuntimeError(f"Job {job_id} did not finish in time")
+
+class BackgroundIngest:
+    def __init__(self, base_url: str, interval: float, seed: int = 1000):
+        """
+        Re-ingest a small synthetic estate every interval seconds while the load runs.
+
+        Each ingest is a synthetic load job on the app (merged, transactional), so it
+        moves the graph generation like any real ingest and competes with queries for
+        Neo4j without replacing the loaded estate.
+        """
+        self.base_url = base_url
+        self.interval = interval
+        self.seed = seed
+        self.loads: List[Dict[str, Any]] = []
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="background-ingest", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        round_number = 0
+        while not self._stop.wait(self.interval):
+            options = {"seed": self.seed + round_number, "accounts": 1, "vpcs_per_account": 2,
+                       "instances_per_vpc": 50, "buckets_per_account": 20, "roles_per_account": 10}
+            try:
+                result = run_job(self.base_url, "/cartography/synthetic", options,
+                                 {"mode": "transactional", "replace": "false"})
+                self.loads.append(result["details"])
+            except Exception:
+                self.errors += 1
+            round_number += 1
+
+    def summary(self) -> Dict[str, Any]:
+        rows = sum(load["nodes"] + load["relationships"] for load in self.loads)
+        seconds = sum(load["seconds"] for load in self.loads)
+        return {
+            "interval_seconds": self.interval,
+            "loads": len(self.loads),
+            "errors": self.errors,
+            "rows": rows,
+            "rows_per_second": round(rows / seconds) if seconds else None
+        }
+
+def load_estate(base_url: str, args) -> Dict[str, Any]:
+    """Load the synthetic estate through the app; only --reset-graph deletes the existing graph first."""
+    options = {"seed": args.seed, "accounts": args.accounts}
+    params = {"mode": "auto", "replace": "true" if args.reset_graph else "false"}
+    return run_job(base_url, "/cartography/synthetic", options, params)["details"]
+
+def start_app(port: int, openai_url: str) -> subprocess.Popen:
+    env = dict(os.environ, OPENAI_BASE_URL=openai_url, OPENAI_API_KEY="stub-key")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env
+    )
+    for _ in range(300):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except requests.RequestException:
+            if process.poll() is not None:
+                raise RuntimeError("The app exited during startup")
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("The app did not start in time")
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Describe changes against a baseline run; returns the regressions beyond max_regression."""
+    regressions = []
+    for name, current in [("overall", result["overall"])] + list(result["workloads"].items()):
+        previous = baseline["overall"] if name == "overall" else baseline.get("workloads", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "error_rate"):
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            print(f"{name:>15} {metric:>15}: {old:>10} -> {new:>10} ({change:+.1%})")
+            worse = change < -max_regression if metric == "throughput_rps" else change > max_regression
+            if worse and metric in ("p95_ms", "throughput_rps"):
+                regressions.append(f"{name} {metric} {change:+.1%}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Comma separated workload=weight pairs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--accounts", type=int, default=5, help="Accounts in the synthetic estate")
+    parser.add_argument("--skip-load", action="store_true", help="Use the graph already in Neo4j")
+    parser.add_argument("--reset-graph", action="store_true",
+                        help="Delete the whole graph before loading the estate; by default it is merged in")
+    parser.add_argument("--ingest-interval", type=float, default=0, help="Seconds between background ingests; 0 disables")
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--base-url", default="", help="Test an already running app instead of starting one")
+    parser.add_argument("--output", default="loadtest-results.json")
+    parser.add_argument("--baseline", default="", help="Earlier result file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    mix = {name: float(weight) for name, weight in (pair.split("=") for pair in args.mix.split(","))}
+    result: Dict[str, Any] = {
+        "commit": git_commit(),
+        "started_at": time.time(),
+        "config": vars(args)
+    }
+    stub = StubOpenAIServer(latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms,
+                            error_rate=args.llm_error_rate, seed=args.seed).start()
+    app = None if args.base_url else start_app(args.port, stub.url)
+    base_url = args.base_url or f"http://127.0.0.1:{args.port}/api/v1"
+    ingest = BackgroundIngest(base_url, args.ingest_interval) if args.ingest_interval > 0 else None
+    try:
+        if not args.skip_load:
+            result["estate"] = load_estate(base_url, args)
+        if ingest is not None:
+            ingest.start()
+        test = LoadTest(base_url, mix, args.concurrency, args.seed)
+        seconds = test.run(args.duration, args.warmup)
+    finally:
+        if ingest is not None:
+            ingest.stop()
+        if app is not None:
+            app.terminate()
+            app.wait()
+        stub.stop()
+
+    result["overall"] = summarize([s for samples in test.samples.values() for s in samples], seconds)
+    result["workloads"] = {name: {**summarize(samples, seconds), "statuses": test.statuses[name]}
+                           for name, samples in test.samples.items()}
+    result["llm_requests"] = stub.requests
+    if ingest is not None:
+        result["ingest"] = ingest.summary()
+
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps({"overall": result["overall"], "output": args.output}, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.max_regression)
+        if regressions:
+            print(f"Regressions beyond {args.max_regression:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+Stand-in for the OpenAI chat completions API used by load tests.
+
+Answers POST /v1/chat/completions with a canned Cypher query chosen by
+keywords in the natural language query, after a configurable delay.
+
+    python -m loadtest.stub_openai --port 8089 --latency-ms 400 --jitter-ms 150
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+
+# First matching keyword wins; the last entry is the default
+CANNED_CYPHER: List[Tuple[str, str, str]] = [
+    ("admin", "MATCH (r:IAMRole)-[h:HAS_POLICY]->(p:IAMPolicy) WHERE p.name CONTAINS 'Admin' "
+              "RETURN r, h, p LIMIT 100", "IAM roles with admin policies"),
+    ("public", "MATCH (b:S3Bucket) WHERE b.public = true RETURN b LIMIT 100", "Public S3 buckets"),
+    ("internet", "MATCH (sg:EC2SecurityGroup)-[h:HAS_INBOUND_RULE]->(rule:EC2SecurityGroupRule) "
+                 "WHERE rule.cidr_block = '0.0.0.0/0' RETURN sg, h, rule LIMIT 100",
+     "Security groups open to the internet"),
+    ("everything", "MATCH (i:EC2Instance)-[r]->(n) RETURN i, r, n LIMIT 5000", "Instances and everything they touch"),
+    ("vpc", "MATCH (i:EC2Instance)-[r:PART_OF_VPC]->(v:AWSVpc) RETURN i, r, v LIMIT 1000", "Instances and their VPCs"),
+    ("stopped", "MATCH (i:EC2Instance) WHERE i.state = 'stopped' RETURN i LIMIT 100", "Stopped instances"),
+    ("", "MATCH (a:AWSAccount) RETURN a LIMIT 25", "AWS accounts"),
+]
+QUERY_LINE = re.compile(r"Natural language query: (.*)")
+
+class StubOpenAIServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 300,
+                 jitter_ms: float = 100, error_rate: float = 0.0, seed: int = 0):
+        """
+        Threaded HTTP server speaking enough of the chat completions API for NLPService.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free one
+            latency_ms: Mean response delay
+            jitter_ms: Standard deviation of the delay
+            error_rate: Fraction of requests answered with HTTP 500
+            seed: Seed of the delay and error draws
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _draw(self) -> Tuple[float, bool]:
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            return delay, self._rng.random() < self.error_rate
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                delay, fail = stub._draw()
+                time.sleep(delay)
+                if fail or not self.path.endswith("/chat/completions"):
+                    self._reply(500 if fail else 404, {"error": {"message": "stub error"}})
+                    return
+                prompt = body.get("messages", [{}])[-1].get("content", "")
+                match = QUERY_LINE.search(prompt)
+                question = (match.group(1) if match else prompt).lower()
+                cypher, explanation = next((c, e) for keyword, c, e in CANNED_CYPHER if keyword in question)
+                content = json.dumps({"cypher_query": cypher, "parameters": {}, "explanation": explanation})
+                self._reply(200, {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}]
+                })
+
+            def _reply(self, status: int, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = StubOpenAIServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate).start()
+    print(f"Stub OpenAI API listening on {server.url}")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
\ No newline at end of file
@@ -0,0 +1,87 @@
+import re
+from app.services.aws_collector import NODE_KEYS, AwsCollectorService, RESOURCE_API_SERVICES
+from app.services.bulk_loader import BulkLoader
+from app.services.graph_generation import MARK_WRITE_QUERY
+
+CLAUSE = re.compile(
+    r"(?P<match>MATCH|MERGE) \((?P<var>\w+):(?P<label>\w+) \{(?P<prop>\w+): (?P<value>[$\w.]+)\}\)"
+    r"|MERGE \((?P<start>\w+)\)-\[\w*:(?P<type>\w+)\]->\((?P<end>\w+)\)"
+    r"|SET (?P<assignments>(?:\w+\.\w+ = [$\w.]+(?:,\s*)?)+)"
+    r"|SET (?P<target>\w+) \+= (?P<source>[$\w.]+)"
+)
+
+class FakeGraph:
+    """Just enough Cypher for the collector's and the bulk loader's write queries."""
+
+    def __init__(self):
+        self.nodes = {}
+        self.relationships = set()
+
+    def execute_query(self, cypher_query, parameters={}):
+        # Constraints and the write marker aren't part of the inventory
+        if cypher_query.startswith("CREATE CONSTRAINT") or cypher_query == MARK_WRITE_QUERY:
+            return
+        rows = parameters["rows"] if "UNWIND" in cypher_query else [None]
+        for row in rows:
+            self._run(cypher_query, parameters, row)
+
+    def _value(self, expression, parameters, row):
+        if expression.startswith("$"):
+            return parameters[expression[1:]]
+        return row if expression == "row" else row[expression[len("row."):]]
+
+    def _run(self, cypher_query, parameters, row):
+        bound = {}
+        for clause in CLAUSE.finditer(cypher_query):
+            if clause["label"]:
+                label, prop = clause["label"], clause["prop"]
+                value = self._value(clause["value"], parameters, row)
+                found = [node for node in self.nodes.values() if node[0] == label and node[1].get(prop) == value]
+                if clause["match"] == "MERGE" and not found:
+                    node = self.nodes[(label, value)] = (label, {prop: value})
+                    found = [node]
+                if not found:
+                    return
+                bound[clause["var"]] = found[0]
+            elif clause["type"]:
+                start, end = bound[clause["start"]], bound[clause["end"]]
+                self.relationships.add((clause["type"], self._identity(start), self._identity(end)))
+            elif clause["assignments"]:
+                for assignment in clause["assignments"].split(","):
+                    target, expression = [part.strip() for part in assignment.split("=")]
+                    var, prop = target.split(".")
+                    bound[var][1][prop] = self._value(expression, parameters, row)
+            elif clause["target"] in bound:
+                bound[clause["target"]][1].update(self._value(clause["source"], parameters, row))
+
+    @staticmethod
+    def _identity(node):
+        label, properties = node
+        return label, properties[NODE_KEYS[label]]
+
+    def contents(self):
+        nodes = {self._identity(node): node[1] for node in self.nodes.values()}
+        return nodes, self.relationships
+
+def collector(neo4j_service) -> AwsCollectorService:
+    service = AwsCollectorService.__new__(AwsCollectorService)
+    service.neo4j_service = neo4j_service
+    service.throttle = None
+    service.checkpoint = None
+    service.run_id = ""
+    return service
+
+def test_bulk_and_transactional_stores_write_the_same_graph():
+    transactional = FakeGraph()
+    service = collector(transactional)
+    collected = {resource: service.collect_resource(resource) for resource in RESOURCE_API_SERVICES}
+    service.store_collected_data(collected)
+
+    bulk = FakeGraph()
+    BulkLoader(bulk).load(service.to_graph_batch(collected), mode="transactional")
+
+    assert transactional.relationships
+    assert {rel_type for rel_type, _, _ in transactional.relationships} == {
+        "BELONGS_TO", "ASSUMES", "HAS_ACCESS_TO", "PROTECTED_BY"
+    }
+    assert bulk.contents() == transactional.contents()
\ No newline at end of file
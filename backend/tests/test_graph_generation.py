@@ -0,0 +1,76 @@
+import asyncio
+from app.services.graph_generation import MARK_WRITE_QUERY, GraphGenerationWatcher
+from app.services.job_service import JobService
+
+class FakeNeo4j:
+    """Counts the graph's nodes and the writes recorded on its marker."""
+
+    def __init__(self):
+        self.nodes = 0
+        self.writes = []
+        self.driver = self
+
+    def execute_query(self, cypher_query, parameters={}):
+        assert cypher_query == MARK_WRITE_QUERY
+        self.writes.append(f"write-{len(self.writes)}")
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, cypher_query):
+        return self
+
+    def single(self):
+        return {"nodes": self.nodes, "relationships": 0, "synced": None, "writes": list(self.writes)}
+
+def watched(neo4j: FakeNeo4j):
+    job_service = JobService()
+    watcher = GraphGenerationWatcher(lambda: neo4j, "graph", interval=60)
+    job_service.watch_generation(watcher)
+    finished = []
+    job_service.add_listener(lambda job: finished.append(job.info.kind))
+    return job_service, watcher, finished
+
+def test_changes_made_elsewhere_notify_listeners():
+    async def scenario():
+        neo4j = FakeNeo4j()
+        job_service, watcher, finished = watched(neo4j)
+        first = await job_service.refresh_generation("graph")
+        assert first is not None and finished == []
+
+        neo4j.nodes += 1
+        await watcher.refresh()
+        assert finished == ["external_change"]
+        assert job_service.graph_generation("graph") not in (None, first)
+
+    asyncio.run(scenario())
+
+def test_jobs_mark_their_writes_and_notify_once():
+    async def scenario():
+        neo4j = FakeNeo4j()
+        job_service, watcher, finished = watched(neo4j)
+        before = await job_service.refresh_generation("graph")
+
+        async def write(context):
+            neo4j.nodes += 1
+            assert job_service.graph_generation("graph") is None
+            return {}
+
+        job, _ = job_service.submit("aws_collect", "graph", {}, write)
+        await job.task
+        assert neo4j.writes == ["write-0"]
+        assert finished == ["aws_collect"]
+        after = job_service.graph_generation("graph")
+        assert after not in (None, before)
+
+        await watcher.refresh()
+        assert finished == ["aws_collect"]
+        assert job_service.graph_generation("graph") == after
+
+    asyncio.run(scenario())
\ No newline at end of file
@@ -0,0 +1,42 @@
+from app.services.graph_projection import GraphProjection
+
+def build_projection() -> GraphProjection:
+    # instance -> role -> two policies; instance -> vpc -> account
+    nodes = [
+        (1, ["EC2Instance"], "i-1"),
+        (2, ["IAMRole"], "role-a"),
+        (3, ["IAMPolicy"], "policy-a"),
+        (4, ["IAMPolicy"], "policy-b"),
+        (5, ["AWSVpc"], "vpc-1"),
+        (6, ["AWSAccount"], "123456789012"),
+    ]
+    relationships = [
+        (1, 2, "HAS_ROLE"),
+        (2, 3, "HAS_POLICY"),
+        (2, 4, "HAS_POLICY"),
+        (1, 5, "PART_OF_VPC"),
+        (5, 6, "RESOURCE_OF"),
+    ]
+    return GraphProjection.build(nodes, relationships)
+
+def reached_keys(projection: GraphProjection, **kwargs) -> set:
+    sources, missing = projection.find(["i-1"], [])
+    assert not missing
+    return {node["key"] for node in projection.reachable(sources, **kwargs)["nodes"]}
+
+def test_reachable_follows_all_paths():
+    assert reached_keys(build_projection(), max_depth=3) == {
+        "role-a", "policy-a", "policy-b", "vpc-1", "123456789012"
+    }
+
+def test_reachable_through_label_expands_sources():
+    # The start node isn't an IAMRole but still expands; only roles expand past it
+    assert reached_keys(build_projection(), max_depth=3, through_labels=["IAMRole"]) == {
+        "role-a", "policy-a", "policy-b", "vpc-1"
+    }
+
+def test_traverse_depths():
+    projection = build_projection()
+    sources, _ = projection.find(["i-1"], [])
+    depth, _ = projection.traverse(sources, 2, through_labels=["IAMRole"])
+    assert sorted(depth[depth >= 0].tolist()) == [0, 1, 1, 2, 2]
\ No newline at end of file
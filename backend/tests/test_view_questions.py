@@ -0,0 +1,20 @@
+import pytest
+from app.services.suggest_service import SuggestService
+from app.services.view_service import VIEWS, MaterializedView, tokenize
+
+class FakeJobService:
+    def add_listener(self, listener):
+        pass
+
+def test_view_suggestions_map_to_their_view():
+    service = SuggestService(":memory:", lambda: None, FakeJobService(), "graph", VIEWS)
+    for view in VIEWS:
+        suggestions = service.suggest(view.question.lower())["suggestions"]
+        assert suggestions and suggestions[0]["kind"] == "view"
+        assert view.matches(tokenize(suggestions[0]["text"]))
+
+def test_view_rejects_question_it_does_not_answer():
+    with pytest.raises(ValueError):
+        MaterializedView("public_buckets", "Public S3 buckets", "MATCH (b:S3Bucket) RETURN b",
+                         required=[{"public"}, {"s3", "buckets"}], vocabulary=set(),
+                         question="Show public S3 buckets and their relationships")
\ No newline at end of file
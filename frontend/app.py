@@ -5,6 +5,7 @@ import networkx as nx
 import matplotlib.pyplot as plt
 import io
 import time
+from graph_builder import build_graph, COLOR_MAP, DEFAULT_COLOR
 
 # Configure the app
 st.set_page_config(
@@ -22,7 +23,24 @@ This application uses Cartography to build a knowledge graph of your AWS infrast
 # Backend API URLs
 API_BASE_URL = "http://localhost:8000/api/v1"
 QUERIES_URL = f"{API_BASE_URL}/queries/"
+SUGGEST_URL = f"{API_BASE_URL}/queries/suggest"
 CARTOGRAPHY_URL = f"{API_BASE_URL}/cartography/run"
+JOBS_URL = f"{API_BASE_URL}/jobs"
+EXPAND_URL = f"{API_BASE_URL}/graph/expand"
+
+# Function to poll a background job until it finishes
+def wait_for_job(job_id, poll_interval=2.0):
+    progress_bar = st.progress(0.0)
+    status_text = st.empty()
+    while True:
+        response = requests.get(f"{JOBS_URL}/{job_id}")
+        response.raise_for_status()
+        job = response.json()
+        progress_bar.progress(job['progress'])
+        status_text.text(f"{job['status']}: {job['message']}")
+        if job['status'] not in ('pending', 'running'):
+            return job
+        time.sleep(poll_interval)
 
 # Initialize session state
 if 'query_history' not in st.session_state:
@@ -31,61 +49,48 @@ if 'query_history' not in st.session_state:
 if 'graph_initialized' not in st.session_state:
     st.session_state.graph_initialized = False
 
+if 'openai_api_key' not in st.session_state:
+    st.session_state.openai_api_key = ""
+
+# Headers of query requests; the OpenAI key travels with each query
+def query_headers():
+    headers = {"Content-Type": "application/json"}
+    if st.session_state.openai_api_key:
+        headers["X-OpenAI-API-Key"] = st.session_state.openai_api_key
+    return headers
+
+# Typeahead suggestions for the query box; none when the backend doesn't answer quickly
+def fetch_suggestions(prefix, limit=8):
+    try:
+        response = requests.get(SUGGEST_URL, params={"q": prefix, "limit": limit}, timeout=0.5)
+        response.raise_for_status()
+        return [suggestion["text"] for suggestion in response.json()["suggestions"]]
+    except (requests.RequestException, ValueError, KeyError):
+        return []
+
+# Add the neighbors of nodes to a result in place; only what the result lacks is sent back
+def expand_result(result, node_ids, direction, relationship_types):
+    graph_data = result['graph_data']
+    response = requests.post(EXPAND_URL, json={
+        "node_ids": node_ids,
+        "direction": direction,
+        "relationship_types": relationship_types,
+        "known_node_ids": [node['id'] for node in graph_data['nodes']],
+        "known_relationship_ids": [rel['id'] for rel in graph_data['relationships']]
+    })
+    response.raise_for_status()
+    expansion = response.json()
+    graph_data['nodes'].extend(expansion['graph_data']['nodes'])
+    graph_data['relationships'].extend(expansion['graph_data']['relationships'])
+    return expansion
+
 # Function to process and visualize graph data
 def visualize_graph(graph_data):
     if not graph_data['nodes']:
         st.warning("No data returned for this query.")
         return
     
-    # Create a NetworkX graph
-    G = nx.DiGraph()
-    
-    # Add nodes with their properties
-    node_labels = {}
-    node_colors = []
-    node_types = []
-    
-    # Define color map for different node types (based on Cartography schema)
-    color_map = {
-        'AWSAccount': '#3498db',  # Blue
-        'EC2Instance': '#2ecc71',  # Green
-        'EC2SecurityGroup': '#e74c3c',  # Red
-        'S3Bucket': '#f39c12',  # Orange
-        'IAMRole': '#9b59b6',  # Purple
-        'AWSVpc': '#1abc9c',  # Turquoise
-        'LoadBalancer': '#34495e',  # Dark blue
-        'DBInstance': '#e67e22',  # Dark orange
-        'AWSUser': '#95a5a6',  # Gray
-        'DynamoDBTable': '#d35400',  # Brown
-        'LambdaFunction': '#27ae60',  # Dark green
-    }
-    
-    default_color = '#bdc3c7'  # Light gray for unknown types
-    
-    # Add nodes to the graph
-    for node in graph_data['nodes']:
-        G.add_node(node['id'])
-        
-        # Create node label based on available properties
-        # Cartography often uses 'name' or 'id' as main identifiers
-        label = node['properties'].get('name', 
-                node['properties'].get('instanceid',
-                node['properties'].get('bucketname',
-                node['properties'].get('arn',
-                node['properties'].get('id', node['id'])))))
-        
-        node_labels[node['id']] = label
-        
-        # Determine node color based on type (label in Neo4j)
-        node_type = node['labels'][0] if node['labels'] else 'Unknown'
-        node_types.append(node_type)
-        node_colors.append(color_map.get(node_type, default_color))
-    
-    # Add edges to the graph
-    edge_labels = {}
-    for rel in graph_data['relationships']:
-        G.add_edge(rel['start_node'], rel['end_node'])
-        edge_labels[(rel['start_node'], rel['end_node'])] = rel['type']
+    G, node_labels, node_colors, node_types, edge_labels = build_graph(graph_data)
     
     # Set up the plot
     plt.figure(figsize=(12, 8))
@@ -120,7 +125,7 @@ def visualize_graph(graph_data):
         for i, node_type in enumerate(unique_types):
             col_idx = i % num_cols
             with legend_cols[col_idx]:
-                color = color_map.get(node_type, default_color)
+                color = COLOR_MAP.get(node_type, DEFAULT_COLOR)
                 st.markdown(
                     f'<div style="background-color: {color}; '
                     f'width: 20px; height: 20px; display: inline-block; '
@@ -188,14 +193,14 @@ with st.form("aws_credentials_form"):
     submitted = st.form_submit_button("Run Cartography & Initialize Knowledge Graph")
     
     if submitted:
-        with st.spinner('Running Cartography and building knowledge graph...'):
+        st.session_state.openai_api_key = openai_api_key
+        with st.spinner('Submitting Cartography job...'):
             try:
                 # Send request to backend to run Cartography
                 payload = {
                     "aws_access_key_id": aws_access_key if not use_sample_data else "",
                     "aws_secret_access_key": aws_secret_key if not use_sample_data else "",
                     "aws_region": aws_region,
-                    "openai_api_key": openai_api_key,
                     "use_sample_data": use_sample_data,
                     "advanced_options": {
                         "collect_dns": collect_dns,
@@ -211,8 +216,12 @@ with st.form("aws_credentials_form"):
                     headers={"Content-Type": "application/json"}
                 )
                 
-                if response.status_code == 200:
-                    result = response.json()
+                if response.status_code == 202:
+                    submission = response.json()
+                    job = wait_for_job(submission['job_id'])
+                
+                if response.status_code == 202 and job['status'] == 'succeeded':
+                    result = requests.get(f"{JOBS_URL}/{job['id']}/result").json()['result']
                     st.success(f"Knowledge graph initialized successfully! {result.get('message', '')}")
                     st.session_state.graph_initialized = True
                     
@@ -228,6 +237,8 @@ with st.form("aws_credentials_form"):
                     - Show me unencrypted S3 buckets
                     - Which EC2 instances can access sensitive S3 buckets?
                     """)
+                elif response.status_code == 202:
+                    st.error(f"Cartography job {job['status']}: {job['error']}")
                 else:
                     st.error(f"Error: {response.status_code} - {response.text}")
             
@@ -238,11 +249,21 @@ with st.form("aws_credentials_form"):
 if st.session_state.graph_initialized:
     st.header("Query Your Cloud Infrastructure")
     
+    # Suggest past and known questions for what was typed so far
+    default_query = "Show me all EC2 instances in my AWS account"
+    typed = st.text_input("Start typing for suggestions:", key="suggest_prefix")
+    if typed:
+        suggestions = fetch_suggestions(typed)
+        if suggestions:
+            default_query = st.selectbox("Suggestions", [typed] + suggestions)
+        else:
+            default_query = typed
+    
     # Input for natural language query
     with st.form("query_form"):
         nl_query = st.text_area(
             "Enter your cloud infrastructure query:", 
-            "Show me all EC2 instances in my AWS account",
+            default_query,
             height=100
         )
         include_details = st.checkbox("Include query details in response", value=True)
@@ -261,7 +282,7 @@ if st.session_state.graph_initialized:
                 response = requests.post(
                     QUERIES_URL,
                     json={"natural_language_query": nl_query, "include_query_details": include_details},
-                    headers={"Content-Type": "application/json"}
+                    headers=query_headers()
                 )
                 
                 if response.status_code == 200:
@@ -270,7 +291,9 @@ if st.session_state.graph_initialized:
                     # Add to query history
                     st.session_state.query_history.append({
                         "query": nl_query,
-                        "result": result
+                        "result": result,
+                        "include_details": include_details,
+                        "etag": response.headers.get("ETag")
                     })
                     
                     # Display query details if available
@@ -302,14 +325,23 @@ if st.session_state.graph_initialized:
                     nl_query = item['query']
                     with st.spinner('Processing your query...'):
                         try:
+                            headers = query_headers()
+                            # Let the backend answer 304 if the graph hasn't changed since
+                            if item.get("etag") and item.get("include_details") == include_details:
+                                headers["If-None-Match"] = item["etag"]
                             response = requests.post(
                                 QUERIES_URL,
                                 json={"natural_language_query": nl_query, "include_query_details": include_details},
-                                headers={"Content-Type": "application/json"}
+                                headers=headers
                             )
                             
-                            if response.status_code == 200:
-                                result = response.json()
+                            if response.status_code in (200, 304):
+                                if response.status_code == 304:
+                                    result = item['result']
+                                else:
+                                    result = response.json()
+                                    item.update(result=result, include_details=include_details,
+                                                etag=response.headers.get("ETag"))
                                 
                                 # Display query details if available
                                 if include_details and result.get('query_details'):
@@ -330,5 +362,28 @@ if st.session_state.graph_initialized:
                         
                         except Exception as e:
                             st.error(f"An error occurred: {str(e)}")
+
+        # Click outward from the latest result without asking a new question
+        with st.expander("Explore Latest Result"):
+            latest = st.session_state.query_history[-1]['result']
+            nodes = {
+                node['id']: f"{node['labels'][0] if node['labels'] else 'Node'}: "
+                            f"{node['properties'].get('name') or node['properties'].get('id') or node['id']}"
+                for node in latest['graph_data']['nodes']
+            }
+            expand_ids = st.multiselect("Nodes to expand", list(nodes), format_func=nodes.get)
+            direction = st.selectbox("Direction", ["both", "out", "in"])
+            types = st.text_input("Relationship types (comma separated, empty for all)")
+            if st.button("Expand") and expand_ids:
+                try:
+                    expansion = expand_result(
+                        latest, expand_ids, direction, [t.strip() for t in types.split(",") if t.strip()]
+                    )
+                    st.caption(f"{len(expansion['graph_data']['nodes'])} new nodes, "
+                               f"{len(expansion['graph_data']['relationships'])} new relationships"
+                               f"{' (truncated)' if expansion['truncated'] else ''}")
+                except Exception as e:
+                    st.error(f"An error occurred: {str(e)}")
+            visualize_graph(latest['graph_data'])
 else:
     st.info("Please set up your AWS credentials and run Cartography to initialize the knowledge graph.")
\ No newline at end of file
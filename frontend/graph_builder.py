@@ -0,0 +1,55 @@
+import networkx as nx
+
+# Define color map for different node types (based on Cartography schema)
+COLOR_MAP = {
+    'AWSAccount': '#3498db',  # Blue
+    'EC2Instance': '#2ecc71',  # Green
+    'EC2SecurityGroup': '#e74c3c',  # Red
+    'S3Bucket': '#f39c12',  # Orange
+    'IAMRole': '#9b59b6',  # Purple
+    'AWSVpc': '#1abc9c',  # Turquoise
+    'LoadBalancer': '#34495e',  # Dark blue
+    'DBInstance': '#e67e22',  # Dark orange
+    'AWSUser': '#95a5a6',  # Gray
+    'DynamoDBTable': '#d35400',  # Brown
+    'LambdaFunction': '#27ae60',  # Dark green
+}
+
+DEFAULT_COLOR = '#bdc3c7'  # Light gray for unknown types
+
+# Function to build the graph drawn by visualize_graph, kept free of streamlit and matplotlib
+def build_graph(graph_data):
+    # Create a NetworkX graph
+    G = nx.DiGraph()
+    
+    # Add nodes with their properties
+    node_labels = {}
+    node_colors = []
+    node_types = []
+    
+    # Add nodes to the graph
+    for node in graph_data['nodes']:
+        G.add_node(node['id'])
+        
+        # Create node label based on available properties
+        # Cartography often uses 'name' or 'id' as main identifiers
+        label = node['properties'].get('name', 
+                node['properties'].get('instanceid',
+                node['properties'].get('bucketname',
+                node['properties'].get('arn',
+                node['properties'].get('id', node['id'])))))
+        
+        node_labels[node['id']] = label
+        
+        # Determine node color based on type (label in Neo4j)
+        node_type = node['labels'][0] if node['labels'] else 'Unknown'
+        node_types.append(node_type)
+        node_colors.append(COLOR_MAP.get(node_type, DEFAULT_COLOR))
+    
+    # Add edges to the graph
+    edge_labels = {}
+    for rel in graph_data['relationships']:
+        G.add_edge(rel['start_node'], rel['end_node'])
+        edge_labels[(rel['start_node'], rel['end_node'])] = rel['type']
+    
+    return G, node_labels, node_colors, node_types, edge_labels
\ No newline at end of file